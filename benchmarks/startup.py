@@ -0,0 +1,86 @@
+"""Benchmark of the start-up path: importing simplepcap and the parser, and constructing parsers for many captures.
+
+Usage:
+    python benchmarks/startup.py [--captures N] [--repeat N]
+"""
+
+import argparse
+import os
+import statistics
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+FILE_HEADER = struct.pack("<IHHiIII", 0xA1B2C3D4, 2, 4, 0, 0, 65535, 1)
+RECORD = struct.pack("<IIII", 1_600_000_000, 0, 60, 60) + bytes(60)
+ROOT = Path(__file__).resolve().parent.parent
+IMPORTS = {
+    "import simplepcap": "import simplepcap",
+    "import DefaultParser": "from simplepcap.parsers import DefaultParser",
+}
+
+
+def measure_import(code: str, repeat: int) -> list[float]:
+    """Return the wall time of `python -c code` minus the time of a bare interpreter."""
+
+    def run(code: str) -> float:
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True, cwd=ROOT)
+        return time.perf_counter() - start
+
+    return [run(code) - run("pass") for _ in range(repeat)]
+
+
+def measure_construction(directory: Path, captures: int, repeat: int) -> dict[str, list[float]]:
+    """Return the time of constructing a parser for every capture, per construction mode."""
+    sys.path.insert(0, str(ROOT))  # the checkout, like the `cwd` of `measure_import()`
+    from simplepcap.parsers import DefaultParser
+
+    paths = []
+    for number in range(captures):
+        path = directory / f"capture-{number}.pcap"
+        path.write_bytes(FILE_HEADER + RECORD * 10)
+        paths.append(path)
+    header = DefaultParser(file_path=paths[0]).file_header
+    fds = [os.open(path, os.O_RDONLY) for path in paths]
+    modes = {
+        "path": lambda path, fd: DefaultParser(file_path=path),
+        "fd": lambda path, fd: DefaultParser(file_path=path, fd=fd),
+        "file_header": lambda path, fd: DefaultParser(file_path=path, file_header=header),
+    }
+    results: dict[str, list[float]] = {mode: [] for mode in modes}
+    try:
+        for _ in range(repeat):
+            for mode, construct in modes.items():
+                start = time.perf_counter()
+                for path, fd in zip(paths, fds):
+                    construct(path, fd)
+                results[mode].append(time.perf_counter() - start)
+    finally:
+        for fd in fds:
+            os.close(fd)
+    return results
+
+
+def main() -> None:
+    arguments = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    arguments.add_argument("--captures", type=int, default=1000)
+    arguments.add_argument("--repeat", type=int, default=5)
+    options = arguments.parse_args()
+
+    for name, code in IMPORTS.items():
+        imports = measure_import(code, options.repeat)
+        print(f"{name}: {statistics.median(imports) * 1000:.1f} ms")
+    with tempfile.TemporaryDirectory(prefix="simplepcap-startup-") as directory:
+        results = measure_construction(Path(directory), options.captures, options.repeat)
+    for mode, times in results.items():
+        per_parser = statistics.median(times) / options.captures * 1_000_000
+        print(f"DefaultParser({mode}): {per_parser:.1f} us per parser")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,6 @@
 __version__ = "0.1.9"
 
-from .types import Version, Reserved, FileHeader, PacketHeader, Packet
-from .parser import Parser
+from ._lazy import lazy_attributes
 
 
 __all__ = [
@@ -10,5 +9,21 @@ __all__ = [
     "FileHeader",
     "PacketHeader",
     "Packet",
+    "SampledPacket",
+    "CaptureStats",
     "Parser",
 ]
+
+__getattr__, __dir__ = lazy_attributes(
+    __name__,
+    {
+        "Version": ".types",
+        "Reserved": ".types",
+        "FileHeader": ".types",
+        "PacketHeader": ".types",
+        "Packet": ".types",
+        "SampledPacket": ".types",
+        "CaptureStats": ".types",
+        "Parser": ".parser",
+    },
+)
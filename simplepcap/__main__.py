@@ -0,0 +1,6 @@
+import sys
+
+from simplepcap.cli import main
+
+
+sys.exit(main())
@@ -0,0 +1,30 @@
+"""Lazy attributes of packages.
+
+The public names of the packages are imported on first access (PEP 562), so `import simplepcap` does not
+import the parser implementations, `dataclasses`, `datetime` or the `LinkType` enum before they are needed.
+"""
+
+from importlib import import_module
+
+
+def lazy_attributes(package: str, attributes: dict[str, str]):
+    """Return the `__getattr__` and `__dir__` functions of a package.
+
+    Args:
+        package: Name of the package (`__name__`).
+        attributes: Maps every public name to the relative name of the module that defines it.
+    """
+    namespace = import_module(package).__dict__
+
+    def __getattr__(name: str):
+        module = attributes.get(name)
+        if module is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(import_module(module, package), name)
+        namespace[name] = value  # later accesses do not go through __getattr__
+        return value
+
+    def __dir__() -> list[str]:
+        return sorted(set(namespace) | set(attributes))
+
+    return __getattr__, __dir__
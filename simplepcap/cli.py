@@ -0,0 +1,429 @@
+"""Command line interface.
+
+```bash
+simplepcap stats capture-*.pcap --workers 8
+simplepcap filter capture.pcap passwords.pcap -e password -e passwd
+simplepcap slice capture.pcap morning.pcap --start 2023-10-01T06:00 --end 2023-10-01T12:00
+simplepcap merge merged.pcap capture-*.pcap
+simplepcap split shards/ capture-*.pcap --size 100M --workers 8
+simplepcap index capture-*.pcap --cache ~/.cache/simplepcap --workers 8
+simplepcap export capture.pcap -o headers.csv
+```
+
+All commands work on the record index or copy records byte for byte, packet data is read only by `filter`
+(and by `merge` and `split`, which copy it).
+
+Work runs in `--workers N` processes, one per CPU by default: commands that take several files process the
+files in parallel, `filter` searches parts of a large capture in parallel and `export` formats parts of a large
+index in parallel. `slice` and `merge` write one ordered stream of records and run in one process.
+`--progress` reports the throughput on stderr while a command runs, for `filter` separately for the search
+and for the copy of the matching packets.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import io
+import json
+import os
+import re
+import sys
+import time
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, TextIO
+
+from simplepcap import __version__
+from simplepcap.exceptions import SimplePcapError
+
+
+SIZE_SUFFIXES = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+PROGRESS_INTERVAL = 0.5  # in seconds
+EXPORT_FIELDS = ("number", "timestamp_ns", "captured_len", "original_len", "offset")
+SEARCH_PART_SIZE = 64 * 1024 * 1024  # in bytes, part of a capture searched by one job
+EXPORT_PART_SIZE = 100_000  # in records, part of an index formatted by one job
+DEFAULT_WORKERS = os.cpu_count() or 1
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Run the command line interface and return the exit code."""
+    options = _argument_parser().parse_args(argv)
+    try:
+        options.command(options)
+    except (SimplePcapError, OSError, ValueError, ImportError) as error:
+        print(f"simplepcap: error: {_describe(error)}", file=sys.stderr)
+        return 1
+    except KeyboardInterrupt:
+        return 130
+    return 0
+
+
+def _argument_parser() -> argparse.ArgumentParser:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--progress", action="store_true", help="report the throughput on stderr")
+    common.add_argument(
+        "--workers",
+        type=_positive_int,
+        default=DEFAULT_WORKERS,
+        metavar="N",
+        help=f"number of worker processes (default: {DEFAULT_WORKERS}, the number of CPUs)",
+    )
+
+    parser = argparse.ArgumentParser(prog="simplepcap", description="Fast operations on pcap captures.")
+    parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
+    commands = parser.add_subparsers(title="commands", required=True, metavar="COMMAND")
+
+    stats = commands.add_parser("stats", parents=[common], help="print a summary of every capture")
+    stats.add_argument("files", nargs="+", type=Path, metavar="FILE")
+    stats.add_argument("--json", action="store_true", help="print one JSON object per capture")
+    stats.add_argument("--cache", type=Path, metavar="DIR", help="index cache directory")
+    stats.set_defaults(command=_stats)
+
+    filter_ = commands.add_parser("filter", parents=[common], help="copy the packets whose data matches")
+    filter_.add_argument("file", type=Path, metavar="FILE")
+    filter_.add_argument("output", type=Path, metavar="OUTPUT")
+    filter_.add_argument("-e", "--pattern", action="append", default=[], help="bytes to find (UTF-8, literal)")
+    filter_.add_argument("-E", "--regex", action="append", default=[], help="regular expression to find")
+    filter_.add_argument("-i", "--ignore-case", action="store_true", help="match case-insensitively")
+    filter_.set_defaults(command=_filter)
+
+    slice_ = commands.add_parser("slice", parents=[common], help="copy the packets of a time or position range")
+    slice_.add_argument("file", type=Path, metavar="FILE")
+    slice_.add_argument("output", type=Path, metavar="OUTPUT")
+    slice_.add_argument("--start", type=_epoch_usec, help="first timestamp (ISO 8601 or epoch seconds, UTC)")
+    slice_.add_argument("--end", type=_epoch_usec, help="end timestamp, exclusive (ISO 8601 or epoch seconds, UTC)")
+    slice_.add_argument("--skip", type=_non_negative_int, default=0, metavar="N", help="skip the first N packets")
+    slice_.add_argument("--count", type=_non_negative_int, metavar="N", help="copy at most N packets")
+    slice_.set_defaults(command=_slice)
+
+    merge = commands.add_parser("merge", parents=[common], help="merge captures ordered by timestamp")
+    merge.add_argument("output", type=Path, metavar="OUTPUT")
+    merge.add_argument("files", nargs="+", type=Path, metavar="FILE")
+    merge.set_defaults(command=_merge)
+
+    split = commands.add_parser("split", parents=[common], help="split captures into smaller captures")
+    split.add_argument("output_dir", type=Path, metavar="OUTPUT_DIR")
+    split.add_argument("files", nargs="+", type=Path, metavar="FILE")
+    criteria = split.add_mutually_exclusive_group(required=True)
+    criteria.add_argument("--packets", type=_positive_int, metavar="N", help="at most N packets per file")
+    criteria.add_argument("--size", type=_size, metavar="SIZE", help="at most SIZE bytes per file (K, M, G suffix)")
+    criteria.add_argument("--interval", type=float, metavar="SECONDS", help="one file per interval of capture time")
+    criteria.add_argument("--flows", type=_positive_int, metavar="N", help="N files, flows are not split")
+    split.set_defaults(command=_split)
+
+    index = commands.add_parser("index", parents=[common], help="build the index cache of captures")
+    index.add_argument("files", nargs="+", type=Path, metavar="FILE")
+    index.add_argument("--cache", type=Path, required=True, metavar="DIR", help="index cache directory")
+    index.set_defaults(command=_index)
+
+    export = commands.add_parser("export", parents=[common], help="export the packet headers")
+    export.add_argument("file", type=Path, metavar="FILE")
+    export.add_argument("-o", "--output", type=Path, metavar="OUTPUT", help="output file, stdout by default")
+    export.add_argument("--format", choices=("csv", "jsonl"), default="csv")
+    export.set_defaults(command=_export)
+    return parser
+
+
+def _stats(options: argparse.Namespace) -> None:
+    cache = str(options.cache) if options.cache else None
+    jobs = [(str(file), cache) for file in options.files]
+    progress = _Progress(options.progress, files=len(options.files))
+    for file, stats in zip(options.files, _run(_stats_job, jobs, workers=options.workers)):
+        progress.update(_file_size(file), files=1)
+        if options.json:
+            print(json.dumps({"file": str(file), **stats}))
+        else:
+            print(f"{file}: " + " ".join(f"{name}={value}" for name, value in stats.items()))
+    progress.finish()
+
+
+def _filter(options: argparse.Namespace) -> None:
+    from simplepcap.parsers import DefaultParser
+    from simplepcap.parsers.default.search import compile_patterns
+    from simplepcap.tools import extract_packets
+
+    flags = re.IGNORECASE if options.ignore_case else 0
+    patterns = [re.compile(re.escape(pattern.encode()), flags) for pattern in options.pattern]
+    patterns += [re.compile(pattern.encode(), flags) for pattern in options.regex]
+    if not patterns:
+        raise ValueError("at least one --pattern or --regex is required")
+    pattern = compile_patterns(patterns)
+    progress = _Progress(options.progress, files=1, phase="search")
+    with DefaultParser(file_path=options.file) as parser:
+        index = parser.get_index()
+        if parser.compression is not None:  # a compressed capture cannot be searched in parts
+            hits = parser.search(pattern)
+            progress.update(_file_size(options.file))
+        else:
+            hits = []
+            parts = _parts(index, SEARCH_PART_SIZE)
+            jobs = [(str(options.file), pattern, index.slice(start, end)) for start, end in parts]
+            for (start, end), part_hits in zip(parts, _run(_search_job, jobs, workers=options.workers)):
+                hits += [start + hit for hit in part_hits]
+                progress.update(_records_size(index, start, end))
+    progress.finish(files=1)
+    progress = _Progress(options.progress, files=1, phase="copy")
+    count = extract_packets(options.file, options.output, hits, index=index, progress=progress.update)
+    progress.finish(files=1)
+    print(f"{count} packets written to {options.output}")
+
+
+def _slice(options: argparse.Namespace) -> None:
+    from simplepcap.parsers import DefaultParser
+    from simplepcap.tools import extract_packets
+
+    progress = _Progress(options.progress, files=1)
+    with DefaultParser(file_path=options.file) as parser:
+        index = parser.get_index()
+        positions = range(len(index))
+        if options.start is not None or options.end is not None:
+            start = options.start if options.start is not None else -(2**63)
+            end = options.end if options.end is not None else 2**63
+            timestamps = parser.get_timestamps("us")
+            positions = (number for number in positions if start <= timestamps[number] < end)
+        positions = _take(positions, options.skip, options.count)
+        count = extract_packets(options.file, options.output, positions, index=index, progress=progress.update)
+    progress.finish(files=1)
+    print(f"{count} packets written to {options.output}")
+
+
+def _merge(options: argparse.Namespace) -> None:
+    from simplepcap.tools import merge_captures
+
+    progress = _Progress(options.progress, files=len(options.files))
+    count = merge_captures(options.files, options.output, progress=progress.update)
+    progress.finish(files=len(options.files))
+    print(f"{count} packets written to {options.output}")
+
+
+def _split(options: argparse.Namespace) -> None:
+    criteria = {"packets": options.packets, "size": options.size, "interval": options.interval, "flows": options.flows}
+    criteria = {name: value for name, value in criteria.items() if value is not None}
+    jobs = [(str(file), str(options.output_dir), criteria) for file in options.files]
+    progress = _Progress(options.progress, files=len(options.files))
+    for file, paths in zip(options.files, _run(_split_job, jobs, workers=options.workers)):
+        progress.update(_file_size(file), files=1)
+        print(f"{file}: {len(paths)} files")
+    progress.finish()
+
+
+def _index(options: argparse.Namespace) -> None:
+    jobs = [(str(file), str(options.cache)) for file in options.files]
+    progress = _Progress(options.progress, files=len(options.files))
+    for file, packets in zip(options.files, _run(_index_job, jobs, workers=options.workers)):
+        progress.update(_file_size(file), files=1)
+        print(f"{file}: {packets} packets")
+    progress.finish()
+
+
+def _export(options: argparse.Namespace) -> None:
+    from simplepcap.parsers import DefaultParser
+
+    progress = _Progress(options.progress, files=1)
+    with DefaultParser(file_path=options.file) as parser:
+        index = parser.get_index()
+        timestamps = parser.get_timestamps("ns")
+    parts = [(start, min(start + EXPORT_PART_SIZE, len(index))) for start in range(0, len(index), EXPORT_PART_SIZE)]
+    jobs = [(options.format, start, timestamps[start:end], index.slice(start, end)) for start, end in parts]
+    output: TextIO = options.output.open("w", newline="") if options.output else sys.stdout
+    try:
+        if options.format == "csv":
+            csv.writer(output).writerow(EXPORT_FIELDS)
+        for (start, end), text in zip(parts, _run(_export_job, jobs, workers=options.workers)):
+            output.write(text)
+            progress.update(_records_size(index, start, end))
+    finally:
+        if options.output:
+            output.close()
+    progress.finish(files=1)
+
+
+def _stats_job(file: str, cache: str | None) -> dict:
+    from simplepcap.parsers import DefaultParser
+    from simplepcap.parsers.default import IndexCache
+
+    with DefaultParser(file_path=file, cache=IndexCache(cache) if cache else None) as parser:
+        stats = parser.get_stats()
+    return {
+        "packets": stats.packets,
+        "captured_bytes": stats.captured_bytes,
+        "original_bytes": stats.original_bytes,
+        "start": stats.start.isoformat() if stats.start else None,
+        "end": stats.end.isoformat() if stats.end else None,
+        "duration": (stats.end - stats.start).total_seconds() if stats.start else None,
+    }
+
+
+def _search_job(file: str, pattern: re.Pattern[bytes], index) -> list[int]:
+    from simplepcap.parsers.default.files import map_file
+    from simplepcap.parsers.default.search import search_buffer
+
+    with map_file(Path(file)) as buffer:
+        return search_buffer(pattern, buffer, index)
+
+
+def _split_job(file: str, output_dir: str, criteria: dict) -> list[str]:
+    from simplepcap.tools import split_capture
+
+    return [str(path) for path in split_capture(file, output_dir, **criteria)]
+
+
+def _index_job(file: str, cache: str) -> int:
+    from simplepcap.parsers import DefaultParser
+    from simplepcap.parsers.default import IndexCache
+
+    with DefaultParser(file_path=file, cache=IndexCache(cache)) as parser:
+        return len(parser.get_index())
+
+
+def _export_job(format: str, first_number: int, timestamps: Iterable[int], index) -> str:
+    numbers = range(first_number, first_number + len(index))
+    rows = zip(numbers, timestamps, index.captured_lens, index.original_lens, index.offsets)
+    output = io.StringIO(newline="")
+    if format == "csv":
+        csv.writer(output).writerows(rows)
+    else:
+        output.writelines(json.dumps(dict(zip(EXPORT_FIELDS, row))) + "\n" for row in rows)
+    return output.getvalue()
+
+
+def _run(job: Callable, arguments: list[tuple], *, workers: int) -> Iterator:
+    """Run the job for every argument tuple, in up to `workers` processes, and yield the results in order."""
+    workers = min(workers, len(arguments))
+    if workers <= 1:
+        yield from (job(*argument) for argument in arguments)
+        return
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        yield from executor.map(job, *zip(*arguments))
+    finally:
+        executor.shutdown(cancel_futures=True)
+
+
+class _Progress:
+    """Throughput report on stderr, updated at most every `PROGRESS_INTERVAL` seconds.
+
+    Commands that read the data in several passes report every pass as a separate `phase`.
+    """
+
+    def __init__(self, enabled: bool, *, files: int, phase: str | None = None) -> None:
+        self.__enabled = enabled
+        self.__files = files
+        self.__prefix = f"{phase}: " if phase else ""
+        self.__done_files = 0
+        self.__done_bytes = 0
+        self.__start = self.__reported = time.monotonic()
+
+    def update(self, size: int, *, files: int = 0) -> None:
+        """Count `size` processed bytes and `files` finished files."""
+        self.__done_files += files
+        self.__done_bytes += size
+        if self.__enabled and time.monotonic() - self.__reported >= PROGRESS_INTERVAL:
+            self.__report(end="\r")
+
+    def finish(self, *, files: int = 0) -> None:
+        self.__done_files += files
+        if self.__enabled:
+            self.__report(end="\n")
+
+    def __report(self, *, end: str) -> None:
+        self.__reported = time.monotonic()
+        elapsed = max(self.__reported - self.__start, 1e-9)
+        megabytes = self.__done_bytes / 1024**2
+        print(
+            f"{self.__prefix}{self.__done_files}/{self.__files} files, {megabytes:.1f} MiB in {elapsed:.1f} s "
+            f"({megabytes / elapsed:.1f} MiB/s)",
+            end=end,
+            file=sys.stderr,
+            flush=True,
+        )
+
+
+def _parts(index, size: int) -> list[tuple[int, int]]:
+    """Split the records into consecutive `(start, end)` ranges of about `size` bytes."""
+    count = len(index)
+    if not count:
+        return []
+    offsets = index.offsets
+    boundaries = [0]
+    while boundaries[-1] < count:
+        boundaries.append(max(bisect_left(offsets, offsets[boundaries[-1]] + size), boundaries[-1] + 1))
+    return list(zip(boundaries, boundaries[1:]))
+
+
+def _records_size(index, start: int, end: int) -> int:
+    """Size in bytes of the records `start` to `end` (exclusive)."""
+    from simplepcap.parsers.default.records import PACKET_HEADER_SIZE
+
+    last = end - 1
+    return index.offsets[last] + PACKET_HEADER_SIZE + index.captured_lens[last] - index.offsets[start]
+
+
+def _take(positions: Iterable[int], skip: int, count: int | None) -> Iterator[int]:
+    for number, position in enumerate(positions):
+        if number < skip:
+            continue
+        if count is not None and number >= skip + count:
+            return
+        yield position
+
+
+def _file_size(file: Path) -> int:
+    try:
+        return file.stat().st_size
+    except OSError:
+        return 0
+
+
+def _describe(error: BaseException) -> str:
+    message = str(error) or type(error).__name__
+    file_path = getattr(error, "file_path", None)
+    if file_path and file_path not in message:
+        message = f"{file_path}: {message}"
+    return message
+
+
+def _epoch_usec(value: str) -> int:
+    try:
+        return round(float(value) * 1_000_000)
+    except (ValueError, OverflowError):  # not a number, or not finite
+        pass
+    try:
+        timestamp = datetime.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid timestamp: {value!r}") from None
+    if timestamp.tzinfo is None:
+        timestamp = timestamp.replace(tzinfo=timezone.utc)
+    delta = timestamp - datetime(1970, 1, 1, tzinfo=timezone.utc)
+    return (delta.days * 86400 + delta.seconds) * 1_000_000 + delta.microseconds
+
+
+def _size(value: str) -> int:
+    match = re.fullmatch(r"(\d+)([KMGT]?)i?B?", value.strip(), re.IGNORECASE)
+    if match is None or int(match[1]) == 0:
+        raise argparse.ArgumentTypeError(f"invalid size: {value!r}")
+    return int(match[1]) * SIZE_SUFFIXES[match[2].upper()]
+
+
+def _positive_int(value: str) -> int:
+    number = _non_negative_int(value)
+    if number == 0:
+        raise argparse.ArgumentTypeError(f"must be positive: {value!r}")
+    return number
+
+
+def _non_negative_int(value: str) -> int:
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid number: {value!r}") from None
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must not be negative: {value!r}")
+    return number
+
+
+if __name__ == "__main__":
+    sys.exit(main())
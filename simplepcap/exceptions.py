@@ -1,6 +1,11 @@
 class SimplePcapError(Exception):
     """Base class for exceptions in this module."""
 
+    def __reduce__(self):
+        # The default reduction calls `cls(*args)`, which drops the keyword-only arguments of the subclasses,
+        # so the errors could not be unpickled (e.g. when raised in a worker process).
+        return _rebuild_error, (type(self), self.args), self.__dict__
+
 
 class PcapFileError(SimplePcapError):
     """Exception raised for errors in the input file."""
@@ -49,3 +54,9 @@ class ReadAfterCloseError(PcapFileError):
         self.packet_number = packet_number
         self.file_path = file_path
         super().__init__(*args, **kwargs)
+
+
+def _rebuild_error(cls: type[SimplePcapError], args: tuple) -> SimplePcapError:
+    error = cls.__new__(cls, *args)
+    error.args = args
+    return error
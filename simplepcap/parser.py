@@ -12,8 +12,9 @@ call the `open()` and `close()` methods. (preferred way is to use ["with"](https
 from __future__ import annotations
 
 from abc import abstractmethod
+import re
 from pathlib import Path
-from typing import Protocol, runtime_checkable
+from typing import Iterable, Protocol, runtime_checkable
 
 from .types import Packet, FileHeader
 
@@ -194,6 +195,32 @@ class Parser(Protocol):
         """Return a list of all packet in the file. This method is not recommended for large files."""
         raise NotImplementedError
 
+    @abstractmethod
+    def search(self, patterns: bytes | re.Pattern[bytes] | Iterable[bytes | re.Pattern[bytes]]) -> list[int]:
+        """Return the numbers of the packets whose data contains any of the patterns.
+
+        Byte strings are matched literally, compiled `bytes` regexes are matched as regexes.
+        A match never spans two packets.
+
+        Example:
+            ``` py
+            import re
+            from simplepcap.parsers import SomeParser
+
+
+            with SomeParser(file_path="file.pcap") as parser:
+                numbers = parser.search([b"evil.example", re.compile(rb"User-Agent: curl/[0-9.]+")])
+            ```
+
+        Raises:
+            simplepcap.exceptions.FileIsNotOpenError: if the file is not open.
+            TypeError: if a pattern is not `bytes` or a compiled `bytes` regex.
+
+        Returns:
+            Packet numbers (zero based, in file order) of the matching packets.
+        """
+        raise NotImplementedError
+
     @abstractmethod
     def open(self) -> None:
         """Open the file. This method is not needed if the parser is used as a context manager."""
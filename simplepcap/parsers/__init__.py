@@ -1,6 +1,14 @@
-from .default import DefaultParser, DefaultParserIterator
+from simplepcap._lazy import lazy_attributes
 
 __all__ = [
     "DefaultParser",
     "DefaultParserIterator",
 ]
+
+__getattr__, __dir__ = lazy_attributes(
+    __name__,
+    {
+        "DefaultParser": ".default",
+        "DefaultParserIterator": ".default",
+    },
+)
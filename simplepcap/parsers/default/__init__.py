@@ -1,8 +1,23 @@
-from .iterator import DefaultParserIterator
-from .parser import DefaultParser
+from simplepcap._lazy import lazy_attributes
 
 
 __all__ = [
+    "BatchPool",
     "DefaultParser",
     "DefaultParserIterator",
+    "IndexCache",
+    "PacketBatch",
+    "RecordIndex",
 ]
+
+__getattr__, __dir__ = lazy_attributes(
+    __name__,
+    {
+        "BatchPool": ".batches",
+        "DefaultParser": ".parser",
+        "DefaultParserIterator": ".iterator",
+        "IndexCache": ".cache",
+        "PacketBatch": ".batches",
+        "RecordIndex": ".index",
+    },
+)
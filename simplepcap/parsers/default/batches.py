@@ -0,0 +1,393 @@
+"""Batches of records in shared memory, for handing packets to worker processes without pickling them.
+
+A `PacketBatch` packs many records into one `multiprocessing.shared_memory` segment:
+
+```
++--------+---------------------------------------------+----------------------------------+
+| header | record table: max_records entries           | data: record payloads, back to   |
+| count, | (data offset, timestamp_sec, timestamp_usec, | back, read directly from the     |
+| end    |  captured_len, original_len)                | capture into the segment         |
++--------+---------------------------------------------+----------------------------------+
+```
+
+Pickling a batch (e.g. passing it to `ProcessPoolExecutor.submit()`) transfers only the segment name.
+The worker attaches to the segment and reads the payloads as memoryviews, nothing is copied.
+Segments are owned by a `BatchPool`, which recycles them once the workers are done with them.
+"""
+
+from __future__ import annotations
+
+import io
+import struct
+import sys
+import threading
+import time
+from multiprocessing import shared_memory
+from typing import BinaryIO, Iterator, NamedTuple
+
+from simplepcap.exceptions import IncorrectPacketSizeError, WrongPacketHeaderError
+from .records import PACKET_HEADER_SIZE, record_header_struct
+
+
+DEFAULT_SEGMENT_SIZE = 16 * 1024 * 1024  # in bytes
+DEFAULT_MAX_SEGMENTS = 16
+AVERAGE_RECORD_SIZE = 256  # in bytes, sizes the record table when max_records is not given
+SEGMENT_HEADER = struct.Struct("=QQ")  # number of records, end of the data
+TABLE_ENTRY = struct.Struct("=QIIII")  # data offset, timestamp_sec, timestamp_usec, captured_len, original_len
+
+
+class BatchRecord(NamedTuple):
+    """Record stored in a `PacketBatch`.
+
+    Attributes:
+        timestamp_sec:
+            seconds part of the timestamp.
+        timestamp_usec:
+            microseconds part of the timestamp.
+        captured_len:
+            the number of bytes of packet data saved in the file.
+        original_len:
+            the length of the packet as it appeared on the network.
+        data:
+            packet data, a read-only view into the shared memory segment.
+    """
+
+    timestamp_sec: int
+    timestamp_usec: int
+    captured_len: int
+    original_len: int
+    data: memoryview
+
+
+class PacketBatch:
+    """Records packed into a shared memory segment.
+
+    Batches are created by a `BatchPool` (owner side) and attached by name in the workers.
+    Views returned by the batch must be released (or dropped) before the batch is closed.
+
+    Example:
+        ``` py
+        def count_bytes(batch: PacketBatch) -> int:
+            with batch:  # attached in the worker
+                return sum(record.captured_len for record in batch)
+        ```
+    """
+
+    def __init__(self, segment: shared_memory.SharedMemory, *, max_records: int) -> None:
+        """Constructor method for PacketBatch. Use `BatchPool.acquire()` or `PacketBatch.attach()` instead."""
+        self.__segment = segment
+        self.__buffer = segment.buf
+        self.__max_records = max_records
+        self.__data_start = _data_start(max_records)
+
+    def __reduce__(self):
+        return _attach, (self.name, self.__max_records)
+
+    def __enter__(self) -> PacketBatch:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return SEGMENT_HEADER.unpack_from(self.__buffer)[0]
+
+    def __getitem__(self, number: int) -> BatchRecord:
+        count = len(self)
+        if number < 0:
+            number += count
+        if not 0 <= number < count:
+            raise IndexError("batch index out of range")
+        offset, *fields = TABLE_ENTRY.unpack_from(self.__buffer, SEGMENT_HEADER.size + number * TABLE_ENTRY.size)
+        end = offset + fields[2]
+        return BatchRecord(*fields, self.__buffer[offset:end].toreadonly())
+
+    def __iter__(self) -> Iterator[BatchRecord]:
+        buffer, unpack_from = self.__buffer, TABLE_ENTRY.unpack_from
+        for position in range(SEGMENT_HEADER.size, self.__table_end(len(self)), TABLE_ENTRY.size):
+            offset, timestamp_sec, timestamp_usec, captured_len, original_len = unpack_from(buffer, position)
+            end = offset + captured_len
+            yield BatchRecord(
+                timestamp_sec, timestamp_usec, captured_len, original_len, buffer[offset:end].toreadonly()
+            )
+
+    @classmethod
+    def attach(cls, name: str, *, max_records: int) -> PacketBatch:
+        """Attach to the segment of a batch created in another process."""
+        if sys.version_info >= (3, 13):
+            # The owner unlinks the segment, the resource tracker of this process must not.
+            segment = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            segment = shared_memory.SharedMemory(name=name)
+        return cls(segment, max_records=max_records)
+
+    @property
+    def name(self) -> str:
+        """Name of the shared memory segment."""
+        return self.__segment.name
+
+    @property
+    def max_records(self) -> int:
+        return self.__max_records
+
+    @property
+    def free_bytes(self) -> int:
+        """Number of payload bytes that still fit into the batch."""
+        return self.__segment.size - SEGMENT_HEADER.unpack_from(self.__buffer)[1]
+
+    def clear(self) -> None:
+        """Remove all records."""
+        SEGMENT_HEADER.pack_into(self.__buffer, 0, 0, self.__data_start)
+
+    def append(self, timestamp_sec: int, timestamp_usec: int, original_len: int, data) -> bool:
+        """Append a record. Return `False` if it does not fit into the batch."""
+        count, end = SEGMENT_HEADER.unpack_from(self.__buffer)
+        captured_len = len(data)
+        if count == self.__max_records or end + captured_len > self.__segment.size:
+            return False
+        new_end = end + captured_len
+        self.__buffer[end:new_end] = data
+        self.__add_entry(count, end, timestamp_sec, timestamp_usec, captured_len, original_len)
+        return True
+
+    def fill(self, stream: BinaryIO, *, byteorder: str, file_path: str, first_number: int = 0) -> bool:
+        """Read records from a seekable stream positioned at a record header until the batch is full.
+
+        Payloads are read directly into the segment. A record that does not fit is left in the stream.
+
+        Args:
+            stream: Seekable binary stream.
+            byteorder: Byte order of the record header fields.
+            file_path: Path to the pcap file. Used in error messages.
+            first_number: Number of the first record read, used in error messages.
+
+        Raises:
+            ValueError: if a record is larger than an empty batch.
+            simplepcap.exceptions.WrongPacketHeaderError: if a record header is truncated.
+            simplepcap.exceptions.IncorrectPacketSizeError: if a record is truncated.
+
+        Returns:
+            `False` if the end of the stream was reached.
+        """
+        unpack = record_header_struct(byteorder).unpack
+        read, readinto = stream.read, stream.readinto
+        buffer, size = self.__buffer, self.__segment.size
+        count, end = SEGMENT_HEADER.unpack_from(buffer)
+        try:
+            while count < self.__max_records:
+                raw_header = read(PACKET_HEADER_SIZE)
+                if not raw_header:
+                    return False
+                if len(raw_header) != PACKET_HEADER_SIZE:
+                    raise WrongPacketHeaderError(
+                        f"Invalid packet header size: {len(raw_header)}. Expected {PACKET_HEADER_SIZE}",
+                        packet_number=first_number + count,
+                        file_path=file_path,
+                    )
+                timestamp_sec, timestamp_usec, captured_len, original_len = unpack(raw_header)
+                new_end = end + captured_len
+                if new_end > size:
+                    if count == 0:
+                        raise ValueError(f"Record of {captured_len} bytes does not fit into an empty batch")
+                    stream.seek(-PACKET_HEADER_SIZE, io.SEEK_CUR)
+                    return True
+                with buffer[end:new_end] as target:
+                    read_len = readinto(target)
+                if read_len != captured_len:
+                    raise IncorrectPacketSizeError(
+                        f"Invalid packet size: {read_len}. Expected {captured_len}",
+                        packet_number=first_number + count,
+                        file_path=file_path,
+                    )
+                self.__add_entry(count, end, timestamp_sec, timestamp_usec, captured_len, original_len)
+                count, end = count + 1, new_end
+            return True
+        finally:
+            SEGMENT_HEADER.pack_into(buffer, 0, count, end)
+
+    def close(self) -> None:
+        """Detach from the segment. The segment itself is removed by the owning `BatchPool`.
+
+        Raises:
+            BufferError: if views of the batch data are still alive.
+        """
+        if self.__buffer is None:
+            return
+        buffer, self.__buffer = self.__buffer, None
+        buffer.release()
+        self.__segment.close()
+
+    def _unlink(self) -> None:
+        self.close()
+        self.__segment.unlink()
+
+    def __add_entry(self, count, offset, timestamp_sec, timestamp_usec, captured_len, original_len) -> None:
+        position = SEGMENT_HEADER.size + count * TABLE_ENTRY.size
+        TABLE_ENTRY.pack_into(
+            self.__buffer, position, offset, timestamp_sec, timestamp_usec, captured_len, original_len
+        )
+        SEGMENT_HEADER.pack_into(self.__buffer, 0, count + 1, offset + captured_len)
+
+    def __table_end(self, count: int) -> int:
+        return SEGMENT_HEADER.size + count * TABLE_ENTRY.size
+
+
+class BatchPool:
+    """Owner of the shared memory segments of `PacketBatch` objects, which are recycled after use.
+
+    `acquire()` returns an empty batch, creating a new segment while fewer than `max_segments` exist and
+    waiting for a `release()` otherwise. All segments are removed by `close()`. The pool is thread-safe,
+    so batches can be released from the callbacks of futures. Release a batch whether or not its worker
+    succeeded: a batch that is never released stays in use, and once all segments are in use `acquire()`
+    waits for it forever, unless a `timeout` is set.
+
+    Example:
+        ``` py
+        from concurrent.futures import ProcessPoolExecutor
+
+        from simplepcap.parsers import DefaultParser
+        from simplepcap.parsers.default import BatchPool
+
+
+        with BatchPool() as pool, DefaultParser(file_path="file.pcap") as parser, ProcessPoolExecutor() as executor:
+            futures = []
+            for batch in parser.iter_batches(pool):
+                future = executor.submit(count_bytes, batch)  # only the segment name is pickled
+                future.add_done_callback(lambda _, name=batch.name: pool.release(name))  # also when it failed
+                futures.append(future)
+            total = sum(future.result() for future in futures)
+        ```
+    """
+
+    def __init__(
+        self,
+        *,
+        segment_size: int = DEFAULT_SEGMENT_SIZE,
+        max_records: int | None = None,
+        max_segments: int = DEFAULT_MAX_SEGMENTS,
+        timeout: float | None = None,
+    ) -> None:
+        """Constructor method for BatchPool.
+
+        Args:
+            segment_size: Size of a segment in bytes, including the record table.
+            max_records: Maximum number of records per batch. Defaults to one per 256 bytes of segment.
+            max_segments: Maximum number of segments, `acquire()` waits when all of them are in use.
+            timeout: Default number of seconds `acquire()` waits for a released batch, `None` waits as long as
+                it takes. Waiting is the normal backpressure when the workers are slower than the reader.
+
+        Raises:
+            ValueError: if the segments cannot hold any record or `max_segments` is not positive.
+        """
+        if max_records is None:
+            max_records = max(segment_size // AVERAGE_RECORD_SIZE, 1)
+        if max_records < 1 or _data_start(max_records) >= segment_size:
+            raise ValueError("segment_size is too small for the record table")
+        if max_segments < 1:
+            raise ValueError("max_segments must be positive")
+        self.__segment_size = segment_size
+        self.__max_records = max_records
+        self.__max_segments = max_segments
+        self.__timeout = timeout
+        self.__batches: dict[str, PacketBatch] = {}
+        self.__free: list[PacketBatch] = []
+        self.__condition = threading.Condition()
+        self.__closed = False
+
+    def __enter__(self) -> BatchPool:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    @property
+    def segments(self) -> int:
+        """Number of segments created so far."""
+        return len(self.__batches)
+
+    def acquire(self, timeout: float | None = None) -> PacketBatch:
+        """Return an empty batch.
+
+        Args:
+            timeout: Number of seconds to wait for a released batch, the `timeout` of the pool by default.
+                The time is counted from the call, not restarted by releases that another thread takes.
+
+        Raises:
+            TimeoutError: if no batch was released within `timeout` seconds.
+            ValueError: if the pool is closed.
+        """
+        if timeout is None:
+            timeout = self.__timeout
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self.__condition:
+            while True:
+                if self.__closed:
+                    raise ValueError("BatchPool is closed")
+                if self.__free:
+                    batch = self.__free.pop()
+                    break
+                if len(self.__batches) < self.__max_segments:
+                    segment = shared_memory.SharedMemory(create=True, size=self.__segment_size)
+                    batch = PacketBatch(segment, max_records=self.__max_records)
+                    self.__batches[batch.name] = batch
+                    break
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError("No batch was released in time")
+                self.__condition.wait(remaining)
+        batch.clear()
+        return batch
+
+    def release(self, batch: PacketBatch | str) -> None:
+        """Return a batch (or the name of its segment) to the pool for reuse."""
+        name = batch if isinstance(batch, str) else batch.name
+        with self.__condition:
+            batch = self.__batches[name]
+            if batch not in self.__free:
+                self.__free.append(batch)
+            self.__condition.notify()
+
+    def close(self) -> None:
+        """Remove all segments. Workers must be done with the batches."""
+        with self.__condition:
+            self.__closed = True
+            batches, self.__batches, self.__free = list(self.__batches.values()), {}, []
+            self.__condition.notify_all()
+        for batch in batches:
+            batch._unlink()
+
+
+def iter_batches(
+    stream: BinaryIO,
+    pool: BatchPool,
+    *,
+    byteorder: str,
+    file_path: str,
+) -> Iterator[PacketBatch]:
+    """Fill batches from the pool with the records of a stream positioned at the first record header.
+
+    Every yielded batch is owned by the consumer until it is released to the pool.
+    """
+    number = 0
+    while True:
+        batch = pool.acquire()
+        try:
+            more = batch.fill(stream, byteorder=byteorder, file_path=file_path, first_number=number)
+        except BaseException:
+            pool.release(batch)
+            raise
+        number += len(batch)
+        if len(batch):
+            yield batch
+        else:
+            pool.release(batch)
+        if not more:
+            return
+
+
+def _attach(name: str, max_records: int) -> PacketBatch:
+    return PacketBatch.attach(name, max_records=max_records)
+
+
+def _data_start(max_records: int) -> int:
+    return SEGMENT_HEADER.size + max_records * TABLE_ENTRY.size
@@ -0,0 +1,173 @@
+"""On-disk cache of record indexes.
+
+Building a `RecordIndex` means reading every record header of the capture. The cache stores the index
+columns in a file that is memory mapped when it is loaded again, so repeated header-level queries over the
+same capture skip the file scan entirely.
+
+Captures are identified by their resolved path, size and modification time, or by a hash of their contents
+when `hash_content=True` (then a moved or copied capture is still found in the cache).
+The least recently used entries are removed when the cache grows beyond `max_bytes`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import mmap
+import os
+import struct
+import sys
+from pathlib import Path
+
+from .index import RecordIndex
+
+
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024  # in bytes
+CACHE_FILE_SUFFIX = ".idx"
+CACHE_FILE_MAGIC = b"SPCIDX01"
+CACHE_FILE_HEADER = struct.Struct("<8sB7xQ")  # magic, byte order, padding, number of records
+CACHE_COLUMNS = (
+    ("offsets", "Q"),
+    ("timestamps_sec", "I"),
+    ("timestamps_usec", "I"),
+    ("captured_lens", "I"),
+    ("original_lens", "I"),
+)
+HASH_CHUNK_SIZE = 1024 * 1024  # in bytes
+NATIVE_BYTE_ORDER = 0 if sys.byteorder == "little" else 1
+
+
+class IndexCache:
+    """Directory of cached record indexes.
+
+    Example:
+        ``` py
+        from simplepcap.parsers import DefaultParser
+        from simplepcap.parsers.default import IndexCache
+
+
+        cache = IndexCache("~/.cache/simplepcap", max_bytes=10 * 1024**3)
+        with DefaultParser(file_path="file.pcap", cache=cache) as parser:
+            print(parser.get_stats())  # scans the file only the first time
+        ```
+    """
+
+    def __init__(self, directory: Path | str, *, max_bytes: int = DEFAULT_MAX_BYTES, hash_content: bool = False):
+        """Constructor method for IndexCache.
+
+        Args:
+            directory: Cache directory. Created if it does not exist.
+            max_bytes: Disk budget of the cache.
+            hash_content: Identify captures by a SHA-256 hash of their contents instead of path and mtime.
+                Hashing reads the whole capture, but survives renames and copies.
+        """
+        self.__directory = Path(directory).expanduser()
+        self.__directory.mkdir(parents=True, exist_ok=True)
+        self.__max_bytes = max_bytes
+        self.__hash_content = hash_content
+
+    @property
+    def directory(self) -> Path:
+        return self.__directory
+
+    @property
+    def size(self) -> int:
+        """Total size of the cached indexes in bytes."""
+        return sum(stat.st_size for stat, _ in self.__stat_entries())
+
+    def key(self, file_path: Path) -> str:
+        """Return the cache key of the capture."""
+        stat = file_path.stat()
+        digest = hashlib.sha256()
+        if self.__hash_content:
+            digest.update(b"content\0%d\0" % stat.st_size)
+            with file_path.open("rb") as file:
+                while chunk := file.read(HASH_CHUNK_SIZE):
+                    digest.update(chunk)
+        else:
+            identity = f"identity\0{file_path.resolve().as_posix()}\0{stat.st_size}\0{stat.st_mtime_ns}"
+            digest.update(identity.encode())
+        return digest.hexdigest()
+
+    def load(self, file_path: Path, *, key: str | None = None) -> RecordIndex | None:
+        """Return the cached index of the capture or `None` if it is not cached.
+
+        The columns of the returned index are memory mapped read-only views.
+        Pass the `key()` of the capture to reuse it for `store()` after a miss (hashing reads the capture).
+        """
+        path = self.__entry_path(key or self.key(file_path))
+        try:
+            with path.open("rb") as file:
+                buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            return None
+        index = _read_index(buffer)
+        if index is None:
+            buffer.close()
+            path.unlink(missing_ok=True)
+            return None
+        try:
+            os.utime(path)  # mark as recently used
+        except FileNotFoundError:  # evicted by another process meanwhile, the mapping stays valid
+            pass
+        return index
+
+    def store(self, file_path: Path, index: RecordIndex, *, key: str | None = None) -> None:
+        """Store the index of the capture and evict old entries to stay within the disk budget."""
+        path = self.__entry_path(key or self.key(file_path))
+        temporary = path.with_suffix(f".{os.getpid()}.tmp")
+        with temporary.open("wb") as file:
+            file.write(CACHE_FILE_HEADER.pack(CACHE_FILE_MAGIC, NATIVE_BYTE_ORDER, len(index)))
+            for name, _ in CACHE_COLUMNS:
+                file.write(getattr(index, name))
+        os.replace(temporary, path)
+        self.evict(keep=path)
+
+    def evict(self, *, keep: Path | None = None) -> None:
+        """Remove the least recently used entries until the cache fits into `max_bytes`."""
+        entries = self.__stat_entries()
+        total = sum(stat.st_size for stat, _ in entries)
+        for stat, path in sorted(entries, key=lambda entry: entry[0].st_mtime_ns):
+            if total <= self.__max_bytes:
+                break
+            if path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            total -= stat.st_size
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        for path in self.__entries():
+            path.unlink(missing_ok=True)
+
+    def __entry_path(self, key: str) -> Path:
+        return self.__directory / f"{key}{CACHE_FILE_SUFFIX}"
+
+    def __entries(self) -> list[Path]:
+        return list(self.__directory.glob(f"*{CACHE_FILE_SUFFIX}"))
+
+    def __stat_entries(self) -> list[tuple[os.stat_result, Path]]:
+        entries = []
+        for path in self.__entries():
+            try:
+                entries.append((path.stat(), path))
+            except FileNotFoundError:  # removed by another process
+                continue
+        return entries
+
+
+def _read_index(buffer: mmap.mmap) -> RecordIndex | None:
+    if len(buffer) < CACHE_FILE_HEADER.size:
+        return None
+    magic, byte_order, count = CACHE_FILE_HEADER.unpack_from(buffer)
+    if magic != CACHE_FILE_MAGIC or byte_order != NATIVE_BYTE_ORDER:
+        return None
+    view = memoryview(buffer)
+    columns = {}
+    offset = CACHE_FILE_HEADER.size
+    for name, typecode in CACHE_COLUMNS:
+        end = offset + count * struct.calcsize(typecode)
+        if end > len(buffer):
+            return None
+        columns[name] = view[offset:end].cast(typecode)
+        offset = end
+    return RecordIndex(**columns)
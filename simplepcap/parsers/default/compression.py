@@ -0,0 +1,171 @@
+"""Transparent reading of compressed captures (`.pcap.gz`, `.pcap.zst`).
+
+The compression is detected from the first bytes of the file, not from the file extension.
+Decompression runs in a background thread (see `simplepcap.parsers.default.prefetch`), so it overlaps
+with the parsing done by the consumer.
+
+Compressed streams stay seekable:
+
+- gzip: the decompressor state is saved every `checkpoint_span` bytes of output while the file is read,
+  so a later seek restarts from the nearest saved state instead of from the start of the file.
+- zstd: files written in the [seekable format](https://github.com/facebook/zstd/tree/dev/contrib/seekable_format)
+  are seeked frame by frame using the seek table. Other zstd files seek by decompressing from the start.
+  Reading zstd files requires the optional `zstandard` package.
+"""
+
+from __future__ import annotations
+
+import io
+import struct
+import zlib
+from typing import BinaryIO
+
+from .files import CaptureFile, open_file, read_head
+from .prefetch import DEFAULT_CHUNK_SIZE, ChunkSource, FileChunkSource, PrefetchingReader
+
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+ZSTD_SEEKABLE_FOOTER_MAGIC = 0x8F92EAB1
+ZSTD_SEEKABLE_FOOTER = struct.Struct("<IBI")
+
+RAW_CHUNK_SIZE = 1024 * 1024  # in bytes
+DEFAULT_CHECKPOINT_SPAN = 16 * 1024 * 1024  # in bytes
+DEFAULT_BUFFER_SIZE = 1024 * 1024  # in bytes
+
+
+def detect_compression(file: CaptureFile) -> str | None:
+    """Return `"gzip"`, `"zstd"` or `None` if the file (path or file descriptor) is not compressed."""
+    return compression_of(read_head(file, len(ZSTD_MAGIC)))
+
+
+def compression_of(head: bytes) -> str | None:
+    """Return the compression detected from the first bytes of a file, see `detect_compression()`."""
+    magic = head[: len(ZSTD_MAGIC)]
+    if magic.startswith(GZIP_MAGIC):
+        return "gzip"
+    if magic == ZSTD_MAGIC:
+        return "zstd"
+    return None
+
+
+def open_capture(
+    file_path: CaptureFile,
+    *,
+    compression: str | None = None,
+    buffer_size: int = DEFAULT_BUFFER_SIZE,
+    checkpoint_span: int = DEFAULT_CHECKPOINT_SPAN,
+    prefetch: bool = False,
+    prefetch_size: int = DEFAULT_CHUNK_SIZE,
+) -> BinaryIO:
+    """Open a capture for binary reading, decompressing it if needed.
+
+    Args:
+        file_path: Path to the capture or an open file descriptor, see `simplepcap.parsers.default.files`.
+        compression: `"gzip"`, `"zstd"` or `None`. Detected from the file contents if not given.
+        buffer_size: Size of the read buffer.
+        checkpoint_span: Distance in bytes of decompressed data between gzip seek checkpoints.
+        prefetch: Read an uncompressed file ahead in a background thread, in chunks of `prefetch_size` bytes.
+            Compressed files are always decompressed in a background thread.
+        prefetch_size: Size of the chunks read ahead by the background thread.
+
+    Raises:
+        ImportError: if the file is zstd compressed and `zstandard` is not installed.
+
+    Returns:
+        A seekable binary stream of the decompressed capture.
+    """
+    if compression is None:
+        compression = detect_compression(file_path)
+    if compression is None and not prefetch:
+        return open_file(file_path, buffer_size=buffer_size)
+    if compression is None:
+        decoder: ChunkSource = FileChunkSource(file_path, chunk_size=prefetch_size)
+    elif compression == "gzip":
+        decoder = _GzipDecoder(file_path, checkpoint_span=checkpoint_span)
+    elif compression == "zstd":
+        decoder = _ZstdDecoder(file_path)
+    else:
+        raise ValueError(f"Unsupported compression: {compression}")
+    return io.BufferedReader(PrefetchingReader(decoder), buffer_size=buffer_size)
+
+
+class _GzipDecoder(ChunkSource):
+    def __init__(self, file: CaptureFile, *, checkpoint_span: int) -> None:
+        super().__init__(file)
+        self.__checkpoint_span = checkpoint_span
+        self.__decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        self.__states = [(0, self.__decompressor.copy())]  # (compressed offset, decompressor state)
+        self.__offset = 0
+        self.__finished = False
+
+    def restart(self, checkpoint: int) -> None:
+        raw_offset, state = self.__states[self._checkpoints.index(checkpoint)]
+        self._raw.seek(raw_offset)
+        self.__decompressor = state.copy()
+        self.__offset = checkpoint
+        self.__finished = False
+
+    def read_chunk(self) -> bytes:
+        while not self.__finished:
+            raw = self._raw.read(RAW_CHUNK_SIZE)
+            if not raw:
+                self.__finished = True
+                return self.__decompressor.flush()
+            data = self.__decompressor.decompress(raw)
+            # Concatenated gzip members form a single stream.
+            while self.__decompressor.eof and self.__decompressor.unused_data:
+                rest = self.__decompressor.unused_data
+                if GZIP_MAGIC.startswith(rest):
+                    break  # the magic of the next member continues in the next raw chunk
+                if not rest.startswith(GZIP_MAGIC):
+                    self.__finished = True
+                    break
+                self.__decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+                data += self.__decompressor.decompress(rest)
+            self.__offset += len(data)
+            if not self.__decompressor.eof and self.__offset >= self._checkpoints[-1] + self.__checkpoint_span:
+                self.__states.append((self._raw.tell(), self.__decompressor.copy()))
+                self._checkpoints.append(self.__offset)
+            if data:
+                return data
+        return b""
+
+
+class _ZstdDecoder(ChunkSource):
+    def __init__(self, file: CaptureFile) -> None:
+        try:
+            import zstandard
+        except ImportError as error:
+            raise ImportError("Reading zstd compressed captures requires the `zstandard` package") from error
+        super().__init__(file)
+        self.__context = zstandard.ZstdDecompressor()
+        self.__frames = [0]  # compressed offsets of the checkpoints
+        self.__read_seek_table()
+        self.__reader = None
+        self.restart(0)
+
+    def restart(self, checkpoint: int) -> None:
+        self._raw.seek(self.__frames[self._checkpoints.index(checkpoint)])
+        self.__reader = self.__context.stream_reader(self._raw, read_across_frames=True, closefd=False)
+
+    def read_chunk(self) -> bytes:
+        return self.__reader.read(RAW_CHUNK_SIZE)
+
+    def __read_seek_table(self) -> None:
+        size = self._raw.seek(0, io.SEEK_END)
+        if size < ZSTD_SEEKABLE_FOOTER.size:
+            return
+        self._raw.seek(size - ZSTD_SEEKABLE_FOOTER.size)
+        frames, descriptor, magic = ZSTD_SEEKABLE_FOOTER.unpack(self._raw.read(ZSTD_SEEKABLE_FOOTER.size))
+        if magic != ZSTD_SEEKABLE_FOOTER_MAGIC:
+            return
+        entry = struct.Struct("<III" if descriptor & 0x80 else "<II")
+        self._raw.seek(size - ZSTD_SEEKABLE_FOOTER.size - frames * entry.size)
+        table = self._raw.read(frames * entry.size)
+        compressed_offset = decompressed_offset = 0
+        for values in entry.iter_unpack(table):
+            compressed_offset += values[0]
+            decompressed_offset += values[1]
+            self.__frames.append(compressed_offset)
+            self._checkpoints.append(decompressed_offset)
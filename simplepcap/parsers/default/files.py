@@ -0,0 +1,156 @@
+"""Opening of capture files given by path or by an open file descriptor.
+
+A file descriptor is never read through its own file offset: every stream opened on it is a separate
+read-only memory map with its own position, so several streams (and threads) can use the same descriptor.
+The descriptor stays owned by the caller and is not closed.
+"""
+
+from __future__ import annotations
+
+import io
+import mmap
+import os
+from pathlib import Path
+from typing import BinaryIO, Union
+
+
+CaptureFile = Union[Path, int]  # path or open file descriptor
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024  # in bytes, read ahead at once (see `simplepcap.parsers.default.prefetch`)
+
+
+def open_file(file: CaptureFile, *, buffer_size: int = -1) -> BinaryIO:
+    """Open the file for binary reading, as it is stored on disk."""
+    if isinstance(file, int):
+        return io.BufferedReader(
+            _MappedFile(file), buffer_size=buffer_size if buffer_size > 0 else io.DEFAULT_BUFFER_SIZE
+        )
+    return file.open("rb", buffering=buffer_size)
+
+
+def map_file(file: CaptureFile) -> mmap.mmap:
+    """Return a read-only memory map of the whole file.
+
+    Raises:
+        ValueError: if the file is empty.
+    """
+    if isinstance(file, int):
+        return mmap.mmap(file, 0, access=mmap.ACCESS_READ)
+    with file.open("rb") as opened:
+        return mmap.mmap(opened.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+def read_head(file: CaptureFile, size: int) -> bytes:
+    """Return the first `size` bytes of the file (fewer if the file is shorter)."""
+    if isinstance(file, int):
+        if hasattr(os, "pread"):
+            return os.pread(file, size, 0)
+        with open_file(file) as opened:
+            return opened.read(size)
+    with file.open("rb", buffering=0) as opened:
+        return opened.read(size)
+
+
+class PositionedReader:
+    """Reads at absolute offsets of a file, without a read buffer.
+
+    Scattered reads (sampling, sorting, extracting) then cost the bytes they return instead of a buffer refill
+    each. Uses `os.pread` where available, otherwise seeks an unbuffered file.
+
+    Example:
+        ``` py
+        with PositionedReader(Path("file.pcap")) as reader:
+            header = reader.read(24, 16)  # the first record header
+        ```
+    """
+
+    def __init__(self, file: CaptureFile | BinaryIO) -> None:
+        """Constructor method for PositionedReader.
+
+        Args:
+            file: Path to the file or an open file descriptor, which stays owned by the caller.
+                A seekable stream (e.g. a decompressing stream from `open_capture()`) is read with seek and
+                read and closed with the reader.
+        """
+        self.__file: BinaryIO | None = None
+        self.__fd: int | None = None
+        if isinstance(file, int):
+            self.__fd = file
+            if not hasattr(os, "pread"):
+                self.__file = _MappedFile(file)
+        elif isinstance(file, Path):
+            self.__file = file.open("rb", buffering=0)
+            self.__fd = self.__file.fileno()
+        else:
+            self.__file = file
+
+    def __enter__(self) -> PositionedReader:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def read(self, offset: int, size: int) -> bytes:
+        """Return `size` bytes from `offset` (fewer at the end of the file)."""
+        if self.__fd is not None and hasattr(os, "pread"):
+            return os.pread(self.__fd, size, offset)
+        self.__file.seek(offset)
+        data = self.__file.read(size)
+        while data and len(data) < size:  # raw reads may return less than requested
+            chunk = self.__file.read(size - len(data))
+            if not chunk:
+                break
+            data += chunk
+        return data
+
+    def close(self) -> None:
+        if self.__file is not None:
+            self.__file.close()
+
+
+class _MappedFile(io.RawIOBase):
+    """Seekable raw stream over a memory map of a file descriptor."""
+
+    def __init__(self, fd: int) -> None:
+        super().__init__()
+        try:
+            self.__map: mmap.mmap | None = mmap.mmap(fd, 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty files cannot be mapped
+            self.__map = None
+        self.__size = len(self.__map) if self.__map is not None else 0
+        self.__position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.__position
+
+    def readinto(self, buffer) -> int:
+        start = self.__position
+        end = min(start + len(buffer), self.__size)
+        if end <= start:
+            return 0
+        count = end - start
+        buffer[:count] = self.__map[start:end]
+        self.__position = end
+        return count
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self.__position
+        elif whence == io.SEEK_END:
+            offset += self.__size
+        if offset < 0:
+            raise ValueError(f"Negative seek position {offset}")
+        self.__position = offset
+        return offset
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        if self.__map is not None:
+            self.__map.close()
+        super().close()
@@ -0,0 +1,184 @@
+"""Header-only index of the records in a pcap file.
+
+The index is built by decoding only the 16-byte record headers and skipping the packet data,
+so building it costs a small fraction of a full parse.
+"""
+
+from __future__ import annotations
+
+import io
+from array import array
+from dataclasses import dataclass, fields
+from typing import BinaryIO, Callable
+
+from simplepcap import CaptureStats
+from simplepcap.exceptions import IncorrectPacketSizeError, WrongPacketHeaderError
+from .records import PACKET_HEADER_SIZE, record_header_struct
+from .timestamps import TimestampConverter
+
+
+@dataclass(frozen=True)
+class RecordIndex:
+    """Columnar index of the record headers.
+
+    Every column has one item per record, in file order. Columns are `array.array` objects, or read-only
+    `memoryview` objects when the index is loaded from an `IndexCache`.
+
+    Attributes:
+        offsets:
+            offset of the record header in the file.
+        timestamps_sec:
+            seconds part of the record timestamp.
+        timestamps_usec:
+            microseconds part of the record timestamp.
+        captured_lens:
+            the number of bytes of packet data saved in the file.
+        original_lens:
+            the length of the packet as it appeared on the network.
+    """
+
+    offsets: array | memoryview
+    timestamps_sec: array | memoryview
+    timestamps_usec: array | memoryview
+    captured_lens: array | memoryview
+    original_lens: array | memoryview
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def slice(self, start: int, end: int) -> RecordIndex:
+        """Return the index of the records `start` to `end` (exclusive).
+
+        The columns are copied into arrays, so the slice can be pickled (e.g. sent to a worker process).
+        """
+        columns = {}
+        for field in fields(self):
+            column = getattr(self, field.name)
+            part = array(column.typecode if isinstance(column, array) else column.format)
+            part.frombytes(memoryview(column)[start:end].cast("B"))
+            columns[field.name] = part
+        return RecordIndex(**columns)
+
+    def stats(self, timestamps: TimestampConverter | None = None) -> CaptureStats:
+        """Return the summary of the indexed records.
+
+        Args:
+            timestamps: Converter of the start and end timestamps. UTC datetimes by default.
+        """
+        to_datetime = (timestamps or TimestampConverter()).to_datetime
+        start = end = None
+        if len(self):
+            start, end = (
+                to_datetime(sec, usec)
+                for sec, usec in (
+                    min(zip(self.timestamps_sec, self.timestamps_usec)),
+                    max(zip(self.timestamps_sec, self.timestamps_usec)),
+                )
+            )
+        return CaptureStats(
+            packets=len(self),
+            captured_bytes=sum(self.captured_lens),
+            original_bytes=sum(self.original_lens),
+            start=start,
+            end=end,
+        )
+
+    @classmethod
+    def from_buffer(cls, buffer, *, start: int, byteorder: str, file_path: str) -> RecordIndex:
+        """Build the index from a buffer (`bytes`, `mmap`, ...) that holds the whole file.
+
+        Args:
+            buffer: The file contents.
+            start: Offset of the first record header (size of the file header).
+            byteorder: Byte order of the record header fields.
+            file_path: Path to the pcap file. Used in error messages.
+
+        Raises:
+            simplepcap.exceptions.WrongPacketHeaderError: if the last record header is truncated.
+            simplepcap.exceptions.IncorrectPacketSizeError: if the last record data is truncated.
+        """
+        index = cls._empty()
+        append = index._appender()
+        unpack_from = record_header_struct(byteorder).unpack_from
+        size = len(buffer)
+        offset = start
+        while offset < size:
+            if offset + PACKET_HEADER_SIZE > size:
+                raise WrongPacketHeaderError(
+                    f"Invalid packet header size: {size - offset}. Expected {PACKET_HEADER_SIZE}",
+                    packet_number=len(index),
+                    file_path=file_path,
+                )
+            timestamp_sec, timestamp_usec, captured_len, original_len = unpack_from(buffer, offset)
+            append(offset, timestamp_sec, timestamp_usec, captured_len, original_len)
+            offset += PACKET_HEADER_SIZE + captured_len
+        if offset > size:
+            raise IncorrectPacketSizeError(
+                f"Invalid packet size: {size - index.offsets[-1] - PACKET_HEADER_SIZE}. "
+                f"Expected {index.captured_lens[-1]}",
+                packet_number=len(index) - 1,
+                file_path=file_path,
+            )
+        return index
+
+    @classmethod
+    def from_stream(cls, stream: BinaryIO, *, byteorder: str, file_path: str) -> RecordIndex:
+        """Build the index from a seekable stream positioned at the first record header.
+
+        Packet data is skipped with `seek()` and never read.
+
+        Raises:
+            simplepcap.exceptions.WrongPacketHeaderError: if the last record header is truncated.
+            simplepcap.exceptions.IncorrectPacketSizeError: if the last record data is truncated.
+        """
+        index = cls._empty()
+        append = index._appender()
+        unpack = record_header_struct(byteorder).unpack
+        read, seek = stream.read, stream.seek
+        offset = stream.tell()
+        while True:
+            raw_header = read(PACKET_HEADER_SIZE)
+            if not raw_header:
+                break
+            if len(raw_header) != PACKET_HEADER_SIZE:
+                raise WrongPacketHeaderError(
+                    f"Invalid packet header size: {len(raw_header)}. Expected {PACKET_HEADER_SIZE}",
+                    packet_number=len(index),
+                    file_path=file_path,
+                )
+            timestamp_sec, timestamp_usec, captured_len, original_len = unpack(raw_header)
+            append(offset, timestamp_sec, timestamp_usec, captured_len, original_len)
+            offset = seek(captured_len, io.SEEK_CUR)
+        if index.offsets and offset > seek(0, io.SEEK_END):
+            raise IncorrectPacketSizeError(
+                f"Invalid packet size. Expected {index.captured_lens[-1]}",
+                packet_number=len(index) - 1,
+                file_path=file_path,
+            )
+        return index
+
+    @classmethod
+    def _empty(cls) -> RecordIndex:
+        return cls(
+            offsets=array("Q"),
+            timestamps_sec=array("I"),
+            timestamps_usec=array("I"),
+            captured_lens=array("I"),
+            original_lens=array("I"),
+        )
+
+    def _appender(self) -> Callable[[int, int, int, int, int], None]:
+        append_offset = self.offsets.append
+        append_timestamp_sec = self.timestamps_sec.append
+        append_timestamp_usec = self.timestamps_usec.append
+        append_captured_len = self.captured_lens.append
+        append_original_len = self.original_lens.append
+
+        def append(offset: int, timestamp_sec: int, timestamp_usec: int, captured_len: int, original_len: int):
+            append_offset(offset)
+            append_timestamp_sec(timestamp_sec)
+            append_timestamp_usec(timestamp_usec)
+            append_captured_len(captured_len)
+            append_original_len(original_len)
+
+        return append
@@ -1,48 +1,99 @@
-from datetime import datetime
-from io import BufferedReader
-from typing import Callable
+from __future__ import annotations
+
+import threading
+from io import SEEK_CUR, BufferedReader
+from typing import TYPE_CHECKING, Callable, Iterator
 
 from simplepcap import Packet, PacketHeader
 from simplepcap.exceptions import IncorrectPacketSizeError, ReadAfterCloseError, WrongPacketHeaderError
 from simplepcap.parser import ParserIterator
+from .records import PACKET_HEADER_SIZE, RawRecord, record_header_struct
+from .timestamps import TimestampConverter
 
-PACKET_HEADER_SIZE = 16  # in bytes
-
-# Fields slice
-TIMESTAMP_SEC = slice(0, 4)
-TIMESTAMP_USEC = slice(4, 8)
-CAPTURED_LEN = slice(8, 12)
-ORIGINAL_LEN = slice(12, 16)
+if TYPE_CHECKING:  # imported on use, only the tolerant mode needs it
+    from .recovery import RecordValidator
 
 
 class DefaultParserIterator(ParserIterator):
+    """Iterator over the packets of a capture.
+
+    The iterator is thread-safe: several threads may call `next()` on the same iterator, every packet is
+    returned to exactly one of them. Packets are returned in file order, but with several consumers the order
+    in which the threads process them is up to the scheduler.
+    """
+
     def __init__(
         self,
         *,
         file_path: str,
         buffered_reader: BufferedReader,
         remove_iterator_callback: Callable[[ParserIterator], None] | None = None,
+        max_payload: int | None = None,
+        byteorder: str = "little",
+        validator: RecordValidator | None = None,
+        timestamps: TimestampConverter | None = None,
     ) -> None:
+        """Constructor method for DefaultParserIterator.
+
+        Args:
+            file_path: Path to the pcap file. Used in error messages.
+            buffered_reader: Reader positioned at the first packet header.
+            remove_iterator_callback: Called with the iterator when it is exhausted.
+            max_payload: Read at most `max_payload` bytes of every packet into `Packet.data` and skip the rest
+                without reading it. `PacketHeader.captured_len` keeps the value from the file.
+            byteorder: Byte order of the packet header fields.
+            validator: Enables the tolerant mode. Damaged packets are skipped instead of raising an error,
+                the iterator resynchronises on the next packet header accepted by the validator.
+                The skipped parts of the file are listed in `damaged_ranges`.
+            timestamps: Converter of the packet timestamps. UTC datetimes by default.
+
+        Raises:
+            ValueError: if `max_payload` is negative.
+        """
+        if max_payload is not None and max_payload < 0:
+            raise ValueError("max_payload must not be negative")
         self._buffered_reader: BufferedReader | None = buffered_reader
         self.__position = -1
         self.__remove_iterator_callback = remove_iterator_callback or (lambda _: None)
         self.__file_path = file_path
+        self.__max_payload = max_payload
+        self.__unpack_header = record_header_struct(byteorder).unpack
+        self.__convert_timestamp = (timestamps or TimestampConverter()).convert
+        self.__validator = validator
+        self.__recovered_records: Iterator[RawRecord] | None = None
+        self.__damaged_ranges: list[tuple[int, int]] = []
+        self.__lock = threading.Lock()
 
     def __iter__(self) -> ParserIterator:
         return self
 
     def __next__(self) -> Packet:
-        packet = self.__parse_packet()
-        if packet is None:
-            self.__remove_iterator_callback(self)
-            raise StopIteration
-        self.__position += 1
-        return packet
+        with self.__lock:
+            packet = self.__parse_packet()
+            if packet is not None:
+                self.__position += 1
+                return packet
+        # Called without holding the lock, the callback may take the lock of the parser.
+        self.__remove_iterator_callback(self)
+        raise StopIteration
+
+    def close(self) -> None:
+        """Close the underlying reader. Waits for a packet that is being read by another thread."""
+        with self.__lock:
+            if self._buffered_reader is None:
+                return
+            self._buffered_reader.close()
+            self._buffered_reader = None
 
     @property
     def position(self) -> int:
         return self.__position
 
+    @property
+    def damaged_ranges(self) -> list[tuple[int, int]]:
+        """`(start, end)` file offsets of the damaged parts skipped so far in tolerant mode."""
+        return self.__damaged_ranges
+
     def __parse_packet(self) -> Packet | None:
         if self._buffered_reader is None:
             raise ReadAfterCloseError(
@@ -50,22 +101,54 @@ class DefaultParserIterator(ParserIterator):
                 packet_number=self.__position + 1,
                 file_path=self.__file_path,
             )
+        if self.__validator is not None:
+            return self.__parse_recovered_packet()
         raw_header = self._buffered_reader.read(PACKET_HEADER_SIZE)
         if not raw_header:
             return None
         header = self.__parse_packet_header(raw_header)
-        data = self._buffered_reader.read(header.captured_len)
-        if len(data) != header.captured_len:
+        read_len = header.captured_len
+        if self.__max_payload is not None and read_len > self.__max_payload:
+            read_len = self.__max_payload
+        data = self._buffered_reader.read(read_len)
+        if len(data) != read_len:
             raise IncorrectPacketSizeError(
                 f"Invalid packet size: {len(data)}. Expected {header.captured_len}",
                 packet_number=self.__position + 1,
                 file_path=self.__file_path,
             )
+        if read_len != header.captured_len:
+            # Seeking past the end of the file succeeds, reading the last skipped byte tells if it is there.
+            self._buffered_reader.seek(header.captured_len - read_len - 1, SEEK_CUR)
+            if not self._buffered_reader.read(1):
+                raise IncorrectPacketSizeError(
+                    f"Invalid packet size: the file ends inside the packet. Expected {header.captured_len}",
+                    packet_number=self.__position + 1,
+                    file_path=self.__file_path,
+                )
         return Packet(
             header=header,
             data=data,
         )
 
+    def __parse_recovered_packet(self) -> Packet | None:
+        if self.__recovered_records is None:
+            from .recovery import iter_recovered_records
+
+            self.__recovered_records = iter_recovered_records(
+                self._buffered_reader,
+                validator=self.__validator,
+                damaged_ranges=self.__damaged_ranges,
+                max_payload=self.__max_payload,
+            )
+        record = next(self.__recovered_records, None)
+        if record is None:
+            return None
+        return Packet(
+            header=self.__parse_packet_header(record.header),
+            data=record.data,
+        )
+
     def __parse_packet_header(self, raw_header: bytes) -> PacketHeader:
         if len(raw_header) != PACKET_HEADER_SIZE:
             raise WrongPacketHeaderError(
@@ -73,10 +156,9 @@ class DefaultParserIterator(ParserIterator):
                 packet_number=self.__position + 1,
                 file_path=self.__file_path,
             )
-        timestamp_sec = int.from_bytes(raw_header[TIMESTAMP_SEC], byteorder="little")
-        timestamp_usec = int.from_bytes(raw_header[TIMESTAMP_USEC], byteorder="little")
+        timestamp_sec, timestamp_usec, captured_len, original_len = self.__unpack_header(raw_header)
         return PacketHeader(
-            timestamp=datetime.fromtimestamp(timestamp_sec + timestamp_usec / 1_000_000),
-            captured_len=int.from_bytes(raw_header[CAPTURED_LEN], byteorder="little"),
-            original_len=int.from_bytes(raw_header[ORIGINAL_LEN], byteorder="little"),
+            timestamp=self.__convert_timestamp(timestamp_sec, timestamp_usec),
+            captured_len=captured_len,
+            original_len=original_len,
         )
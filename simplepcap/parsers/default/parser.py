@@ -1,7 +1,15 @@
+from __future__ import annotations
+
 import atexit
+import mmap
+import threading
+import weakref
+from array import array
+from datetime import timedelta, tzinfo
 from pathlib import Path
+from typing import TYPE_CHECKING, BinaryIO, Iterable, Iterator
 
-from simplepcap import FileHeader, Packet
+from simplepcap import CaptureStats, FileHeader, Packet, SampledPacket
 from simplepcap.enum import LinkType
 from simplepcap.exceptions import (
     PcapFileNotFoundError,
@@ -11,7 +19,19 @@ from simplepcap.exceptions import (
 )
 from simplepcap.parser import Parser, ParserIterator
 from simplepcap.types import Reserved, Version
+from .files import DEFAULT_CHUNK_SIZE, CaptureFile, map_file, read_head
 from .iterator import DefaultParserIterator
+from .records import byteorder_for, iter_raw_records
+from .timestamps import TIMESTAMP_UNITS, UTC, TimestampConverter
+
+# The modules of the other features are imported on use, so workers that only iterate start fast
+# (`batches` imports multiprocessing, `cache` hashlib, `index` struct columns and so on).
+if TYPE_CHECKING:
+    from .batches import BatchPool, PacketBatch
+    from .cache import IndexCache
+    from .index import RecordIndex
+    from .recovery import RecordValidator
+    from .search import SearchPattern
 
 
 PCAP_FILE_HEADER_SIZE = 24  # in bytes
@@ -28,27 +48,134 @@ RESERVED2 = slice(12, 16)
 SNAP_LEN = slice(16, 20)
 LINK_TYPE = slice(20, 24)
 
+# Open parsers are closed at exit by a single hook, parsers are not kept alive by it.
+_open_parsers: weakref.WeakSet[DefaultParser] = weakref.WeakSet()
+
 
 class DefaultParser(Parser):
-    def __init__(self, *, file_path: Path | str) -> None:
+    """Parser of pcap files.
+
+    The parser is thread-safe. Several threads may iterate over the same parser, each with its own iterator,
+    or pull packets from one shared iterator (see `DefaultParserIterator`). `get_index()`, `get_stats()`,
+    `search()` and `sample()` may be called concurrently, the index is built only once.
+
+    Example:
+        ``` py
+        from concurrent.futures import ThreadPoolExecutor
+
+        from simplepcap.parsers import DefaultParser
+
+
+        with DefaultParser(file_path="file.pcap", prefetch=True) as parser:
+            packets = iter(parser)
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                sizes = [executor.submit(lambda: sum(len(packet.data) for packet in packets)) for _ in range(4)]
+                print(sum(size.result() for size in sizes))
+        ```
+    """
+
+    def __init__(
+        self,
+        *,
+        file_path: Path | str,
+        max_payload: int | None = None,
+        tolerant: bool = False,
+        cache: IndexCache | None = None,
+        prefetch: bool = False,
+        prefetch_size: int = DEFAULT_CHUNK_SIZE,
+        fd: int | None = None,
+        file_header: FileHeader | bytes | None = None,
+        compression: str | None = None,
+        timestamps: str = "datetime",
+        tz: tzinfo | None = UTC,
+    ) -> None:
+        """Constructor method for DefaultParser.
+
+        The constructor opens the file once to read the file header. When the header was already read
+        (e.g. by a process that dispatches captures to workers), pass it as `file_header` and the constructor
+        does not touch the file system at all.
+
+        Example:
+            ``` py
+            raw_header = file.read(24)
+            parser = DefaultParser(file_path="file.pcap", file_header=raw_header)
+            ```
+
+        Args:
+            file_path: Path to the pcap file. The file may be gzip or zstd compressed.
+                With `fd` the path is only used in error messages.
+            max_payload: Read at most `max_payload` bytes of every packet, the rest of the packet is skipped
+                without being read. Useful when only the protocol headers are needed.
+                `PacketHeader.captured_len` keeps the value from the file.
+            tolerant: Skip damaged packets instead of raising an error. Iterators resynchronise on the next
+                plausible packet header, the skipped parts are listed in `DefaultParserIterator.damaged_ranges`.
+            cache: Cache for the record index. `get_index()`, `get_stats()` and `search()` load the index from
+                the cache instead of scanning the file, and store it there after the first scan.
+            prefetch: Iterators read the file ahead in a background thread, `prefetch_size` bytes at a time,
+                so reading overlaps with packet processing. Compressed files are always decompressed ahead.
+            prefetch_size: Size of the chunks read ahead.
+            fd: Open file descriptor of the capture, read instead of `file_path`. Every stream maps the file
+                separately, the position of the descriptor is not used. The descriptor is not closed by the parser.
+            file_header: Already read file header, parsed `FileHeader` or the raw (decompressed) 24 bytes.
+            compression: Compression of the file when `file_header` is given: `"gzip"`, `"zstd"` or `None`.
+            timestamps: Type of `PacketHeader.timestamp`: `"datetime"`, or integer UTC epoch `"us"` (microseconds)
+                or `"ns"` (nanoseconds). Integers are much cheaper to create than datetimes.
+                See `simplepcap.parsers.default.timestamps` for the timezone policy.
+            tz: Timezone of the datetimes. UTC by default, `None` gives naive datetimes in the local time of the host.
+
+        Raises:
+            simplepcap.exceptions.PcapFileNotFoundError: if the file does not exist.
+            simplepcap.exceptions.WrongFileHeaderError: if the file header is invalid.
+            simplepcap.exceptions.UnsupportedFileVersionError: if the file version is not supported.
+            ValueError: if `max_payload` is negative, `prefetch_size` is not positive, `cache` is used with `fd`
+                or `timestamps` is not supported.
+        """
+        if max_payload is not None and max_payload < 0:
+            raise ValueError("max_payload must not be negative")
+        if prefetch_size < 1:
+            raise ValueError("prefetch_size must be positive")
+        if fd is not None and cache is not None:
+            raise ValueError("cache cannot be used with fd, captures are cached by their path")
+        if timestamps not in TIMESTAMP_UNITS:
+            raise ValueError(f"Unsupported timestamps: {timestamps}. Supported: {TIMESTAMP_UNITS}")
+        self.__prefetch = prefetch
+        self.__prefetch_size = prefetch_size
+        self.__max_payload = max_payload
+        self.__tolerant = tolerant
+        self.__cache = cache
         self.__file_path: Path = Path(file_path) if isinstance(file_path, str) else file_path
-        if not self.__file_path.exists():
-            raise PcapFileNotFoundError(file_path=self.__file_path.as_posix())
-        self.__file_header: FileHeader = self.__parse_header()
+        self.__file: CaptureFile = self.__file_path if fd is None else fd
+        self.__compression: str | None = compression
+        if file_header is None:
+            self.__file_header: FileHeader = self.__parse_header()
+        elif isinstance(file_header, FileHeader):
+            self.__file_header = file_header
+        else:
+            if len(file_header) != PCAP_FILE_HEADER_SIZE:
+                raise WrongFileHeaderError(file_path=self.__file_path.as_posix())
+            self.__file_header = self.__parse_header_fields(bytes(file_header))
         self.__is_open: bool = False
         self.__iterators = []
-        atexit.register(self.close)
+        self.__timestamps = TimestampConverter.for_file(self.__file_header, unit=timestamps, tz=tz)
+        self.__index: RecordIndex | None = None
+        self.__lock = threading.RLock()
+        self.__index_lock = threading.Lock()  # held while the index is built, the parser lock is not
 
     def __iter__(self) -> DefaultParserIterator:
-        if not self.is_open:
-            raise FileIsNotOpenError(file_path=self.file_path.as_posix())
-        buffered_reader = self.__file_path.open("rb")
-        buffered_reader.seek(PCAP_FILE_HEADER_SIZE)
-        return DefaultParserIterator(
-            file_path=self.__file_path.as_posix(),
-            buffered_reader=buffered_reader,
-            remove_iterator_callback=self.__remove_iterator,
-        )
+        with self.__lock:
+            if not self.is_open:
+                raise FileIsNotOpenError(file_path=self.file_path.as_posix())
+            iterator = DefaultParserIterator(
+                file_path=self.__file_path.as_posix(),
+                buffered_reader=self.__open_records(prefetch=self.__prefetch),
+                remove_iterator_callback=self.__remove_iterator,
+                max_payload=self.__max_payload,
+                byteorder=byteorder_for(self.__file_header),
+                validator=self.__make_validator() if self.__tolerant else None,
+                timestamps=self.__timestamps,
+            )
+            self.__iterators.append(iterator)
+            return iterator
 
     def __enter__(self) -> Parser:
         self.open()
@@ -65,39 +192,191 @@ class DefaultParser(Parser):
     def file_header(self) -> FileHeader:
         return self.__file_header
 
+    @property
+    def compression(self) -> str | None:
+        """Compression of the file: `"gzip"`, `"zstd"` or `None`."""
+        return self.__compression
+
     @property
     def is_open(self) -> bool:
         return self.__is_open
 
+    @property
+    def timestamps(self) -> TimestampConverter:
+        """Converter of the packet timestamps, set up from the file header and the `timestamps` and `tz` options."""
+        return self.__timestamps
+
     @property
     def iterators(self) -> list[ParserIterator]:
-        return self.__iterators
+        """Iterators that are not exhausted yet. Returns a copy of the list."""
+        with self.__lock:
+            return list(self.__iterators)
 
     def get_all_packets(self) -> list[Packet]:
         return list(self)
 
+    def get_index(self) -> RecordIndex:
+        """Return the header-only index of the records in the file. The index is built once and reused.
+
+        Raises:
+            simplepcap.exceptions.FileIsNotOpenError: if the file is not open.
+            simplepcap.exceptions.WrongPacketHeaderError: if the last packet header is truncated.
+            simplepcap.exceptions.IncorrectPacketSizeError: if the last packet is truncated.
+        """
+        with self.__index_lock:
+            with self.__lock:
+                if not self.is_open:
+                    raise FileIsNotOpenError(file_path=self.file_path.as_posix())
+                if self.__index is not None:
+                    return self.__index
+            # Built without the parser lock, so other threads can keep iterating meanwhile.
+            index = self.__load_index()
+            with self.__lock:
+                self.__index = index
+            return index
+
+    def get_stats(self) -> CaptureStats:
+        """Return the summary of the capture computed from the record index (see `get_index()`).
+
+        Raises:
+            simplepcap.exceptions.FileIsNotOpenError: if the file is not open.
+        """
+        return self.get_index().stats(self.__timestamps)
+
+    def get_timestamps(self, unit: str = "ns") -> array:
+        """Return the integer UTC epochs (`"us"` or `"ns"`) of all packets as an `array("q")`.
+
+        Computed from the record index (see `get_index()`), packet data is not read.
+
+        Raises:
+            simplepcap.exceptions.FileIsNotOpenError: if the file is not open.
+            ValueError: if `unit` is not `"us"` or `"ns"`.
+        """
+        index = self.get_index()
+        return self.__timestamps.epochs(index.timestamps_sec, index.timestamps_usec, unit)
+
+    def get_datetime64(self):
+        """Return the timestamps of all packets as a NumPy `datetime64[ns]` array (UTC). Requires `numpy`.
+
+        The conversion is vectorised over the columns of the record index (see `get_index()`).
+
+        Example:
+            ``` py
+            with DefaultParser(file_path="file.pcap") as parser:
+                timestamps = parser.get_datetime64()
+                print(numpy.diff(timestamps).max())  # longest gap between packets
+            ```
+
+        Raises:
+            simplepcap.exceptions.FileIsNotOpenError: if the file is not open.
+            ImportError: if `numpy` is not installed.
+        """
+        index = self.get_index()
+        return self.__timestamps.datetime64(index.timestamps_sec, index.timestamps_usec)
+
+    def search(self, patterns: SearchPattern | Iterable[SearchPattern]) -> list[int]:
+        from .search import compile_patterns, search_buffer
+
+        if not self.is_open:
+            raise FileIsNotOpenError(file_path=self.file_path.as_posix())
+        pattern = compile_patterns(patterns)
+        if self.__compression is not None:
+            return self.__search_stream(pattern)
+        index = self.get_index()
+        with map_file(self.__file) as buffer:
+            return search_buffer(pattern, buffer, index)
+
+    def sample(
+        self,
+        *,
+        every: int | None = None,
+        reservoir: int | None = None,
+        interval: timedelta | float | None = None,
+        seed: int | None = None,
+    ) -> Iterator[SampledPacket]:
+        """Iterate over a sample of the packets, in file order. Exactly one sampling mode must be given.
+
+        Packets are chosen from the record index (see `get_index()`), packets that are not sampled are skipped
+        without being read. `max_payload` applies to the sampled packets.
+
+        Example:
+            ``` py
+            with DefaultParser(file_path="file.pcap") as parser:
+                sample = list(parser.sample(reservoir=1000, seed=42))
+                total = len(parser.get_index())
+                estimated_dns = sum(is_dns(packet) for packet in sample) * total / len(sample)
+            ```
+
+        Args:
+            every: Sample every `every`-th packet, starting with the first one.
+            reservoir: Sample `reservoir` packets uniformly at random.
+            interval: Sample the first packet of every time bucket of `interval` (seconds or `timedelta`).
+            seed: Seed of the random generator used by `reservoir`.
+
+        Raises:
+            simplepcap.exceptions.FileIsNotOpenError: if the file is not open.
+            ValueError: if not exactly one sampling mode is given or its value is not positive.
+
+        Returns:
+            Iterator over the sampled packets. `SampledPacket.position` is the position of the packet in the file.
+        """
+        from .sampling import select_positions
+
+        index = self.get_index()
+        positions = select_positions(index, every=every, reservoir=reservoir, interval=interval, seed=seed)
+        return self.__iter_sampled(index, positions)
+
+    def iter_batches(self, pool: BatchPool) -> Iterator[PacketBatch]:
+        """Iterate over the records of the file packed into shared memory batches from the pool.
+
+        Batches are meant to be handed to worker processes: pickling a batch transfers only the name of its
+        segment, the workers read the payloads in place (see `simplepcap.parsers.default.batches`).
+        Every batch must be released to the pool when the workers are done with it.
+        `max_payload` and `tolerant` do not apply to batches.
+
+        Raises:
+            simplepcap.exceptions.FileIsNotOpenError: if the file is not open.
+            simplepcap.exceptions.WrongPacketHeaderError: if a packet header is truncated.
+            simplepcap.exceptions.IncorrectPacketSizeError: if a packet is truncated.
+        """
+        if not self.is_open:
+            raise FileIsNotOpenError(file_path=self.file_path.as_posix())
+        return self.__iter_batches(pool)
+
     def open(self) -> None:
-        if self.is_open:
-            return
-        self.__is_open = True
+        with self.__lock:
+            if self.is_open:
+                return
+            self.__is_open = True
+            _open_parsers.add(self)
 
     def close(self) -> None:
-        if not self.is_open:
-            return
-        for iterator in self.__iterators:
-            if not iterator._buffered_reader:
-                continue
-            iterator._buffered_reader.close()
-            iterator._buffered_reader = None
-        self.__is_open = False
+        with self.__lock:
+            if not self.is_open:
+                return
+            self.__is_open = False
+            _open_parsers.discard(self)
+            iterators, self.__iterators = self.__iterators, []
+        # Outside of the lock: closing waits for packets that are being read by other threads.
+        for iterator in iterators:
+            iterator.close()
 
     def __parse_header(self) -> FileHeader:
-        if not self.__file_path.exists() or not self.__file_path.is_file():
-            raise PcapFileNotFoundError(file_path=self.__file_path.as_posix())
-        if self.__file_path.stat().st_size < PCAP_FILE_HEADER_SIZE:
+        try:
+            header = read_head(self.__file, PCAP_FILE_HEADER_SIZE)
+        except (FileNotFoundError, IsADirectoryError, NotADirectoryError) as error:
+            raise PcapFileNotFoundError(file_path=self.__file_path.as_posix()) from error
+        if int.from_bytes(header[MAGIC], byteorder="little") not in ALLOWED_MAGIC_NUMBERS:
+            from .compression import compression_of
+
+            self.__compression = compression_of(header)
+        if self.__compression is not None:
+            from .compression import open_capture
+
+            with open_capture(self.__file, compression=self.__compression) as file:
+                header = file.read(PCAP_FILE_HEADER_SIZE)
+        if len(header) < PCAP_FILE_HEADER_SIZE:
             raise WrongFileHeaderError(file_path=self.__file_path.as_posix())
-        with self.__file_path.open("rb") as file:
-            header = file.read(PCAP_FILE_HEADER_SIZE)
         return self.__parse_header_fields(header)
 
     def __parse_header_fields(self, header: bytes) -> FileHeader:
@@ -139,6 +418,97 @@ class DefaultParser(Parser):
             link_type=link_type,
         )
 
+    def __make_validator(self) -> RecordValidator:
+        from .recovery import RecordValidator
+
+        return RecordValidator(byteorder=byteorder_for(self.__file_header), snap_len=self.__file_header.snap_len)
+
+    def __open_records(self, *, prefetch: bool = False) -> BinaryIO:
+        from .compression import open_capture
+
+        stream = open_capture(
+            self.__file,
+            compression=self.__compression,
+            prefetch=prefetch,
+            prefetch_size=self.__prefetch_size,
+        )
+        stream.seek(PCAP_FILE_HEADER_SIZE)
+        return stream
+
+    def __iter_batches(self, pool: BatchPool) -> Iterator[PacketBatch]:
+        from .batches import iter_batches
+
+        with self.__open_records(prefetch=self.__prefetch) as stream:
+            yield from iter_batches(
+                stream,
+                pool,
+                byteorder=byteorder_for(self.__file_header),
+                file_path=self.__file_path.as_posix(),
+            )
+
+    def __iter_sampled(self, index: RecordIndex, positions: list[int]) -> Iterator[SampledPacket]:
+        from .files import PositionedReader
+        from .sampling import read_sampled
+
+        file = self.__file if self.__compression is None else self.__open_records()
+        with PositionedReader(file) as reader:
+            yield from read_sampled(
+                reader.read,
+                index,
+                positions,
+                file_path=self.__file_path.as_posix(),
+                max_payload=self.__max_payload,
+                timestamps=self.__timestamps,
+            )
+
+    def __search_stream(self, pattern) -> list[int]:
+        with self.__open_records() as stream:
+            records = iter_raw_records(
+                stream,
+                byteorder=byteorder_for(self.__file_header),
+                file_path=self.__file_path.as_posix(),
+            )
+            return [number for number, record in enumerate(records) if pattern.search(record.data)]
+
+    def __build_index(self, buffer: mmap.mmap) -> RecordIndex:
+        from .index import RecordIndex
+
+        return RecordIndex.from_buffer(
+            buffer,
+            start=PCAP_FILE_HEADER_SIZE,
+            byteorder=byteorder_for(self.__file_header),
+            file_path=self.__file_path.as_posix(),
+        )
+
+    def __load_index(self) -> RecordIndex:
+        if self.__cache is not None:
+            key = self.__cache.key(self.__file_path)
+            index = self.__cache.load(self.__file_path, key=key)
+            if index is not None:
+                return index
+        if self.__compression is None:
+            with map_file(self.__file) as buffer:
+                index = self.__build_index(buffer)
+        else:
+            from .index import RecordIndex
+
+            with self.__open_records() as stream:
+                index = RecordIndex.from_stream(
+                    stream,
+                    byteorder=byteorder_for(self.__file_header),
+                    file_path=self.__file_path.as_posix(),
+                )
+        if self.__cache is not None:
+            self.__cache.store(self.__file_path, index, key=key)
+        return index
+
     def __remove_iterator(self, iterator: ParserIterator) -> None:
-        if iterator in self.__iterators:
-            self.__iterators.remove(iterator)
+        with self.__lock:
+            if iterator in self.__iterators:
+                self.__iterators.remove(iterator)
+
+
+@atexit.register
+def _close_open_parsers() -> None:
+    for parser in list(_open_parsers):
+        parser.close()
@@ -0,0 +1,236 @@
+"""Reading ahead in a background thread.
+
+A `ChunkSource` produces the contents of a capture in large chunks (plain file reads, decompression, ...).
+`PrefetchingReader` runs the source in a background thread and hands the chunks to the consumer through a
+bounded queue, so I/O (which releases the GIL) and decompression overlap with the decoding of packets.
+"""
+
+from __future__ import annotations
+
+import io
+import queue
+import threading
+from abc import ABC, abstractmethod
+from bisect import bisect_right
+
+from .files import DEFAULT_CHUNK_SIZE, CaptureFile, open_file
+
+DEFAULT_QUEUE_SIZE = 8  # in chunks
+
+
+class ChunkSource(ABC):
+    """Abstract class for sources that produce a stream chunk by chunk and can restart it from a checkpoint."""
+
+    def __init__(self, file: CaptureFile) -> None:
+        self._raw = open_file(file)
+        self._checkpoints: list[int] = [0]  # stream offsets, sorted
+
+    def checkpoint_before(self, offset: int) -> int:
+        """Return the largest checkpoint that is not after the offset."""
+        return self._checkpoints[bisect_right(self._checkpoints, offset) - 1]
+
+    @abstractmethod
+    def restart(self, checkpoint: int) -> None:
+        """Continue the stream from the checkpoint returned by `checkpoint_before()`."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def read_chunk(self) -> bytes:
+        """Return the next chunk of data or empty bytes at the end of the stream."""
+        raise NotImplementedError
+
+    def close(self) -> None:
+        self._raw.close()
+
+
+class FileChunkSource(ChunkSource):
+    """Reads a plain file in chunks of `chunk_size` bytes. Every offset is a checkpoint."""
+
+    def __init__(self, file: CaptureFile, *, chunk_size: int = DEFAULT_CHUNK_SIZE) -> None:
+        super().__init__(file)
+        self.__chunk_size = chunk_size
+
+    def checkpoint_before(self, offset: int) -> int:
+        return offset
+
+    def restart(self, checkpoint: int) -> None:
+        self._raw.seek(checkpoint)
+
+    def read_chunk(self) -> bytes:
+        return self._raw.read(self.__chunk_size)
+
+
+class PrefetchingReader(io.RawIOBase):
+    """Seekable raw stream over a chunk source that is read in a background thread.
+
+    The thread keeps up to `queue_size` chunks ready, so reading (and decompressing) overlaps with
+    the consumer and the queue gives backpressure. Wrap it in `io.BufferedReader` for efficient small reads.
+    """
+
+    def __init__(self, source: ChunkSource, *, queue_size: int = DEFAULT_QUEUE_SIZE) -> None:
+        super().__init__()
+        self.__source = source
+        self.__queue_size = queue_size
+        self.__queue: queue.Queue | None = None
+        self.__stop: threading.Event | None = None
+        self.__thread: threading.Thread | None = None
+        self.__chunk = memoryview(b"")
+        self.__chunk_position = 0
+        self.__position = 0
+        self.__size: int | None = None
+        self.__exhausted = False  # the source reached the end of the stream
+        self.__detached = False  # the position is past the end and does not follow the source
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.__position
+
+    def readinto(self, buffer) -> int:
+        if self.__detached:
+            return 0
+        available = len(self.__chunk) - self.__chunk_position
+        if not available:
+            if not self.__next_chunk():
+                return 0
+            available = len(self.__chunk)
+        count = min(len(buffer), available)
+        start = self.__chunk_position
+        end = self.__chunk_position = start + count
+        buffer[:count] = self.__chunk[start:end]
+        self.__position += count
+        return count
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            target = self.__position + offset
+        elif whence == io.SEEK_END:
+            target = self.__find_size() + offset
+        else:
+            target = offset
+        if target < 0:
+            raise ValueError(f"Negative seek position {target}")
+        if target == self.__position:
+            return target
+        if self.__size is not None and target >= self.__size:
+            self.__stop_thread()
+            self.__position = target
+            self.__detached = True
+            return target
+
+        available = len(self.__chunk) - self.__chunk_position
+        if self.__detached or target < self.__position:
+            self.__restart(self.__source.checkpoint_before(target))
+        elif target - self.__position <= available:
+            self.__chunk_position += target - self.__position
+            self.__position = target
+            return target
+        elif self.__source.checkpoint_before(target) > self.__position + available:
+            self.__restart(self.__source.checkpoint_before(target))
+        self.__skip(target - self.__position)
+        return self.__position
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        self.__stop_thread()
+        self.__source.close()
+        super().close()
+
+    def __next_chunk(self) -> bool:
+        """Load the next chunk from the thread. Return `False` at the end of the stream."""
+        if self.__exhausted:
+            return False
+        if self.__thread is None:
+            self.__start_thread()
+        item = self.__queue.get()
+        if isinstance(item, BaseException):
+            self.__stop_thread()
+            raise item
+        if not item:
+            self.__exhausted = True
+            self.__size = self.__position
+            self.__thread.join()
+            self.__thread = None
+            return False
+        self.__chunk = memoryview(item)
+        self.__chunk_position = 0
+        return True
+
+    def __skip(self, count: int) -> None:
+        target = self.__position + count
+        while self.__position < target:
+            available = len(self.__chunk) - self.__chunk_position
+            if not available:
+                if not self.__next_chunk():
+                    self.__position = target
+                    self.__detached = True
+                    return
+                continue
+            step = min(available, target - self.__position)
+            self.__chunk_position += step
+            self.__position += step
+
+    def __find_size(self) -> int:
+        if self.__size is None:
+            position = self.__position
+            self.__position += len(self.__chunk) - self.__chunk_position
+            self.__chunk_position = len(self.__chunk)
+            while self.__next_chunk():
+                self.__position += len(self.__chunk)
+                self.__chunk_position = len(self.__chunk)
+            self.seek(position)
+        return self.__size
+
+    def __restart(self, checkpoint: int) -> None:
+        self.__stop_thread()
+        self.__source.restart(checkpoint)
+        self.__chunk = memoryview(b"")
+        self.__chunk_position = 0
+        self.__position = checkpoint
+        self.__exhausted = False
+        self.__detached = False
+
+    def __start_thread(self) -> None:
+        self.__queue = queue.Queue(maxsize=self.__queue_size)
+        self.__stop = threading.Event()
+        self.__thread = threading.Thread(
+            target=_produce,
+            args=(self.__source, self.__queue, self.__stop),
+            name="simplepcap-prefetch",
+            daemon=True,
+        )
+        self.__thread.start()
+
+    def __stop_thread(self) -> None:
+        if self.__thread is None:
+            return
+        self.__stop.set()
+        while self.__thread.is_alive():
+            try:
+                self.__queue.get(timeout=0.01)
+            except queue.Empty:
+                pass
+        self.__thread.join()
+        self.__thread = None
+        self.__queue = None
+
+
+def _produce(source: ChunkSource, chunks: queue.Queue, stop: threading.Event) -> None:
+    try:
+        while not stop.is_set():
+            chunk = source.read_chunk()
+            while not stop.is_set():
+                try:
+                    chunks.put(chunk, timeout=0.05)
+                    break
+                except queue.Full:
+                    continue
+            if not chunk:
+                return
+    except Exception as error:  # handed over to the consumer thread
+        chunks.put(error)
@@ -0,0 +1,258 @@
+"""Low level helpers to work with raw pcap records without decoding them into `Packet` objects.
+
+These helpers are used by the tools that copy records from one capture to another
+(splitting, sorting, merging, ...). Record bytes are passed through untouched.
+"""
+
+from __future__ import annotations
+
+import heapq
+import struct
+from contextlib import ExitStack
+from datetime import timedelta
+from pathlib import Path
+from typing import BinaryIO, Callable, Iterable, Iterator, NamedTuple
+
+from simplepcap import FileHeader
+from simplepcap.exceptions import IncorrectPacketSizeError, WrongPacketHeaderError
+
+
+PACKET_HEADER_SIZE = 16  # in bytes
+SWAP_REQUIRED_MAGIC_NUMBER = 0xD4C3B2A1
+DEFAULT_WRITE_BUFFER_SIZE = 256 * 1024  # in bytes
+DEFAULT_MERGE_READ_BUFFER_SIZE = 256 * 1024  # in bytes, per merged file
+
+
+class RawRecord(NamedTuple):
+    """Record as it is stored in the file.
+
+    Attributes:
+        header:
+            raw record header bytes.
+        timestamp_sec:
+            seconds part of the timestamp.
+        timestamp_usec:
+            microseconds part of the timestamp.
+        captured_len:
+            the number of bytes of packet data saved in the file.
+        original_len:
+            the length of the packet as it appeared on the network.
+        data:
+            raw packet data.
+    """
+
+    header: bytes
+    timestamp_sec: int
+    timestamp_usec: int
+    captured_len: int
+    original_len: int
+    data: bytes
+
+
+def byteorder_for(file_header: FileHeader) -> str:
+    """Return the byte order of the record header fields for the given file header."""
+    return "big" if file_header.magic == SWAP_REQUIRED_MAGIC_NUMBER else "little"
+
+
+def record_header_struct(byteorder: str) -> struct.Struct:
+    """Return a `struct.Struct` that unpacks a record header into `(sec, usec, captured_len, original_len)`."""
+    return struct.Struct("<IIII" if byteorder == "little" else ">IIII")
+
+
+def iter_raw_records(stream: BinaryIO, *, byteorder: str, file_path: str) -> Iterator[RawRecord]:
+    """Iterate over the raw records of a stream positioned right after the file header.
+
+    Raises:
+        simplepcap.exceptions.WrongPacketHeaderError: if the record header is truncated.
+        simplepcap.exceptions.IncorrectPacketSizeError: if the record data is truncated.
+    """
+    unpack = record_header_struct(byteorder).unpack
+    read = stream.read
+    packet_number = 0
+    while True:
+        raw_header = read(PACKET_HEADER_SIZE)
+        if not raw_header:
+            return
+        if len(raw_header) != PACKET_HEADER_SIZE:
+            raise WrongPacketHeaderError(
+                f"Invalid packet header size: {len(raw_header)}. Expected {PACKET_HEADER_SIZE}",
+                packet_number=packet_number,
+                file_path=file_path,
+            )
+        timestamp_sec, timestamp_usec, captured_len, original_len = unpack(raw_header)
+        data = read(captured_len)
+        if len(data) != captured_len:
+            raise IncorrectPacketSizeError(
+                f"Invalid packet size: {len(data)}. Expected {captured_len}",
+                packet_number=packet_number,
+                file_path=file_path,
+            )
+        yield RawRecord(raw_header, timestamp_sec, timestamp_usec, captured_len, original_len, data)
+        packet_number += 1
+
+
+def read_file_header_bytes(file_path: Path, size: int) -> bytes:
+    """Return the first `size` bytes of the decompressed file (the raw file header)."""
+    from .compression import open_capture
+
+    with open_capture(file_path) as file:
+        return file.read(size)
+
+
+class RecordWriter:
+    """Buffered writer of raw pcap records.
+
+    Records are collected in memory and written to the file in bulk once `buffer_size` bytes are pending.
+    The file header is written only when a new file is created, so the writer can be closed and reopened
+    with `append=True` to continue the same capture.
+
+    Example:
+        ``` py
+        with RecordWriter(file_path="out.pcap", file_header=raw_file_header) as writer:
+            for record in records:
+                writer.write(record.header, record.data)
+        ```
+    """
+
+    def __init__(
+        self,
+        *,
+        file_path: Path | str,
+        file_header: bytes,
+        append: bool = False,
+        buffer_size: int = DEFAULT_WRITE_BUFFER_SIZE,
+    ) -> None:
+        self.__file_path = Path(file_path)
+        self.__file = self.__file_path.open("ab" if append else "wb", buffering=0)
+        self.__buffer: list[bytes] = []
+        self.__buffered = 0
+        self.__buffer_size = buffer_size
+        self.__size = self.__file.tell() if append else 0
+        if not append:
+            self.__buffer.append(file_header)
+            self.__buffered = len(file_header)
+            self.__size = len(file_header)
+
+    def __enter__(self) -> RecordWriter:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    @property
+    def file_path(self) -> Path:
+        return self.__file_path
+
+    @property
+    def size(self) -> int:
+        """Size of the written capture in bytes, including pending data."""
+        return self.__size
+
+    def write(self, header: bytes, data: bytes) -> None:
+        """Append one record."""
+        self.__buffer.append(header)
+        self.__buffer.append(data)
+        written = len(header) + len(data)
+        self.__buffered += written
+        self.__size += written
+        if self.__buffered >= self.__buffer_size:
+            self.flush()
+
+    def write_raw(self, record: bytes) -> None:
+        """Append one record given as header and data bytes together."""
+        self.__buffer.append(record)
+        self.__buffered += len(record)
+        self.__size += len(record)
+        if self.__buffered >= self.__buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write pending records to the file."""
+        if not self.__buffer:
+            return
+        self.__file.write(b"".join(self.__buffer))
+        self.__buffer.clear()
+        self.__buffered = 0
+
+    def close(self) -> None:
+        """Flush pending records and close the file."""
+        if self.__file.closed:
+            return
+        self.flush()
+        self.__file.close()
+
+
+def merge_sorted_files(
+    file_paths: Iterable[Path],
+    output_path: Path | str,
+    *,
+    file_header: bytes,
+    byteorder: str,
+    buffer_size: int = DEFAULT_WRITE_BUFFER_SIZE,
+    read_buffer_size: int = DEFAULT_MERGE_READ_BUFFER_SIZE,
+    progress: Callable[[int], None] | None = None,
+) -> int:
+    """Merge captures that are each sorted by timestamp into one capture (k-way merge).
+
+    When timestamps are equal, records of an earlier file come first. Records are copied byte for byte.
+
+    Args:
+        file_paths: Paths to the captures. They may be compressed.
+        output_path: Path of the merged capture.
+        file_header: Raw file header written to the output.
+        byteorder: Byte order of the record header fields of all captures.
+        buffer_size: Number of bytes buffered before they are written.
+        read_buffer_size: Size of the read buffer of every capture.
+        progress: Called with the size of every record after it is copied.
+
+    Returns:
+        Number of records written.
+    """
+    from .compression import open_capture
+
+    count = 0
+    with ExitStack() as stack:
+        runs = []
+        for file_path in file_paths:
+            stream = stack.enter_context(open_capture(file_path, buffer_size=read_buffer_size))
+            stream.seek(len(file_header))
+            runs.append(iter_raw_records(stream, byteorder=byteorder, file_path=Path(file_path).as_posix()))
+        writer = stack.enter_context(
+            RecordWriter(file_path=output_path, file_header=file_header, buffer_size=buffer_size)
+        )
+        write = writer.write
+        for record in heapq.merge(*runs, key=_record_timestamp):
+            write(record.header, record.data)
+            count += 1
+            if progress is not None:
+                progress(PACKET_HEADER_SIZE + record.captured_len)
+    return count
+
+
+def select_criterion(criteria: dict[str, int | float | timedelta | None]) -> tuple[str, int]:
+    """Return the name and the integer value of the one criterion that is not `None`.
+
+    `interval` (seconds or `timedelta`) is converted to microseconds, the resolution of record timestamps,
+    counts are truncated to integers.
+
+    Raises:
+        ValueError: if not exactly one criterion is given or its value is not positive
+            (an `interval` shorter than one microsecond or a fractional count that rounds to 0).
+    """
+    given = {name: value for name, value in criteria.items() if value is not None}
+    if len(given) != 1:
+        raise ValueError(f"Exactly one of {', '.join(criteria)} must be given")
+    name, value = next(iter(given.items()))
+    if isinstance(value, timedelta):
+        value = value // timedelta(microseconds=1)
+    elif name == "interval":
+        value = value * 1_000_000
+    value = int(value)
+    if value <= 0:
+        minimum = "one microsecond" if name == "interval" else "1"
+        raise ValueError(f"{name} must be at least {minimum}")
+    return name, value
+
+
+def _record_timestamp(record: RawRecord) -> int:
+    return record.timestamp_sec * 1_000_000 + record.timestamp_usec
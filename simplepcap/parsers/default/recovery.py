@@ -0,0 +1,215 @@
+"""Recovery of records after a corrupted part of a capture.
+
+A record is damaged when its header is not consistent: its microseconds are not below one second, its captured
+length exceeds the snapshot length or its original length is below the captured length (or the file ends
+inside the record). Timestamps alone never make a record damaged, valid captures may step their clock.
+
+After a damaged record the reader resynchronises by scanning forward for the next plausible record header.
+A header is plausible when it is consistent and its timestamp is close to the timestamp of the last good record,
+which rules out most of the random matches in damaged data. The header of the record that follows a candidate
+must be plausible too.
+
+The scan does not test every byte offset in Python: the constraints on the most significant bytes of the
+header fields are compiled into a regular expression, which finds the candidates in C over large buffers.
+"""
+
+from __future__ import annotations
+
+import re
+from io import SEEK_CUR
+from typing import BinaryIO, Iterator
+
+from .records import PACKET_HEADER_SIZE, RawRecord, record_header_struct
+
+
+DEFAULT_MAX_TIMESTAMP_GAP = 7 * 24 * 3600  # in seconds
+DEFAULT_MAX_TIMESTAMP_BACKSTEP = 3600  # in seconds
+MAX_SNAP_LEN = 262144  # in bytes
+RESYNC_WINDOW_SIZE = 1024 * 1024  # in bytes
+
+
+class RecordValidator:
+    """Decides whether a record header is plausible and finds plausible headers in a buffer.
+
+    Attributes:
+        last_timestamp:
+            seconds part of the timestamp of the last good record, or `None` if there was none yet.
+    """
+
+    def __init__(
+        self,
+        *,
+        byteorder: str,
+        snap_len: int,
+        max_timestamp_gap: int = DEFAULT_MAX_TIMESTAMP_GAP,
+        max_timestamp_backstep: int = DEFAULT_MAX_TIMESTAMP_BACKSTEP,
+    ) -> None:
+        """Constructor method for RecordValidator.
+
+        Args:
+            byteorder: Byte order of the record header fields.
+            snap_len: Snapshot length from the file header. `0` means unknown.
+            max_timestamp_gap: How many seconds a resynchronisation candidate may be later than the last good
+                record.
+            max_timestamp_backstep: How many seconds a resynchronisation candidate may be earlier than the last
+                good record.
+        """
+        self.last_timestamp: int | None = None
+        self.__byteorder = byteorder
+        self.__unpack_from = record_header_struct(byteorder).unpack_from
+        self.__max_captured_len = snap_len or MAX_SNAP_LEN
+        self.__max_original_len = max(self.__max_captured_len, MAX_SNAP_LEN)
+        self.__max_gap = max_timestamp_gap
+        self.__max_backstep = max_timestamp_backstep
+
+    @property
+    def byteorder(self) -> str:
+        return self.__byteorder
+
+    def is_plausible(
+        self,
+        timestamp_sec: int,
+        timestamp_usec: int,
+        captured_len: int,
+        original_len: int,
+        reference: int | None = None,
+    ) -> bool:
+        """Return `True` if the header fields are consistent and the timestamp is close to `reference`
+        (`last_timestamp` by default). Used to find the next record after a damaged part.
+        """
+        if reference is None:
+            reference = self.last_timestamp
+        return self.is_consistent(timestamp_usec, captured_len, original_len) and (
+            reference is None or reference - self.__max_backstep <= timestamp_sec <= reference + self.__max_gap
+        )
+
+    def is_consistent(self, timestamp_usec: int, captured_len: int, original_len: int) -> bool:
+        """Return `True` if the header fields are consistent, whatever the timestamp.
+        Used for a record that directly follows a good record.
+        """
+        return (
+            timestamp_usec < 1_000_000
+            and captured_len <= self.__max_captured_len
+            and captured_len <= original_len <= self.__max_original_len
+        )
+
+    def find(self, buffer, start: int, end: int, *, at_eof: bool) -> int | None:
+        """Return the offset of the first confirmed plausible record header in `buffer[start:end]`.
+
+        A candidate is confirmed when the header after it is plausible, when it ends exactly at the end
+        of the file or when the next header lies beyond `end` and cannot be checked.
+        """
+        unpack_from = self.__unpack_from
+        for match in self.__pattern().finditer(buffer, start, end):
+            candidate = match.start()
+            fields = unpack_from(buffer, candidate)
+            if not self.is_plausible(*fields):
+                continue
+            following = candidate + PACKET_HEADER_SIZE + fields[2]
+            if following + PACKET_HEADER_SIZE <= end:
+                if self.is_plausible(*unpack_from(buffer, following), reference=fields[0]):
+                    return candidate
+            elif following == end or not at_eof:
+                return candidate
+        return None
+
+    def __pattern(self) -> re.Pattern[bytes]:
+        if self.last_timestamp is None:
+            timestamp_range = (0, 0xFFFFFFFF)
+        else:
+            timestamp_range = (
+                max(self.last_timestamp - self.__max_backstep, 0),
+                min(self.last_timestamp + self.__max_gap, 0xFFFFFFFF),
+            )
+        fields = (
+            _field_pattern(*timestamp_range, self.__byteorder)
+            + _field_pattern(0, 999_999, self.__byteorder)
+            + _field_pattern(0, self.__max_captured_len, self.__byteorder)
+            + _field_pattern(0, self.__max_original_len, self.__byteorder)
+        )
+        # The lookahead makes overlapping candidates visible to finditer().
+        return re.compile(b"(?=" + fields + b")", re.DOTALL)
+
+
+def iter_recovered_records(
+    stream: BinaryIO,
+    *,
+    validator: RecordValidator,
+    damaged_ranges: list[tuple[int, int]],
+    max_payload: int | None = None,
+) -> Iterator[RawRecord]:
+    """Iterate over the raw records of a seekable stream positioned at the first record header,
+    skipping damaged parts.
+
+    Args:
+        stream: Seekable binary stream.
+        validator: Validator used to check the record headers.
+        damaged_ranges: `(start, end)` file offsets of the skipped parts are appended to this list.
+        max_payload: Read at most `max_payload` bytes of every record into `RawRecord.data` and seek past the
+            rest. Only the last byte of a skipped part is read, to tell if the record is complete.
+    """
+    unpack = record_header_struct(validator.byteorder).unpack
+    read, seek = stream.read, stream.seek
+    offset = stream.tell()
+    while True:
+        raw_header = read(PACKET_HEADER_SIZE)
+        if not raw_header:
+            return
+        if len(raw_header) == PACKET_HEADER_SIZE:
+            fields = unpack(raw_header)
+            if validator.is_consistent(*fields[1:]):
+                captured_len = fields[2]
+                if max_payload is None or captured_len <= max_payload:
+                    data = read(captured_len)
+                    complete = len(data) == captured_len
+                else:
+                    data = read(max_payload)
+                    complete = len(data) == max_payload
+                    if complete:
+                        # Seeking past the end of the file succeeds, reading the last skipped byte tells if it is there.
+                        seek(captured_len - max_payload - 1, SEEK_CUR)
+                        complete = bool(read(1))
+                if complete:
+                    validator.last_timestamp = fields[0]
+                    yield RawRecord(raw_header, *fields, data)
+                    offset += PACKET_HEADER_SIZE + captured_len
+                    continue
+        found, end = _resync(stream, offset + 1, validator)
+        damaged_ranges.append((offset, end))
+        if found is None:
+            return
+        seek(found)
+        offset = found
+
+
+def _resync(stream: BinaryIO, start: int, validator: RecordValidator) -> tuple[int | None, int]:
+    """Return the offset of the next plausible record after `start` (or `None`) and the end of the damage."""
+    while True:
+        stream.seek(start)
+        window = stream.read(RESYNC_WINDOW_SIZE)
+        at_eof = len(window) < RESYNC_WINDOW_SIZE
+        found = validator.find(window, 0, len(window), at_eof=at_eof)
+        if found is not None:
+            return start + found, start + found
+        if at_eof:
+            return None, start + len(window)
+        # Keep the last bytes, a header may start there.
+        start += len(window) - PACKET_HEADER_SIZE + 1
+
+
+def _field_pattern(low: int, high: int, byteorder: str) -> bytes:
+    """Return a regex matching 4-byte unsigned integers, constraining the bytes `low` and `high` share."""
+    atoms = []
+    shared = True
+    for shift in (24, 16, 8, 0):
+        low_byte, high_byte = (low >> shift) & 0xFF, (high >> shift) & 0xFF
+        if not shared:
+            atoms.append(b".")
+        elif low_byte == high_byte:
+            atoms.append(re.escape(bytes([low_byte])))
+        else:
+            atoms.append(b"[" + re.escape(bytes([low_byte])) + b"-" + re.escape(bytes([high_byte])) + b"]")
+            shared = False
+    if byteorder == "little":
+        atoms.reverse()
+    return b"".join(atoms)
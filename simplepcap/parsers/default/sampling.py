@@ -0,0 +1,99 @@
+"""Sampling of packets for approximate analytics.
+
+The packets to sample are chosen from the `RecordIndex`, so packets that are not sampled are never read.
+Sampled packets of uncompressed captures are read with unbuffered positioned reads, so a sparse sample reads
+only the sampled bytes instead of a buffer refill around each of them.
+"""
+
+from __future__ import annotations
+
+import random
+from datetime import timedelta
+from typing import Callable, Iterator
+
+from simplepcap import PacketHeader, SampledPacket
+from simplepcap.exceptions import IncorrectPacketSizeError
+from .index import RecordIndex
+from .records import PACKET_HEADER_SIZE, select_criterion
+from .timestamps import TimestampConverter
+
+
+def select_positions(
+    index: RecordIndex,
+    *,
+    every: int | None = None,
+    reservoir: int | None = None,
+    interval: timedelta | float | None = None,
+    seed: int | None = None,
+) -> list[int]:
+    """Return the sorted positions of the sampled packets. Exactly one sampling mode must be given.
+
+    Args:
+        index: Index of the capture.
+        every: Sample every `every`-th packet, starting with the first one.
+        reservoir: Sample `reservoir` packets uniformly at random.
+        interval: Sample the first packet of every time bucket of `interval` (seconds or `timedelta`).
+        seed: Seed of the random generator used by `reservoir`.
+
+    Raises:
+        ValueError: if not exactly one sampling mode is given or its value is not positive
+            (an `interval` shorter than one microsecond or a fractional count that rounds to 0).
+    """
+    mode, value = select_criterion({"every": every, "reservoir": reservoir, "interval": interval})
+    count = len(index)
+    if mode == "every":
+        return list(range(0, count, value))
+    if mode == "reservoir":
+        return sorted(random.Random(seed).sample(range(count), min(value, count)))
+    interval_usec = value
+    positions = []
+    last_bucket = None
+    first = None
+    for position, (sec, usec) in enumerate(zip(index.timestamps_sec, index.timestamps_usec)):
+        timestamp = sec * 1_000_000 + usec
+        if first is None:
+            first = timestamp
+        bucket = (timestamp - first) // interval_usec
+        if bucket != last_bucket:
+            positions.append(position)
+            last_bucket = bucket
+    return positions
+
+
+def read_sampled(
+    read: Callable[[int, int], bytes],
+    index: RecordIndex,
+    positions: list[int],
+    *,
+    file_path: str,
+    max_payload: int | None = None,
+    timestamps: TimestampConverter | None = None,
+) -> Iterator[SampledPacket]:
+    """Read the packets at the given positions, skipping the packets in between.
+
+    Args:
+        read: Function returning `size` bytes at file offset `offset` as `read(offset, size)`,
+            e.g. `simplepcap.parsers.default.files.PositionedReader.read`.
+        index: Index of the capture.
+        positions: Positions of the packets to read, see `select_positions()`.
+        file_path: Path to the pcap file. Used in error messages.
+        max_payload: Read at most `max_payload` bytes of every packet.
+        timestamps: Converter of the packet timestamps.
+    """
+    convert = (timestamps or TimestampConverter()).convert
+    for position in positions:
+        captured_len = index.captured_lens[position]
+        read_len = captured_len if max_payload is None else min(captured_len, max_payload)
+        data = read(index.offsets[position] + PACKET_HEADER_SIZE, read_len)
+        if len(data) != read_len:
+            raise IncorrectPacketSizeError(
+                f"Invalid packet size: {len(data)}. Expected {captured_len}",
+                packet_number=position,
+                file_path=file_path,
+            )
+        header = PacketHeader(
+            timestamp=convert(index.timestamps_sec[position], index.timestamps_usec[position]),
+            captured_len=captured_len,
+            original_len=index.original_lens[position],
+        )
+        yield SampledPacket(header=header, data=data, position=position)
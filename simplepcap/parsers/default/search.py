@@ -0,0 +1,99 @@
+"""Payload search over a whole capture.
+
+All patterns are combined into one compiled regular expression which is run over the memory mapped
+file, so the regex engine scans the packet data in C instead of being called once per packet.
+"""
+
+from __future__ import annotations
+
+import re
+from bisect import bisect_right
+from typing import Iterable, Union
+
+from .index import RecordIndex
+from .records import PACKET_HEADER_SIZE
+
+
+SearchPattern = Union[bytes, "re.Pattern[bytes]"]
+
+INLINE_FLAGS = (
+    (re.ASCII, b"a"),
+    (re.IGNORECASE, b"i"),
+    (re.LOCALE, b"L"),
+    (re.MULTILINE, b"m"),
+    (re.DOTALL, b"s"),
+    (re.VERBOSE, b"x"),
+)
+# Global inline flags like `(?i)`, only allowed at the start of a pattern. They are part of `Pattern.flags`.
+GLOBAL_FLAGS = re.compile(rb"\A(?:\(\?[aiLmsux]+\))+")
+
+
+def compile_patterns(patterns: SearchPattern | Iterable[SearchPattern]) -> re.Pattern[bytes]:
+    """Combine byte strings (matched literally) and compiled byte regexes into one regex.
+
+    Raises:
+        TypeError: if a pattern is not `bytes` or a compiled `bytes` regex.
+        ValueError: if no patterns are given.
+    """
+    if isinstance(patterns, re.Pattern):
+        if not isinstance(patterns.pattern, bytes):
+            raise TypeError("Only bytes patterns are supported")
+        return patterns
+    if isinstance(patterns, (bytes, bytearray, memoryview)):
+        patterns = [bytes(patterns)]
+    alternatives = []
+    for pattern in patterns:
+        if isinstance(pattern, re.Pattern):
+            if not isinstance(pattern.pattern, bytes):
+                raise TypeError("Only bytes patterns are supported")
+            alternatives.append(_scoped(pattern))
+        elif isinstance(pattern, (bytes, bytearray, memoryview)):
+            alternatives.append(re.escape(bytes(pattern)))
+        else:
+            raise TypeError(f"Unsupported pattern type: {type(pattern).__name__}")
+    if not alternatives:
+        raise ValueError("At least one pattern is required")
+    return re.compile(b"|".join(alternatives))
+
+
+def search_buffer(pattern: re.Pattern[bytes], buffer, index: RecordIndex) -> list[int]:
+    """Return the numbers of the records whose data matches the pattern.
+
+    Matches never span two records. The `^` anchor only matches at the start of the file.
+
+    Args:
+        pattern: Compiled pattern, see `compile_patterns()`.
+        buffer: The file contents (`bytes`, `mmap`, ...).
+        index: Index of the records in the buffer, or of a consecutive part of them (see `RecordIndex.slice()`).
+    """
+    offsets, captured_lens = index.offsets, index.captured_lens
+    search = pattern.search
+    hits = []
+    number, count = 0, len(index)
+    if not count:
+        return hits
+    end = offsets[-1] + PACKET_HEADER_SIZE + captured_lens[-1]  # the index may cover a part of the file only
+    while number < count:
+        match = search(buffer, offsets[number] + PACKET_HEADER_SIZE, end)
+        if match is None:
+            break
+        start = match.start()
+        number = bisect_right(offsets, start, lo=number) - 1
+        data_start = offsets[number] + PACKET_HEADER_SIZE
+        data_end = data_start + captured_lens[number]
+        if data_start <= start and match.end() <= data_end:
+            hits.append(number)
+        elif search(buffer, max(start, data_start), data_end) is not None:
+            # The leftmost match started in a record header or ran into the next record.
+            hits.append(number)
+        number += 1
+    return hits
+
+
+def _scoped(pattern: re.Pattern[bytes]) -> bytes:
+    """Return the pattern as a group that applies its flags to itself only."""
+    source = GLOBAL_FLAGS.sub(b"", pattern.pattern)
+    flags = b"".join(letter for flag, letter in INLINE_FLAGS if pattern.flags & flag)
+    if pattern.flags & re.VERBOSE:
+        source += b"\n"  # a trailing comment must not swallow the closing parenthesis
+    return b"(?%s:%s)" % (flags, source) if flags else b"(?:%s)" % source
@@ -0,0 +1,144 @@
+"""Conversion of record timestamps.
+
+Record timestamps are stored as seconds and microseconds since the epoch. Conversions use integer arithmetic
+only, so no precision is lost to floats.
+
+The timezone policy is decided once per file:
+
+- Timestamps are UTC, corrected by `Reserved.reserved1` of the file header ("thiszone", the offset in seconds
+  between UTC and the timezone of the timestamps, written by some old capture tools). Almost all captures
+  store 0 there.
+- In the `"datetime"` unit, timestamps are timezone aware `datetime` objects in the requested timezone,
+  UTC by default. `tz=None` gives naive datetimes in the local time of the host (the behaviour of
+  `datetime.fromtimestamp()`), which is only useful for display.
+- The `"us"` and `"ns"` units are integer UTC epoch microseconds or nanoseconds, cheap to create, compare and
+  subtract. Prefer them when timestamps from different sites are correlated.
+"""
+
+from __future__ import annotations
+
+from array import array
+from datetime import datetime, timedelta, timezone, tzinfo
+from typing import Callable, Sequence, Union
+
+from simplepcap import FileHeader
+from .records import byteorder_for
+
+
+TIMESTAMP_UNITS = ("datetime", "us", "ns")
+UTC = timezone.utc
+EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+
+Timestamp = Union[datetime, int]
+
+
+class TimestampConverter:
+    """Converts record timestamps of one file into `datetime` objects or integer epochs.
+
+    Example:
+        ``` py
+        converter = TimestampConverter.for_file(parser.file_header, unit="ns")
+        converter.convert(1_600_000_000, 250_000)  # 1600000000250000000
+        converter.to_datetime(1_600_000_000, 250_000)  # datetime(2020, 9, 13, 12, 26, 40, 250000, tzinfo=UTC)
+        ```
+    """
+
+    def __init__(self, *, unit: str = "datetime", tz: tzinfo | None = UTC, thiszone: int = 0) -> None:
+        """Constructor method for TimestampConverter.
+
+        Args:
+            unit: `"datetime"`, `"us"` (epoch microseconds) or `"ns"` (epoch nanoseconds). Unit of `convert()`.
+            tz: Timezone of the `datetime` objects. `None` gives naive datetimes in local time.
+            thiszone: Correction in seconds added to the stored seconds to get UTC.
+
+        Raises:
+            ValueError: if `unit` is not supported.
+        """
+        if unit not in TIMESTAMP_UNITS:
+            raise ValueError(f"Unsupported timestamp unit: {unit}. Supported units: {TIMESTAMP_UNITS}")
+        self.__unit = unit
+        self.__tz = tz
+        self.__thiszone = thiszone
+        self.to_datetime: Callable[[int, int], datetime] = self.__datetime_function()
+        if unit == "us":
+            self.convert: Callable[[int, int], Timestamp] = self.__epoch_function(1_000_000, 1)
+        elif unit == "ns":
+            self.convert = self.__epoch_function(1_000_000_000, 1_000)
+        else:
+            self.convert = self.to_datetime
+
+    @classmethod
+    def for_file(cls, file_header: FileHeader, *, unit: str = "datetime", tz: tzinfo | None = UTC):
+        """Return the converter for a file, taking "thiszone" from the file header."""
+        thiszone = int.from_bytes(file_header.reserved.reserved1, byteorder=byteorder_for(file_header), signed=True)
+        return cls(unit=unit, tz=tz, thiszone=thiszone)
+
+    @property
+    def unit(self) -> str:
+        return self.__unit
+
+    @property
+    def tz(self) -> tzinfo | None:
+        return self.__tz
+
+    @property
+    def thiszone(self) -> int:
+        return self.__thiszone
+
+    def epochs(self, timestamps_sec: Sequence[int], timestamps_usec: Sequence[int], unit: str = "ns") -> array:
+        """Return the integer UTC epochs (`"us"` or `"ns"`) of timestamp columns as an `array("q")`."""
+        if unit not in ("us", "ns"):
+            raise ValueError(f"Unsupported epoch unit: {unit}. Supported units: ('us', 'ns')")
+        scale, usec_scale = (1_000_000, 1) if unit == "us" else (1_000_000_000, 1_000)
+        thiszone = self.__thiszone
+        return array(
+            "q",
+            ((sec + thiszone) * scale + usec * usec_scale for sec, usec in zip(timestamps_sec, timestamps_usec)),
+        )
+
+    def datetime64(self, timestamps_sec, timestamps_usec):
+        """Return timestamp columns as a NumPy `datetime64[ns]` array (UTC). Requires `numpy`.
+
+        The columns may be any buffers of unsigned 32-bit integers, e.g. the columns of a `RecordIndex`.
+
+        Raises:
+            ImportError: if `numpy` is not installed.
+        """
+        try:
+            import numpy
+        except ImportError as error:
+            raise ImportError("Converting timestamps to datetime64 requires the `numpy` package") from error
+        seconds = numpy.frombuffer(timestamps_sec, dtype=numpy.uint32).astype(numpy.int64)
+        microseconds = numpy.frombuffer(timestamps_usec, dtype=numpy.uint32).astype(numpy.int64)
+        epochs = (seconds + self.__thiszone) * 1_000_000_000 + microseconds * 1_000
+        return epochs.view("datetime64[ns]")
+
+    def __epoch_function(self, scale: int, usec_scale: int) -> Callable[[int, int], int]:
+        offset = self.__thiszone * scale
+
+        def convert(timestamp_sec: int, timestamp_usec: int) -> int:
+            return timestamp_sec * scale + timestamp_usec * usec_scale + offset
+
+        return convert
+
+    def __datetime_function(self) -> Callable[[int, int], datetime]:
+        thiszone, tz = self.__thiszone, self.__tz
+        if tz is None:
+            from_timestamp = datetime.fromtimestamp
+
+            def to_local(timestamp_sec: int, timestamp_usec: int) -> datetime:
+                return from_timestamp(timestamp_sec + thiszone) + timedelta(0, 0, timestamp_usec)
+
+            return to_local
+        epoch = EPOCH + timedelta(seconds=thiszone)
+        if tz is UTC:
+
+            def to_utc(timestamp_sec: int, timestamp_usec: int) -> datetime:
+                return epoch + timedelta(0, timestamp_sec, timestamp_usec)
+
+            return to_utc
+
+        def to_tz(timestamp_sec: int, timestamp_usec: int) -> datetime:
+            return (epoch + timedelta(0, timestamp_sec, timestamp_usec)).astimezone(tz)
+
+        return to_tz
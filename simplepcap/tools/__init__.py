@@ -0,0 +1,23 @@
+from simplepcap._lazy import lazy_attributes
+
+
+__all__ = [
+    "RepairReport",
+    "extract_packets",
+    "merge_captures",
+    "repair_capture",
+    "sort_capture",
+    "split_capture",
+]
+
+__getattr__, __dir__ = lazy_attributes(
+    __name__,
+    {
+        "RepairReport": ".repair",
+        "extract_packets": ".extract",
+        "merge_captures": ".merge",
+        "repair_capture": ".repair",
+        "sort_capture": ".sort",
+        "split_capture": ".split",
+    },
+)
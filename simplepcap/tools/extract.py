@@ -0,0 +1,125 @@
+"""Copy selected packets of a capture into a new capture.
+
+The packets are located with the record index, so packets that are not selected are never read.
+Packets are read with positioned reads without a read buffer, a sparse selection reads only the selected bytes.
+Records are copied byte for byte.
+"""
+
+from __future__ import annotations
+
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Callable, Iterable
+
+from simplepcap.exceptions import IncorrectPacketSizeError
+from simplepcap.parsers.default import DefaultParser, RecordIndex
+from simplepcap.parsers.default.compression import detect_compression, open_capture
+from simplepcap.parsers.default.files import PositionedReader
+from simplepcap.parsers.default.parser import PCAP_FILE_HEADER_SIZE
+from simplepcap.parsers.default.records import (
+    DEFAULT_WRITE_BUFFER_SIZE,
+    PACKET_HEADER_SIZE,
+    RecordWriter,
+    read_file_header_bytes,
+)
+
+
+MAX_SPAN_SIZE = 1024 * 1024  # in bytes
+
+
+def extract_packets(
+    file_path: Path | str,
+    output_path: Path | str,
+    positions: Iterable[int],
+    *,
+    index: RecordIndex | None = None,
+    buffer_size: int = DEFAULT_WRITE_BUFFER_SIZE,
+    progress: Callable[[int], None] | None = None,
+) -> int:
+    """Write the packets at the given positions into a new capture, in the given order.
+
+    Example:
+        ``` py
+        with DefaultParser(file_path="file.pcap") as parser:
+            hits = parser.search([b"password"])
+        extract_packets("file.pcap", "passwords.pcap", hits)
+        ```
+
+    Args:
+        file_path: Path to the pcap file.
+        output_path: Path of the new pcap file. It gets the file header of the input file.
+        positions: Zero based positions of the packets. Packets that follow each other in the file are read
+            together, other packets with one unbuffered read each.
+        index: Record index of the file, built from the file if not given.
+        buffer_size: Number of bytes buffered before they are written.
+        progress: Called with the number of bytes copied after every read.
+
+    Raises:
+        IndexError: if a position is out of range.
+        simplepcap.exceptions.PcapFileNotFoundError: if the file does not exist.
+        simplepcap.exceptions.IncorrectPacketSizeError: if a packet is truncated.
+
+    Returns:
+        Number of packets written.
+    """
+    file_path = Path(file_path)
+    if index is None:
+        with DefaultParser(file_path=file_path) as parser:
+            index = parser.get_index()
+    offsets, captured_lens = index.offsets, index.captured_lens
+    count = 0
+    file_header = read_file_header_bytes(file_path, PCAP_FILE_HEADER_SIZE)
+    with ExitStack() as stack:
+        if detect_compression(file_path) is None:
+            reader = stack.enter_context(PositionedReader(file_path))
+        else:
+            reader = stack.enter_context(PositionedReader(open_capture(file_path)))
+        read = reader.read
+        writer = stack.enter_context(
+            RecordWriter(file_path=output_path, file_header=file_header, buffer_size=buffer_size)
+        )
+        # Records that follow each other in the file are read together, in spans of up to MAX_SPAN_SIZE bytes.
+        span: list[int] = []
+        span_start = span_end = 0
+        for number in positions:
+            offset, size = offsets[number], PACKET_HEADER_SIZE + captured_lens[number]
+            if span and (offset != span_end or span_end - span_start + size > MAX_SPAN_SIZE):
+                _copy_span(read, writer, span, span_start, span_end, index, file_path, progress)
+                span.clear()
+            if not span:
+                span_start = span_end = offset
+            span.append(number)
+            span_end += size
+            count += 1
+        if span:
+            _copy_span(read, writer, span, span_start, span_end, index, file_path, progress)
+    return count
+
+
+def _copy_span(
+    read: Callable[[int, int], bytes],
+    writer: RecordWriter,
+    numbers: list[int],
+    start: int,
+    end: int,
+    index: RecordIndex,
+    file_path: Path,
+    progress: Callable[[int], None] | None,
+) -> None:
+    records = read(start, end - start)
+    if len(records) != end - start:
+        available = start + len(records)
+        number = next(
+            number
+            for number in numbers
+            if index.offsets[number] + PACKET_HEADER_SIZE + index.captured_lens[number] > available
+        )
+        raise IncorrectPacketSizeError(
+            f"Invalid packet size: {max(available - index.offsets[number] - PACKET_HEADER_SIZE, 0)}. "
+            f"Expected {index.captured_lens[number]}",
+            packet_number=number,
+            file_path=file_path.as_posix(),
+        )
+    writer.write_raw(records)
+    if progress is not None:
+        progress(len(records))
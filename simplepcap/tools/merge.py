@@ -0,0 +1,76 @@
+"""Merge several captures into one capture ordered by timestamp.
+
+The inputs are read sequentially and merged k-way, so memory usage does not depend on their size.
+Records are copied byte for byte.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Callable, Iterable
+
+from simplepcap.parsers.default import DefaultParser
+from simplepcap.parsers.default.parser import PCAP_FILE_HEADER_SIZE
+from simplepcap.parsers.default.records import (
+    DEFAULT_WRITE_BUFFER_SIZE,
+    byteorder_for,
+    merge_sorted_files,
+    read_file_header_bytes,
+)
+
+
+def merge_captures(
+    file_paths: Iterable[Path | str],
+    output_path: Path | str,
+    *,
+    buffer_size: int = DEFAULT_WRITE_BUFFER_SIZE,
+    progress: Callable[[int], None] | None = None,
+) -> int:
+    """Merge captures into one capture ordered by timestamp.
+
+    Every input is expected to be ordered by timestamp (see `simplepcap.tools.sort_capture`), otherwise the
+    output is only as ordered as the inputs. When timestamps are equal, packets of an earlier file come first.
+    The inputs must agree on every file header field that applies to their records, the output gets the file
+    header of the first input.
+
+    Args:
+        file_paths: Paths to the pcap files. The files may be compressed.
+        output_path: Path of the merged pcap file.
+        buffer_size: Number of bytes buffered before they are written.
+        progress: Called with the size of every record after it is copied.
+
+    Raises:
+        ValueError: if no files are given, or the files differ in byte order, version, timezone,
+            snapshot length or link type.
+        simplepcap.exceptions.PcapFileNotFoundError: if a file does not exist.
+        simplepcap.exceptions.WrongPacketHeaderError: if a packet header is invalid.
+        simplepcap.exceptions.IncorrectPacketSizeError: if a packet size is incorrect.
+
+    Returns:
+        Number of packets written.
+    """
+    file_paths = [Path(file_path) for file_path in file_paths]
+    if not file_paths:
+        raise ValueError("At least one file is required")
+    file_headers = [DefaultParser(file_path=file_path).file_header for file_path in file_paths]
+    first = file_headers[0]
+    for file_path, file_header in zip(file_paths[1:], file_headers[1:]):
+        fields = {
+            "byte order": (file_header.magic, first.magic),
+            "version": (file_header.version, first.version),
+            "timezone": (file_header.reserved.reserved1, first.reserved.reserved1),
+            "snapshot length": (file_header.snap_len, first.snap_len),
+            "link type": (file_header.link_type, first.link_type),
+        }
+        for name, (value, expected) in fields.items():
+            if value != expected:
+                raise ValueError(f"{file_path} differs from {file_paths[0]} in {name}")
+
+    return merge_sorted_files(
+        file_paths,
+        output_path,
+        file_header=read_file_header_bytes(file_paths[0], PCAP_FILE_HEADER_SIZE),
+        byteorder=byteorder_for(first),
+        buffer_size=buffer_size,
+        progress=progress,
+    )
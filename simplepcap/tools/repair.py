@@ -0,0 +1,95 @@
+"""Validate and repair damaged captures.
+
+Damaged parts of the capture are skipped by resynchronising on the next plausible record header,
+see `simplepcap.parsers.default.recovery`. Records that survive are copied byte for byte.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from pathlib import Path
+
+from simplepcap.parsers.default import DefaultParser
+from simplepcap.parsers.default.compression import open_capture
+from simplepcap.parsers.default.parser import PCAP_FILE_HEADER_SIZE
+from simplepcap.parsers.default.records import RecordWriter, byteorder_for, read_file_header_bytes
+from simplepcap.parsers.default.recovery import (
+    DEFAULT_MAX_TIMESTAMP_BACKSTEP,
+    DEFAULT_MAX_TIMESTAMP_GAP,
+    RecordValidator,
+    iter_recovered_records,
+)
+
+
+@dataclass(frozen=True)
+class RepairReport:
+    """Result of `repair_capture()`.
+
+    Attributes:
+        packets:
+            number of intact packets.
+        damaged_ranges:
+            `(start, end)` offsets of the damaged parts of the (decompressed) input file.
+    """
+
+    packets: int
+    damaged_ranges: tuple[tuple[int, int], ...]
+
+    @property
+    def is_damaged(self) -> bool:
+        return bool(self.damaged_ranges)
+
+    @property
+    def damaged_bytes(self) -> int:
+        return sum(end - start for start, end in self.damaged_ranges)
+
+
+def repair_capture(
+    file_path: Path | str,
+    output_path: Path | str | None = None,
+    *,
+    max_timestamp_gap: int = DEFAULT_MAX_TIMESTAMP_GAP,
+    max_timestamp_backstep: int = DEFAULT_MAX_TIMESTAMP_BACKSTEP,
+) -> RepairReport:
+    """Find the damaged parts of a capture and optionally write a capture without them.
+
+    Args:
+        file_path: Path to the pcap file.
+        output_path: Path of the repaired pcap file. Nothing is written if not given.
+        max_timestamp_gap: How many seconds the first packet after a damaged part may be later than the previous
+            intact packet. Packets that follow an intact packet are never rejected for their timestamp.
+        max_timestamp_backstep: How many seconds the first packet after a damaged part may be earlier than the
+            previous intact packet.
+
+    Raises:
+        simplepcap.exceptions.PcapFileNotFoundError: if the file does not exist.
+        simplepcap.exceptions.WrongFileHeaderError: if the file header is invalid.
+
+    Returns:
+        Report with the number of intact packets and the damaged ranges.
+    """
+    file_path = Path(file_path)
+    file_header = DefaultParser(file_path=file_path).file_header
+    validator = RecordValidator(
+        byteorder=byteorder_for(file_header),
+        snap_len=file_header.snap_len,
+        max_timestamp_gap=max_timestamp_gap,
+        max_timestamp_backstep=max_timestamp_backstep,
+    )
+    damaged_ranges: list[tuple[int, int]] = []
+    packets = 0
+    writer = None
+    if output_path is not None:
+        raw_file_header = read_file_header_bytes(file_path, PCAP_FILE_HEADER_SIZE)
+        writer = RecordWriter(file_path=output_path, file_header=raw_file_header)
+    try:
+        with open_capture(file_path) as stream:
+            stream.seek(PCAP_FILE_HEADER_SIZE)
+            for record in iter_recovered_records(stream, validator=validator, damaged_ranges=damaged_ranges):
+                packets += 1
+                if writer is not None:
+                    writer.write(record.header, record.data)
+    finally:
+        if writer is not None:
+            writer.close()
+    return RepairReport(packets=packets, damaged_ranges=tuple(damaged_ranges))
@@ -0,0 +1,250 @@
+"""Sort the packets of a capture by timestamp.
+
+The capture is sorted with an external merge sort, so memory usage does not depend on the size of the capture:
+
+1. Record headers are scanned in runs of `run_size` records, keeping only the timestamp, offset and length
+   of every record. Each run is sorted and its records are copied in order into a temporary run file,
+   reading each record with one unbuffered positioned read.
+2. The run files are merged (k-way) into the output file. Every file is deleted as soon as it is merged, so
+   the temporary files take about the size of the capture at any time.
+
+Compressed captures cannot be read at random offsets efficiently, they are decompressed into a temporary file
+first.
+
+Packets with equal timestamps keep their original order.
+"""
+
+from __future__ import annotations
+
+import io
+import shutil
+import tempfile
+from array import array
+from pathlib import Path
+from typing import BinaryIO
+
+from simplepcap.exceptions import IncorrectPacketSizeError, WrongPacketHeaderError
+from simplepcap.parsers.default import DefaultParser
+from simplepcap.parsers.default.compression import detect_compression, open_capture
+from simplepcap.parsers.default.files import PositionedReader
+from simplepcap.parsers.default.parser import PCAP_FILE_HEADER_SIZE
+from simplepcap.parsers.default.records import (
+    PACKET_HEADER_SIZE,
+    RecordWriter,
+    byteorder_for,
+    merge_sorted_files,
+    read_file_header_bytes,
+    record_header_struct,
+)
+
+
+DEFAULT_RUN_SIZE = 1_000_000  # in records
+DEFAULT_MERGE_FAN_IN = 128  # in files
+COPY_BUFFER_SIZE = 1024 * 1024  # in bytes
+
+
+def sort_capture(
+    file_path: Path | str,
+    output_path: Path | str,
+    *,
+    run_size: int = DEFAULT_RUN_SIZE,
+    merge_fan_in: int = DEFAULT_MERGE_FAN_IN,
+    temp_dir: Path | str | None = None,
+) -> int:
+    """Write the packets of a capture sorted by timestamp into a new capture.
+
+    Args:
+        file_path: Path to the pcap file.
+        output_path: Path of the sorted pcap file.
+        run_size: Number of records sorted in memory at once.
+        merge_fan_in: Maximum number of run files merged at once. More runs are merged in several passes.
+        temp_dir: Directory for the temporary run files (and the decompressed input of a compressed capture).
+            The system temporary directory by default.
+
+    Raises:
+        ValueError: if `run_size` is not positive or `merge_fan_in` is less than 2.
+        simplepcap.exceptions.PcapFileNotFoundError: if the file does not exist.
+        simplepcap.exceptions.WrongPacketHeaderError: if a packet header is invalid.
+        simplepcap.exceptions.IncorrectPacketSizeError: if a packet size is incorrect.
+
+    Returns:
+        Number of packets written.
+    """
+    if run_size < 1:
+        raise ValueError("run_size must be positive")
+    if merge_fan_in < 2:
+        raise ValueError("merge_fan_in must be at least 2")
+    file_path, output_path = Path(file_path), Path(output_path)
+    byteorder = byteorder_for(DefaultParser(file_path=file_path).file_header)
+    file_header = read_file_header_bytes(file_path, PCAP_FILE_HEADER_SIZE)
+
+    with tempfile.TemporaryDirectory(prefix="simplepcap-sort-", dir=temp_dir) as temp:
+        directory = Path(temp)
+        source_path = file_path
+        if detect_compression(file_path) is not None:
+            source_path = directory / "input.pcap"
+            with open_capture(file_path) as compressed, source_path.open("wb") as decompressed:
+                shutil.copyfileobj(compressed, decompressed, COPY_BUFFER_SIZE)
+        with open_capture(source_path) as scanner, PositionedReader(source_path) as source:
+            scanner.seek(PCAP_FILE_HEADER_SIZE)
+            runs, count = _write_runs(
+                scanner,
+                source,
+                directory=directory,
+                file_header=file_header,
+                byteorder=byteorder,
+                run_size=run_size,
+                file_path=file_path.as_posix(),
+            )
+        if source_path != file_path:
+            source_path.unlink()
+        if not runs:
+            output_path.write_bytes(file_header)
+        elif len(runs) == 1:
+            shutil.move(runs[0], output_path)
+        else:
+            merge_runs(
+                runs,
+                output_path,
+                file_header=file_header,
+                byteorder=byteorder,
+                merge_fan_in=merge_fan_in,
+                delete_inputs=True,
+            )
+    return count
+
+
+def merge_runs(
+    paths: list[Path],
+    output_path: Path,
+    *,
+    file_header: bytes,
+    byteorder: str,
+    merge_fan_in: int = DEFAULT_MERGE_FAN_IN,
+    delete_inputs: bool = False,
+) -> None:
+    """Merge captures that are each sorted by timestamp into one sorted capture.
+
+    When timestamps are equal, packets of an earlier file come first.
+    The intermediate files of the merge passes are deleted once merged. The input files are kept, unless
+    `delete_inputs` is set: then every input is deleted as soon as its group is merged.
+    """
+    paths = list(paths)
+    generation = 0
+    disposable = delete_inputs
+    while len(paths) > merge_fan_in:
+        merged = []
+        for start in range(0, len(paths), merge_fan_in):
+            end = start + merge_fan_in
+            group = paths[start:end]
+            path = group[0].with_name(f"merge-{generation}-{start}.pcap")
+            merge_sorted_files(group, path, file_header=file_header, byteorder=byteorder)
+            if disposable:
+                for merged_path in group:
+                    merged_path.unlink()
+            merged.append(path)
+        paths = merged
+        generation += 1
+        disposable = True
+    merge_sorted_files(paths, output_path, file_header=file_header, byteorder=byteorder)
+    if disposable:
+        for merged_path in paths:
+            merged_path.unlink()
+
+
+def _write_runs(
+    scanner: BinaryIO,
+    source: PositionedReader,
+    *,
+    directory: Path,
+    file_header: bytes,
+    byteorder: str,
+    run_size: int,
+    file_path: str,
+) -> tuple[list[Path], int]:
+    unpack = record_header_struct(byteorder).unpack
+    read, seek = scanner.read, scanner.seek
+    # Sort keys are `timestamp << shift | number in run`, so a plain int sort is stable.
+    shift = run_size.bit_length()
+    keys: list[int] = []
+    offsets = array("Q")
+    lengths = array("I")
+    runs: list[Path] = []
+    count = 0
+    offset = PCAP_FILE_HEADER_SIZE
+    while True:
+        raw_header = read(PACKET_HEADER_SIZE)
+        if not raw_header:
+            break
+        if len(raw_header) != PACKET_HEADER_SIZE:
+            raise WrongPacketHeaderError(
+                f"Invalid packet header size: {len(raw_header)}. Expected {PACKET_HEADER_SIZE}",
+                packet_number=count,
+                file_path=file_path,
+            )
+        timestamp_sec, timestamp_usec, captured_len, _ = unpack(raw_header)
+        keys.append(((timestamp_sec * 1_000_000 + timestamp_usec) << shift) | len(offsets))
+        offsets.append(offset)
+        lengths.append(PACKET_HEADER_SIZE + captured_len)
+        offset = seek(captured_len, io.SEEK_CUR)
+        count += 1
+        if len(offsets) == run_size:
+            runs.append(
+                _write_run(
+                    source,
+                    directory / f"run-{len(runs)}.pcap",
+                    keys,
+                    offsets,
+                    lengths,
+                    file_header=file_header,
+                    shift=shift,
+                    first_number=count - len(offsets),
+                    file_path=file_path,
+                )
+            )
+            keys, offsets, lengths = [], array("Q"), array("I")
+    if offsets:
+        runs.append(
+            _write_run(
+                source,
+                directory / f"run-{len(runs)}.pcap",
+                keys,
+                offsets,
+                lengths,
+                file_header=file_header,
+                shift=shift,
+                first_number=count - len(offsets),
+                file_path=file_path,
+            )
+        )
+    return runs, count
+
+
+def _write_run(
+    source: PositionedReader,
+    path: Path,
+    keys: list[int],
+    offsets: array,
+    lengths: array,
+    *,
+    file_header: bytes,
+    shift: int,
+    first_number: int,
+    file_path: str,
+) -> Path:
+    keys.sort()
+    mask = (1 << shift) - 1
+    read = source.read
+    with RecordWriter(file_path=path, file_header=file_header) as writer:
+        for key in keys:
+            number = key & mask
+            record = read(offsets[number], lengths[number])
+            if len(record) != lengths[number]:
+                raise IncorrectPacketSizeError(
+                    f"Invalid packet size: {max(len(record) - PACKET_HEADER_SIZE, 0)}. "
+                    f"Expected {lengths[number] - PACKET_HEADER_SIZE}",
+                    packet_number=first_number + number,
+                    file_path=file_path,
+                )
+            writer.write_raw(record)
+    return path
@@ -0,0 +1,267 @@
+"""Split one capture into several smaller captures.
+
+Records are copied byte for byte, payloads are never decoded into `Packet` objects.
+"""
+
+from __future__ import annotations
+
+import zlib
+from collections import OrderedDict
+from datetime import timedelta
+from pathlib import Path
+
+from simplepcap.enum import LinkType
+from simplepcap.parsers.default import DefaultParser
+from simplepcap.parsers.default.compression import open_capture
+from simplepcap.parsers.default.parser import PCAP_FILE_HEADER_SIZE
+from simplepcap.parsers.default.records import (
+    DEFAULT_WRITE_BUFFER_SIZE,
+    RecordWriter,
+    byteorder_for,
+    iter_raw_records,
+    read_file_header_bytes,
+    select_criterion,
+)
+
+
+DEFAULT_MAX_OPEN_FILES = 64
+COMPRESSION_SUFFIXES = (".gz", ".zst")
+
+ETHERTYPE_IPV4 = 0x0800
+ETHERTYPE_IPV6 = 0x86DD
+VLAN_ETHERTYPES = {0x8100, 0x88A8, 0x9100}
+NULL_IPV6_FAMILIES = {24, 28, 30}
+PORT_PROTOCOLS = {6, 17, 132}  # TCP, UDP, SCTP
+FLOW_LINK_TYPES = {
+    LinkType.ETHERNET,
+    LinkType.RAW,
+    LinkType.IPV4,
+    LinkType.IPV6,
+    LinkType.LINUX_SLL,
+    LinkType.NULL,
+    LinkType.LOOP,
+}
+
+
+def split_capture(
+    file_path: Path | str,
+    output_dir: Path | str,
+    *,
+    interval: timedelta | float | None = None,
+    packets: int | None = None,
+    size: int | None = None,
+    flows: int | None = None,
+    max_open_files: int = DEFAULT_MAX_OPEN_FILES,
+    buffer_size: int = DEFAULT_WRITE_BUFFER_SIZE,
+) -> list[Path]:
+    """Split a capture into several captures. Exactly one of the split criteria must be given.
+
+    Output files are named `<input stem>_<shard number>.pcap` and keep the file header of the input file.
+    The stem is the input file name without its compression suffix, `capture.pcap.gz` gives `capture_00000.pcap`.
+
+    Args:
+        file_path: Path to the pcap file.
+        output_dir: Directory for the output files. Created if it does not exist.
+        interval: Start a new file every `interval` (seconds or `timedelta`) of capture time.
+        packets: Maximum number of packets per output file.
+        size: Maximum size of an output file in bytes. A file always holds at least one packet.
+        flows: Number of output files. Both directions of a TCP/UDP/SCTP flow land in the same file,
+            packets that are not IP go to the first file.
+        max_open_files: Maximum number of output files open at the same time (used by `flows`).
+        buffer_size: Number of bytes buffered per output file before they are written.
+
+    Raises:
+        ValueError: if not exactly one split criteria is given or it is not positive
+            (an `interval` shorter than one microsecond or a fractional count that rounds to 0).
+        ValueError: if `flows` is used with a link type that is not supported.
+        simplepcap.exceptions.PcapFileNotFoundError: if the file does not exist.
+        simplepcap.exceptions.WrongPacketHeaderError: if a packet header is invalid.
+        simplepcap.exceptions.IncorrectPacketSizeError: if a packet size is incorrect.
+
+    Returns:
+        Paths of the created files, in shard order.
+    """
+    _, value = select_criterion({"interval": interval, "packets": packets, "size": size, "flows": flows})
+    if max_open_files < 1:
+        raise ValueError("max_open_files must be positive")
+
+    file_path = Path(file_path)
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    file_header = DefaultParser(file_path=file_path).file_header
+    if flows is not None and file_header.link_type not in FLOW_LINK_TYPES:
+        raise ValueError(f"Splitting by flows is not supported for link type {file_header.link_type.name}")
+
+    splitter = _ShardWriters(
+        output_dir=output_dir,
+        stem=_stem(file_path),
+        file_header=read_file_header_bytes(file_path, PCAP_FILE_HEADER_SIZE),
+        max_open_files=max_open_files,
+        buffer_size=buffer_size,
+    )
+    with open_capture(file_path) as stream, splitter:
+        stream.seek(PCAP_FILE_HEADER_SIZE)
+        records = iter_raw_records(stream, byteorder=byteorder_for(file_header), file_path=file_path.as_posix())
+        if interval is not None:
+            _split_by_interval(records, splitter, value)
+        elif packets is not None:
+            _split_by_packets(records, splitter, value)
+        elif size is not None:
+            _split_by_size(records, splitter, value)
+        else:
+            _split_by_flows(records, splitter, value, file_header.link_type)
+    return splitter.paths
+
+
+def _split_by_interval(records, splitter: _ShardWriters, interval_usec: int) -> None:
+    shard = -1
+    first = None
+    for record in records:
+        timestamp = record.timestamp_sec * 1_000_000 + record.timestamp_usec
+        if first is None:
+            first = timestamp
+        # Packets that go back in time stay in the current file.
+        shard = max(shard, (timestamp - first) // interval_usec)
+        splitter.write(shard, record.header, record.data)
+
+
+def _split_by_packets(records, splitter: _ShardWriters, packets: int) -> None:
+    for number, record in enumerate(records):
+        splitter.write(number // packets, record.header, record.data)
+
+
+def _split_by_size(records, splitter: _ShardWriters, size: int) -> None:
+    shard = 0
+    current = None
+    for record in records:
+        record_size = len(record.header) + record.captured_len
+        if current is not None and current + record_size > size:
+            shard += 1
+            current = None
+        current = splitter.write(shard, record.header, record.data)
+
+
+def _split_by_flows(records, splitter: _ShardWriters, flows: int, link_type: LinkType) -> None:
+    for record in records:
+        key = _flow_key(record.data, link_type)
+        splitter.write(zlib.crc32(key) % flows if key else 0, record.header, record.data)
+
+
+class _ShardWriters:
+    """Keeps at most `max_open_files` writers open, the least recently used one is closed first."""
+
+    def __init__(
+        self,
+        *,
+        output_dir: Path,
+        stem: str,
+        file_header: bytes,
+        max_open_files: int,
+        buffer_size: int,
+    ) -> None:
+        self.__output_dir = output_dir
+        self.__stem = stem
+        self.__file_header = file_header
+        self.__max_open_files = max_open_files
+        self.__buffer_size = buffer_size
+        self.__writers: OrderedDict[int, RecordWriter] = OrderedDict()
+        self.__paths: dict[int, Path] = {}
+
+    def __enter__(self) -> _ShardWriters:
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    @property
+    def paths(self) -> list[Path]:
+        return [self.__paths[shard] for shard in sorted(self.__paths)]
+
+    def write(self, shard: int, header: bytes, data: bytes) -> int:
+        """Write a record to the shard and return the size of the shard file."""
+        writer = self.__writers.get(shard)
+        if writer is None:
+            writer = self.__open(shard)
+        else:
+            self.__writers.move_to_end(shard)
+        writer.write(header, data)
+        return writer.size
+
+    def close(self) -> None:
+        for writer in self.__writers.values():
+            writer.close()
+        self.__writers.clear()
+
+    def __open(self, shard: int) -> RecordWriter:
+        if len(self.__writers) >= self.__max_open_files:
+            _, oldest = self.__writers.popitem(last=False)
+            oldest.close()
+        append = shard in self.__paths
+        if not append:
+            self.__paths[shard] = self.__output_dir / f"{self.__stem}_{shard:05d}.pcap"
+        writer = RecordWriter(
+            file_path=self.__paths[shard],
+            file_header=self.__file_header,
+            append=append,
+            buffer_size=self.__buffer_size,
+        )
+        self.__writers[shard] = writer
+        return writer
+
+
+def _flow_key(data: bytes, link_type: LinkType) -> bytes:
+    """Return a direction independent flow key of the packet, or empty bytes if the packet is not IP."""
+    if link_type == LinkType.ETHERNET:
+        offset = 12
+        ethertype = int.from_bytes(data[12:14], "big")
+        while ethertype in VLAN_ETHERTYPES:
+            offset += 4
+            tag_end = offset + 2
+            ethertype = int.from_bytes(data[offset:tag_end], "big")
+        offset += 2
+    elif link_type == LinkType.LINUX_SLL:
+        ethertype = int.from_bytes(data[14:16], "big")
+        offset = 16
+    elif link_type in (LinkType.NULL, LinkType.LOOP):
+        # NULL stores the family in host byte order, LOOP in network byte order.
+        family = int.from_bytes(data[0:4], "little" if data[:1] != b"\x00" else "big")
+        ethertype = ETHERTYPE_IPV6 if family in NULL_IPV6_FAMILIES else ETHERTYPE_IPV4
+        offset = 4
+    else:
+        ethertype = None
+        offset = 0
+
+    network = data[offset:]
+    version = network[0] >> 4 if network else 0
+    if ethertype == ETHERTYPE_IPV4 or (ethertype is None and version == 4):
+        protocol = network[9:10]
+        source = network[12:16]
+        destination = network[16:20]
+        header_len = (network[0] & 0x0F) * 4
+        fragmented = int.from_bytes(network[6:8], "big") & 0x3FFF
+        transport = network[header_len:] if not fragmented else b""
+    elif ethertype == ETHERTYPE_IPV6 or (ethertype is None and version == 6):
+        protocol = network[6:7]
+        source = network[8:24]
+        destination = network[24:40]
+        transport = network[40:]
+    else:
+        return b""
+    if len(destination) not in (4, 16):
+        return b""
+
+    source_port = destination_port = b""
+    if protocol and protocol[0] in PORT_PROTOCOLS:
+        source_port = transport[0:2]
+        destination_port = transport[2:4]
+    first, second = sorted((source + source_port, destination + destination_port))
+    return protocol + first + second
+
+
+def _stem(file_path: Path) -> str:
+    name = file_path.name
+    for suffix in COMPRESSION_SUFFIXES:
+        if name.lower().endswith(suffix):
+            name = name[: -len(suffix)]
+            break
+    return Path(name).stem
@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 from dataclasses import dataclass
 from datetime import datetime
 from simplepcap.enum import LinkType
@@ -111,7 +113,9 @@ class PacketHeader:
 
     Attributes:
         timestamp:
-            Seconds and microseconds when this packet was captured.
+            Seconds and microseconds when this packet was captured. A timezone aware `datetime` (UTC by default)
+            or an integer UTC epoch in microseconds or nanoseconds, depending on the `timestamps` option
+            of the parser.
 
             [Source](https://wiki.wireshark.org/Development/LibpcapFileFormat#record-packet-header)
         captured_len:
@@ -126,7 +130,7 @@ class PacketHeader:
             [Source](https://wiki.wireshark.org/Development/LibpcapFileFormat#record-packet-header)
     """
 
-    timestamp: datetime
+    timestamp: datetime | int
     captured_len: int
     original_len: int
 
@@ -144,3 +148,40 @@ class Packet:
 
     header: PacketHeader
     data: bytes
+
+
+@dataclass(frozen=True)
+class SampledPacket(Packet):
+    """Packet returned by sampling.
+
+    Attributes:
+        position:
+            position of the packet in the capture (zero based). Use it to extrapolate results
+            to the whole capture.
+    """
+
+    position: int
+
+
+@dataclass(frozen=True)
+class CaptureStats:
+    """Summary of a capture computed from the packet headers only.
+
+    Attributes:
+        packets:
+            number of packets.
+        captured_bytes:
+            sum of the captured lengths of the packets.
+        original_bytes:
+            sum of the original lengths of the packets.
+        start:
+            timestamp of the earliest packet, `None` for an empty capture.
+        end:
+            timestamp of the latest packet, `None` for an empty capture.
+    """
+
+    packets: int
+    captured_bytes: int
+    original_bytes: int
+    start: datetime | None
+    end: datetime | None
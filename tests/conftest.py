@@ -0,0 +1,35 @@
+import struct
+from pathlib import Path
+
+import pytest
+
+
+FILE_HEADER = struct.pack("<IHHiIII", 0xA1B2C3D4, 2, 4, 0, 0, 65535, 1)
+
+
+def ethernet_ipv4_udp(source: bytes, destination: bytes, source_port: int, destination_port: int, payload=b""):
+    ip_header = (
+        b"\x45\x00"
+        + (28 + len(payload)).to_bytes(2, "big")
+        + b"\x00\x00\x40\x00\x40\x11\x00\x00"
+        + source
+        + destination
+    )
+    udp_header = struct.pack(">HHHH", source_port, destination_port, 8 + len(payload), 0)
+    return b"\xff" * 6 + b"\x00" * 6 + b"\x08\x00" + ip_header + udp_header + payload
+
+
+def make_record(timestamp_sec: int, timestamp_usec: int, data: bytes) -> bytes:
+    return struct.pack("<IIII", timestamp_sec, timestamp_usec, len(data), len(data)) + data
+
+
+@pytest.fixture
+def make_pcap(tmp_path):
+    """Return a function that writes a pcap file from `(timestamp_sec, timestamp_usec, data)` tuples."""
+
+    def make(packets, name: str = "test.pcap", file_header: bytes = FILE_HEADER) -> Path:
+        path = tmp_path / name
+        path.write_bytes(file_header + b"".join(make_record(*packet) for packet in packets))
+        return path
+
+    return make
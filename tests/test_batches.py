@@ -0,0 +1,154 @@
+import pickle
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from simplepcap.exceptions import FileIsNotOpenError, IncorrectPacketSizeError
+from simplepcap.parsers import DefaultParser
+from simplepcap.parsers.default import BatchPool, PacketBatch
+
+
+PACKETS = [(1000 + i, i, bytes([i % 256]) * (10 + i % 90)) for i in range(500)]
+
+
+def summarize(batch: PacketBatch) -> list[tuple[int, bytes]]:
+    with batch:
+        return [(record.timestamp_usec, bytes(record.data)) for record in batch]
+
+
+def fail(batch: PacketBatch) -> None:
+    raise RuntimeError(batch.name)
+
+
+def test_batches_hold_all_records(make_pcap):
+    with BatchPool(segment_size=4096, max_segments=2) as pool, DefaultParser(file_path=make_pcap(PACKETS)) as parser:
+        records = []
+        for batch in parser.iter_batches(pool):
+            assert 0 < len(batch) <= batch.max_records
+            records += [(record.timestamp_sec, record.original_len, bytes(record.data)) for record in batch]
+            pool.release(batch)
+
+        assert pool.segments <= 2
+    assert records == [(sec, len(data), data) for sec, _, data in PACKETS]
+
+
+def test_batches_in_worker_processes(make_pcap):
+    with (
+        BatchPool(segment_size=8192, max_segments=3) as pool,
+        DefaultParser(file_path=make_pcap(PACKETS)) as parser,
+        ProcessPoolExecutor(max_workers=2) as executor,
+    ):
+        futures = []
+        for batch in parser.iter_batches(pool):
+            future = executor.submit(summarize, batch)
+            future.add_done_callback(lambda _, name=batch.name: pool.release(name))
+            futures.append(future)
+        records = [record for future in futures for record in future.result()]
+
+        assert pool.segments <= 3
+    assert records == [(usec, data) for _, usec, data in PACKETS]
+
+
+def test_failed_workers_release_their_batches(make_pcap):
+    with (
+        BatchPool(segment_size=8192, max_segments=2, timeout=10) as pool,
+        DefaultParser(file_path=make_pcap(PACKETS)) as parser,
+        ProcessPoolExecutor(max_workers=2) as executor,
+    ):
+        futures = []
+        for batch in parser.iter_batches(pool):
+            future = executor.submit(fail, batch)
+            future.add_done_callback(lambda _, name=batch.name: pool.release(name))
+            futures.append(future)
+
+        assert len(futures) > 2
+        assert all(isinstance(future.exception(), RuntimeError) for future in futures)
+
+
+def test_acquire_times_out(make_pcap):
+    with BatchPool(segment_size=1024, max_segments=1, timeout=0.01) as pool:
+        pool.acquire()
+        with pytest.raises(TimeoutError):
+            pool.acquire()
+        with DefaultParser(file_path=make_pcap(PACKETS)) as parser:
+            with pytest.raises(TimeoutError):
+                list(parser.iter_batches(pool))
+
+
+def test_acquire_timeout_is_a_deadline():
+    with BatchPool(segment_size=1024, max_segments=1) as pool:
+        pool.acquire()
+        stop = threading.Event()
+
+        def wake_waiters():  # wakeups without a free batch, as when another thread wins the race
+            while not stop.wait(0.01):
+                with pool._BatchPool__condition:
+                    pool._BatchPool__condition.notify_all()
+
+        waker = threading.Thread(target=wake_waiters)
+        waker.start()
+        start = time.monotonic()
+        try:
+            with pytest.raises(TimeoutError):
+                pool.acquire(timeout=0.1)
+        finally:
+            stop.set()
+            waker.join()
+        assert time.monotonic() - start < 2
+
+
+def test_pickle_transfers_only_the_name():
+    with BatchPool(segment_size=1024 * 1024) as pool:
+        batch = pool.acquire()
+        assert batch.append(1, 2, 100, b"payload")
+
+        payload = pickle.dumps(batch)
+        with pickle.loads(payload) as attached:
+            record = attached[0]
+            assert (record.timestamp_sec, record.timestamp_usec, record.original_len) == (1, 2, 100)
+            assert record.data == b"payload"
+            assert record.data.readonly
+            del record
+
+    assert len(payload) < 200
+
+
+def test_pool_recycles_segments():
+    with BatchPool(segment_size=1024, max_records=4, max_segments=1) as pool:
+        batch = pool.acquire()
+        assert all(batch.append(0, 0, 1, b"x") for _ in range(4))
+        assert not batch.append(0, 0, 1, b"x")
+        with pytest.raises(TimeoutError):
+            pool.acquire(timeout=0.01)
+
+        pool.release(batch.name)
+        again = pool.acquire()
+
+        assert again is batch
+        assert len(again) == 0
+    with pytest.raises(ValueError):
+        pool.acquire()
+
+
+def test_fill_errors(make_pcap):
+    with BatchPool(segment_size=1024, max_records=4) as pool:
+        with DefaultParser(file_path=make_pcap([(0, 0, b"x" * 2000)])) as parser:
+            with pytest.raises(ValueError):
+                list(parser.iter_batches(pool))
+        path = make_pcap([(0, 0, b"x" * 100)])
+        path.write_bytes(path.read_bytes()[:-1])
+        with DefaultParser(file_path=path) as parser:
+            with pytest.raises(IncorrectPacketSizeError):
+                list(parser.iter_batches(pool))
+        assert pool.segments == 1  # failed batches went back to the pool
+    with pytest.raises(FileIsNotOpenError):
+        DefaultParser(file_path=path).iter_batches(pool)
+
+
+def test_invalid_pool():
+    with pytest.raises(ValueError):
+        BatchPool(segment_size=64, max_records=10)
+    with pytest.raises(ValueError):
+        BatchPool(max_segments=0)
@@ -0,0 +1,92 @@
+import os
+import shutil
+from datetime import datetime, timezone
+
+from simplepcap.parsers import DefaultParser
+from simplepcap.parsers.default import IndexCache
+from simplepcap.parsers.default.cache import CACHE_FILE_SUFFIX
+
+
+PACKETS = [(1000 + i, i, bytes([i]) * (i + 1)) for i in range(10)]
+
+
+def test_index_is_loaded_from_cache(make_pcap, tmp_path):
+    path = make_pcap(PACKETS)
+    cache = IndexCache(tmp_path / "cache")
+    with DefaultParser(file_path=path, cache=cache) as parser:
+        built = parser.get_index()
+
+    assert cache.size > 0
+    loaded = cache.load(path)
+    assert loaded is not None
+    assert list(loaded.offsets) == list(built.offsets)
+    assert list(loaded.captured_lens) == list(built.captured_lens)
+    with DefaultParser(file_path=path, cache=cache) as parser:
+        assert parser.search(b"\x09") == [9]
+
+
+def test_cache_misses_after_file_changes(make_pcap, tmp_path):
+    path = make_pcap(PACKETS)
+    cache = IndexCache(tmp_path / "cache")
+    with DefaultParser(file_path=path, cache=cache) as parser:
+        parser.get_index()
+
+    make_pcap(PACKETS[:3])
+    os.utime(path, ns=(0, 1))
+
+    assert cache.load(path) is None
+    with DefaultParser(file_path=path, cache=cache) as parser:
+        assert len(parser.get_index()) == 3
+
+
+def test_content_hash_survives_copies(make_pcap, tmp_path):
+    path = make_pcap(PACKETS)
+    cache = IndexCache(tmp_path / "cache", hash_content=True)
+    with DefaultParser(file_path=path, cache=cache) as parser:
+        parser.get_index()
+
+    copy = shutil.copy(path, tmp_path / "copy.pcap")
+
+    assert cache.load(copy) is not None
+
+
+def test_cache_evicts_least_recently_used(make_pcap, tmp_path):
+    cache = IndexCache(tmp_path / "cache", max_bytes=1)
+    first, second = make_pcap(PACKETS, name="first.pcap"), make_pcap(PACKETS, name="second.pcap")
+    with DefaultParser(file_path=first, cache=cache) as parser:
+        parser.get_index()
+    with DefaultParser(file_path=second, cache=cache) as parser:
+        parser.get_index()
+
+    assert cache.load(first) is None
+    assert cache.load(second) is not None
+
+
+def test_get_stats(make_pcap):
+    with DefaultParser(file_path=make_pcap(PACKETS)) as parser:
+        stats = parser.get_stats()
+
+    assert stats.packets == len(PACKETS)
+    assert stats.captured_bytes == sum(len(packet[2]) for packet in PACKETS)
+    assert stats.start == datetime.fromtimestamp(1000, timezone.utc)
+    assert stats.end == datetime(1970, 1, 1, 0, 16, 49, 9, tzinfo=timezone.utc)
+
+
+def test_cache_miss_hashes_the_capture_once(make_pcap, tmp_path, monkeypatch):
+    cache = IndexCache(tmp_path / "cache", hash_content=True)
+    calls = []
+    key = cache.key
+    monkeypatch.setattr(cache, "key", lambda file_path: calls.append(file_path) or key(file_path))
+    with DefaultParser(file_path=make_pcap(PACKETS), cache=cache) as parser:
+        parser.get_index()
+
+    assert len(calls) == 1
+
+
+def test_cache_ignores_entries_removed_by_other_processes(make_pcap, tmp_path):
+    cache = IndexCache(tmp_path / "cache", max_bytes=1)
+    (cache.directory / f"gone{CACHE_FILE_SUFFIX}").symlink_to(tmp_path / "missing")
+    with DefaultParser(file_path=make_pcap(PACKETS), cache=cache) as parser:
+        parser.get_index()
+
+    assert cache.size > 0
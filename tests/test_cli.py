@@ -0,0 +1,168 @@
+import csv
+import json
+import struct
+
+import pytest
+
+from conftest import FILE_HEADER
+from simplepcap import cli
+from simplepcap.cli import main
+from simplepcap.parsers import DefaultParser
+
+
+PACKETS = [(1_600_000_000 + i, 0, b"packet %d %s" % (i, b"secret" if i % 3 == 0 else b"public")) for i in range(10)]
+
+
+def read_data(path):
+    with DefaultParser(file_path=path) as parser:
+        return [packet.data for packet in parser]
+
+
+@pytest.mark.parametrize("workers", ["1", "2"])
+def test_stats(make_pcap, capsys, workers):
+    first = make_pcap(PACKETS, name="first.pcap")
+    second = make_pcap(PACKETS[:4], name="second.pcap")
+
+    assert main(["stats", "--json", "--workers", workers, str(first), str(second)]) == 0
+
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [line["packets"] for line in lines] == [10, 4]
+    assert lines[0]["start"] == "2020-09-13T12:26:40+00:00"
+    assert lines[0]["duration"] == 9
+
+
+def test_filter(make_pcap, tmp_path, capsys):
+    output = tmp_path / "out.pcap"
+
+    assert main(["filter", str(make_pcap(PACKETS)), str(output), "-e", "SECRET", "-i", "--progress"]) == 0
+
+    assert read_data(output) == [data for _, _, data in PACKETS if b"secret" in data]
+    captured = capsys.readouterr()
+    assert "4 packets written" in captured.out
+    search, copy = captured.err.splitlines()[-2:]
+    assert search.startswith("search: 1/1 files") and copy.startswith("copy: 1/1 files")
+    assert "MiB/s" in copy
+
+
+def test_filter_in_parts(make_pcap, tmp_path, monkeypatch):
+    output = tmp_path / "out.pcap"
+    monkeypatch.setattr(cli, "SEARCH_PART_SIZE", 50)
+
+    assert main(["filter", str(make_pcap(PACKETS)), str(output), "-E", r"secret|packet [57]", "--workers", "2"]) == 0
+
+    assert read_data(output) == [data for _, _, data in PACKETS if b"secret" in data or data[7:8] in b"57"]
+
+
+def test_slice(make_pcap, tmp_path):
+    output = tmp_path / "out.pcap"
+    path = str(make_pcap(PACKETS))
+
+    assert main(["slice", path, str(output), "--start", "2020-09-13T12:26:42", "--end", "1600000007"]) == 0
+    assert read_data(output) == [data for _, _, data in PACKETS[2:7]]
+
+    assert main(["slice", path, str(output), "--skip", "8", "--count", "5"]) == 0
+    assert read_data(output) == [data for _, _, data in PACKETS[8:]]
+
+
+def test_merge(make_pcap, tmp_path):
+    output = tmp_path / "out.pcap"
+    even = make_pcap(PACKETS[::2], name="even.pcap")
+    odd = make_pcap(PACKETS[1::2], name="odd.pcap")
+
+    assert main(["merge", str(output), str(even), str(odd)]) == 0
+
+    assert read_data(output) == [data for _, _, data in PACKETS]
+    assert output.read_bytes()[:24] == FILE_HEADER
+
+
+@pytest.mark.parametrize(
+    "file_header", [struct.pack("<IHHiIII", 0xA1B2C3D4, 2, 4, 0, 0, 128, 1), FILE_HEADER[:20] + b"\x69\0\0\0"]
+)
+def test_merge_rejects_different_headers(make_pcap, tmp_path, capsys, file_header):
+    first = make_pcap(PACKETS[::2], name="first.pcap")
+    second = make_pcap(PACKETS[1::2], name="second.pcap", file_header=file_header)
+
+    assert main(["merge", str(tmp_path / "out.pcap"), str(first), str(second)]) == 1
+    assert f"{second} differs from {first}" in capsys.readouterr().err
+
+
+def test_split_and_index(make_pcap, tmp_path, capsys):
+    first = make_pcap(PACKETS, name="first.pcap")
+    second = make_pcap(PACKETS, name="second.pcap")
+
+    assert main(["split", str(tmp_path / "shards"), str(first), str(second), "--packets", "4", "--workers", "2"]) == 0
+    assert main(["index", str(first), "--cache", str(tmp_path / "cache")]) == 0
+
+    assert sorted(path.name for path in (tmp_path / "shards").iterdir()) == [
+        f"{stem}_{shard:05d}.pcap" for stem in ("first", "second") for shard in range(3)
+    ]
+    assert list((tmp_path / "cache").glob("*.idx"))
+    assert capsys.readouterr().out.splitlines()[-1] == f"{first}: 10 packets"
+
+
+def test_export(make_pcap, tmp_path):
+    output = tmp_path / "headers.csv"
+
+    assert main(["export", str(make_pcap(PACKETS)), "-o", str(output)]) == 0
+
+    rows = list(csv.DictReader(output.open()))
+    assert len(rows) == len(PACKETS)
+    assert rows[1] == {
+        "number": "1",
+        "timestamp_ns": "1600000001000000000",
+        "captured_len": str(len(PACKETS[1][2])),
+        "original_len": str(len(PACKETS[1][2])),
+        "offset": str(24 + 16 + len(PACKETS[0][2])),
+    }
+
+
+def test_export_in_parts(make_pcap, tmp_path, monkeypatch):
+    path = make_pcap(PACKETS)
+    monkeypatch.setattr(cli, "EXPORT_PART_SIZE", 3)
+
+    assert main(["export", str(path), "-o", str(tmp_path / "parts.jsonl"), "--format", "jsonl", "--workers", "2"]) == 0
+    assert main(["export", str(path), "-o", str(tmp_path / "whole.jsonl"), "--format", "jsonl", "--workers", "1"]) == 0
+
+    lines = (tmp_path / "parts.jsonl").read_text().splitlines()
+    assert [json.loads(line)["number"] for line in lines] == list(range(len(PACKETS)))
+    assert (tmp_path / "parts.jsonl").read_text() == (tmp_path / "whole.jsonl").read_text()
+
+
+def test_progress_of_one_file(make_pcap, tmp_path, capsys, monkeypatch):
+    monkeypatch.setattr(cli, "PROGRESS_INTERVAL", 0)
+
+    assert main(["slice", str(make_pcap(PACKETS)), str(tmp_path / "out.pcap"), "--count", "5", "--progress"]) == 0
+
+    reports = capsys.readouterr().err.replace("\n", "\r").split("\r")
+    assert "0/1 files" in reports[0]
+    assert reports[-2].startswith("1/1 files")
+
+
+@pytest.mark.parametrize("command", ["stats", "filter", "slice", "merge", "split", "index", "export"])
+def test_every_command_accepts_workers(command):
+    with pytest.raises(SystemExit) as error:
+        main([command, "--workers", "2", "--help"])
+    assert error.value.code == 0
+
+
+def test_errors(tmp_path, capsys):
+    assert main(["stats", str(tmp_path / "missing.pcap")]) == 1
+    assert "missing.pcap" in capsys.readouterr().err
+    with pytest.raises(SystemExit):
+        main(["split", str(tmp_path), str(tmp_path / "x.pcap")])
+    for start in ("inf", "-inf", "nan"):
+        with pytest.raises(SystemExit):
+            main(["slice", str(tmp_path / "x.pcap"), str(tmp_path / "y.pcap"), f"--start={start}"])
+        assert "invalid timestamp" in capsys.readouterr().err
+
+
+def test_errors_in_worker_processes(make_pcap, tmp_path, capsys):
+    good = make_pcap(PACKETS, name="good.pcap")
+    bad = make_pcap(PACKETS, name="bad.pcap")
+    bad.write_bytes(bad.read_bytes()[:-3])
+
+    assert main(["stats", "--workers", "2", str(good), str(bad), str(tmp_path / "missing.pcap")]) == 1
+
+    error = capsys.readouterr().err
+    assert error.startswith(f"simplepcap: error: {bad}")
+    assert "Traceback" not in error
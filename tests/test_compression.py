@@ -0,0 +1,161 @@
+import gzip
+import io
+import os
+import struct
+
+import pytest
+
+from simplepcap.parsers import DefaultParser
+from simplepcap.parsers.default.compression import RAW_CHUNK_SIZE, _ZstdDecoder, open_capture
+
+from conftest import FILE_HEADER, make_record
+
+
+PACKETS = [(1000 + i, i, bytes([i % 256]) * (i % 50 + 1)) for i in range(200)]
+CAPTURE = FILE_HEADER + b"".join(make_record(*packet) for packet in PACKETS)
+
+
+@pytest.fixture
+def gzip_path(tmp_path):
+    path = tmp_path / "test.pcap.gz"
+    path.write_bytes(gzip.compress(CAPTURE))
+    return path
+
+
+def test_parser_reads_gzip(gzip_path):
+    with DefaultParser(file_path=gzip_path) as parser:
+        packets = parser.get_all_packets()
+
+    assert parser.compression == "gzip"
+    assert [packet.data for packet in packets] == [packet[2] for packet in PACKETS]
+
+
+def test_parser_reads_concatenated_gzip_members(tmp_path):
+    path = tmp_path / "test.pcap.gz"
+    middle = len(CAPTURE) // 2
+    path.write_bytes(gzip.compress(CAPTURE[:middle]) + gzip.compress(CAPTURE[middle:]))
+
+    with DefaultParser(file_path=path) as parser:
+        assert len(parser.get_all_packets()) == len(PACKETS)
+
+
+def test_gzip_stream_seeks_from_checkpoints(tmp_path):
+    data = os.urandom(64 * 1024) * 8
+    path = tmp_path / "data.gz"
+    path.write_bytes(gzip.compress(data))
+
+    with open_capture(path, checkpoint_span=32 * 1024) as stream:
+        assert stream.read(10) == data[:10]
+        stream.seek(300_000)
+        assert stream.read(100) == data[300_000:300_100]
+        stream.seek(5)
+        assert stream.read(100) == data[5:105]
+        assert stream.seek(0, io.SEEK_END) == len(data)
+        stream.seek(-50, io.SEEK_END)
+        assert stream.read() == data[-50:]
+        stream.seek(len(data) + 10)
+        assert stream.read(10) == b""
+        stream.seek(1000)
+        assert stream.read(10) == data[1000:1010]
+
+
+def test_index_and_search_on_gzip(gzip_path):
+    with DefaultParser(file_path=gzip_path) as parser:
+        index = parser.get_index()
+        hits = parser.search(b"\x05\x05")
+
+    assert len(index) == len(PACKETS)
+    assert list(index.timestamps_usec) == [packet[1] for packet in PACKETS]
+    assert hits == [number for number, packet in enumerate(PACKETS) if b"\x05\x05" in packet[2]]
+
+
+def test_max_payload_on_gzip(gzip_path):
+    with DefaultParser(file_path=gzip_path, max_payload=3) as parser:
+        packets = parser.get_all_packets()
+
+    assert [packet.data for packet in packets] == [packet[2][:3] for packet in PACKETS]
+    assert [packet.header.captured_len for packet in packets] == [len(packet[2]) for packet in PACKETS]
+
+
+def gzip_member(data: bytes, size: int) -> bytes:
+    """Return a stored (uncompressed) gzip member of exactly `size` bytes holding the start of `data`."""
+    length = size
+    member = gzip.compress(data[:length], compresslevel=0, mtime=0)
+    while len(member) != size:
+        length -= len(member) - size
+        member = gzip.compress(data[:length], compresslevel=0, mtime=0)
+    return member
+
+
+def test_gzip_member_boundary_splits_the_magic(tmp_path):
+    # The next member starts at the last byte of a raw chunk: only the first magic byte is in the chunk.
+    data = os.urandom(RAW_CHUNK_SIZE + 4096)
+    first = gzip_member(data, RAW_CHUNK_SIZE - 1)
+    second = gzip.compress(data)
+    path = tmp_path / "data.gz"
+    path.write_bytes(first + second)
+
+    with open_capture(path) as stream:
+        assert stream.read() == gzip.decompress(first + second)
+
+
+def zstd_seekable(data: bytes, frame_size: int) -> bytes:
+    """Compress `data` in the zstd seekable format: independent frames followed by a seek table."""
+    zstandard = pytest.importorskip("zstandard")
+    compressor = zstandard.ZstdCompressor()
+    frames, entries = [], []
+    for start in range(0, len(data), frame_size):
+        end = start + frame_size
+        frame = compressor.compress(data[start:end])
+        frames.append(frame)
+        entries.append(struct.pack("<II", len(frame), len(data[start:end])))
+    footer = struct.pack("<IBI", len(frames), 0, 0x8F92EAB1)
+    table = b"".join(entries) + footer
+    return b"".join(frames) + struct.pack("<II", 0x184D2A5E, len(table)) + table
+
+
+def test_parser_reads_zstd(tmp_path):
+    zstandard = pytest.importorskip("zstandard")
+    path = tmp_path / "test.pcap.zst"
+    path.write_bytes(zstandard.ZstdCompressor().compress(CAPTURE))
+
+    with DefaultParser(file_path=path) as parser:
+        packets = parser.get_all_packets()
+        index = parser.get_index()
+
+    assert parser.compression == "zstd"
+    assert [packet.data for packet in packets] == [packet[2] for packet in PACKETS]
+    assert len(index) == len(PACKETS)
+
+
+def test_zstd_seekable_format(tmp_path):
+    data = os.urandom(4096) * 64
+    path = tmp_path / "data.zst"
+    path.write_bytes(zstd_seekable(data, 10_000))
+
+    decoder = _ZstdDecoder(path)
+    assert decoder.checkpoint_before(205_000) == 200_000  # seeks start at the frame, not at the file start
+    decoder.close()
+    with open_capture(path) as stream:
+        assert stream.read(10) == data[:10]
+        stream.seek(200_005)
+        assert stream.read(30_000) == data[200_005:230_005]
+        stream.seek(15)
+        assert stream.read(100) == data[15:115]
+        assert stream.seek(0, io.SEEK_END) == len(data)
+        stream.seek(-50, io.SEEK_END)
+        assert stream.read() == data[-50:]
+
+
+def test_zstd_seek_without_seek_table(tmp_path):
+    zstandard = pytest.importorskip("zstandard")
+    data = os.urandom(4096) * 64
+    path = tmp_path / "data.zst"
+    compressor = zstandard.ZstdCompressor()
+    path.write_bytes(compressor.compress(data[:100_000]) + compressor.compress(data[100_000:]))
+
+    with open_capture(path) as stream:
+        stream.seek(150_000)
+        assert stream.read(100) == data[150_000:150_100]
+        stream.seek(50)
+        assert stream.read() == data[50:]
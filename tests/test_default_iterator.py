@@ -1,5 +1,5 @@
 import io
-from datetime import datetime
+from datetime import datetime, timezone
 from unittest.mock import MagicMock
 
 import pytest
@@ -7,7 +7,7 @@ import pytest
 from simplepcap import Packet
 from simplepcap.exceptions import IncorrectPacketSizeError, ReadAfterCloseError, WrongPacketHeaderError
 from simplepcap.parser import ParserIterator
-from simplepcap.parsers import DefaultParserIterator
+from simplepcap.parsers import DefaultParser, DefaultParserIterator
 
 
 PACKET_HEADER_SIZE = 16
@@ -19,8 +19,8 @@ MOCK_PACKET_BODY = (
     b"\x7f\x00\x00\x01\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
     b"\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00\x00"
 )
-TIMESTAMP = datetime(2001, 1, 2, 3, 4, 5, 123456)
-TIMESTAMP_SEC_INT = int(datetime(2001, 1, 2, 3, 4, 5).timestamp())
+TIMESTAMP = datetime(2001, 1, 2, 3, 4, 5, 123456, tzinfo=timezone.utc)
+TIMESTAMP_SEC_INT = int(datetime(2001, 1, 2, 3, 4, 5, tzinfo=timezone.utc).timestamp())
 TIMESTAMP_USEC_INT = 123456
 VALID_TIMESTAMP_SEC = TIMESTAMP_SEC_INT.to_bytes(4, byteorder="little")
 VALID_TIMESTAMP_USEC = TIMESTAMP_USEC_INT.to_bytes(4, byteorder="little")
@@ -159,3 +159,59 @@ def test_read_after_close_error(default_parser_iterator, mock_buffered_reader):
         next(default_parser_iterator)
     assert excinfo.value.packet_number == 1
     assert excinfo.value.file_path == TEST_FILE_PATH
+
+
+def test_max_payload_truncates_data_and_skips_the_rest(mock_buffered_reader):
+    iterator = DefaultParserIterator(file_path=TEST_FILE_PATH, buffered_reader=mock_buffered_reader, max_payload=14)
+    mock_buffered_reader.read.side_effect = [
+        MOCK_HEADER,
+        MOCK_PACKET_BODY[:14],
+        MOCK_PACKET_BODY[-1:],  # Last skipped byte, checks that the packet is complete
+        b"",  # Empty data to signal end of file
+    ]
+
+    packet = next(iterator)
+
+    assert packet.data == MOCK_PACKET_BODY[:14]
+    assert packet.header.captured_len == len(MOCK_PACKET_BODY)
+    mock_buffered_reader.read.assert_any_call(14)
+    mock_buffered_reader.seek.assert_called_once_with(len(MOCK_PACKET_BODY) - 14 - 1, io.SEEK_CUR)
+
+
+def test_max_payload_raises_on_truncated_packet(mock_buffered_reader):
+    iterator = DefaultParserIterator(file_path=TEST_FILE_PATH, buffered_reader=mock_buffered_reader, max_payload=14)
+    mock_buffered_reader.read.side_effect = [
+        MOCK_HEADER,
+        MOCK_PACKET_BODY[:14],
+        b"",  # The file ends before the end of the packet
+    ]
+
+    with pytest.raises(IncorrectPacketSizeError) as excinfo:
+        next(iterator)
+
+    assert excinfo.value.packet_number == 0
+    assert excinfo.value.file_path == TEST_FILE_PATH
+
+
+def test_max_payload_larger_than_packet_reads_whole_packet(mock_buffered_reader):
+    iterator = DefaultParserIterator(file_path=TEST_FILE_PATH, buffered_reader=mock_buffered_reader, max_payload=1000)
+    mock_buffered_reader.read.side_effect = [
+        MOCK_HEADER,
+        MOCK_PACKET_BODY,
+        b"",  # Empty data to signal end of file
+    ]
+
+    assert next(iterator).data == MOCK_PACKET_BODY
+    mock_buffered_reader.seek.assert_not_called()
+
+
+@pytest.mark.parametrize("max_payload", [None, 10])
+def test_truncated_last_packet_in_file(make_pcap, max_payload):
+    path = make_pcap([(1000, 0, b"x" * 100), (1001, 0, b"y" * 100)])
+    path.write_bytes(path.read_bytes()[:-1])
+
+    with DefaultParser(file_path=path, max_payload=max_payload) as parser:
+        with pytest.raises(IncorrectPacketSizeError) as excinfo:
+            parser.get_all_packets()
+
+    assert excinfo.value.packet_number == 1
@@ -0,0 +1,132 @@
+import io
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from simplepcap.exceptions import ReadAfterCloseError
+from simplepcap.parsers import DefaultParser
+from simplepcap.parsers.default.prefetch import ChunkSource, FileChunkSource, PrefetchingReader
+
+
+PACKETS = [(1000 + i, i % 1_000_000, i.to_bytes(4, "big") * (1 + i % 50)) for i in range(2000)]
+
+
+@pytest.fixture
+def capture(make_pcap):
+    return make_pcap(PACKETS)
+
+
+def test_prefetching_reader_reads_and_seeks(tmp_path):
+    path = tmp_path / "data.bin"
+    data = bytes(range(256)) * 100
+    path.write_bytes(data)
+
+    with io.BufferedReader(PrefetchingReader(FileChunkSource(path, chunk_size=1000), queue_size=2)) as reader:
+        assert reader.read(10) == data[:10]
+        reader.seek(5000)
+        assert reader.read(3000) == data[5000:8000]
+        reader.seek(100)
+        assert reader.read(10) == data[100:110]
+        assert reader.seek(0, io.SEEK_END) == len(data)
+        assert reader.read() == b""
+        reader.seek(-5, io.SEEK_END)
+        assert reader.read() == data[-5:]
+
+
+@pytest.mark.parametrize("max_payload", [None, 3])
+def test_prefetch_matches_plain_reading(capture, max_payload):
+    with DefaultParser(file_path=capture, max_payload=max_payload) as parser:
+        expected = parser.get_all_packets()
+    with DefaultParser(file_path=capture, max_payload=max_payload, prefetch=True, prefetch_size=4096) as parser:
+        assert parser.get_all_packets() == expected
+        assert parser.iterators == []
+
+
+def test_shared_iterator_across_threads(capture):
+    with DefaultParser(file_path=capture, prefetch=True, prefetch_size=4096) as parser:
+        packets = iter(parser)
+        barrier = threading.Barrier(4)
+
+        def consume():
+            barrier.wait()
+            return [packet.data for packet in packets]
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            results = [future.result() for future in [executor.submit(consume) for _ in range(4)]]
+
+    received = [data for result in results for data in result]
+    assert sorted(received) == sorted(data for _, _, data in PACKETS)
+    # Every thread sees the packets in file order.
+    order = {data: number for number, (_, _, data) in enumerate(PACKETS)}
+    for result in results:
+        assert [order[data] for data in result] == sorted(order[data] for data in result)
+
+
+def test_iterator_per_thread(capture):
+    with DefaultParser(file_path=capture, prefetch=True, prefetch_size=4096) as parser:
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(parser.get_all_packets) for _ in range(4)]
+            futures += [executor.submit(parser.get_stats) for _ in range(4)]
+            results = [future.result() for future in futures]
+
+    for packets in results[:4]:
+        assert [packet.data for packet in packets] == [data for _, _, data in PACKETS]
+    assert all(stats.packets == len(PACKETS) for stats in results[4:])
+
+
+def test_close_stops_open_iterators(capture):
+    parser = DefaultParser(file_path=capture, prefetch=True)
+    parser.open()
+    iterator = iter(parser)
+    next(iterator)
+    assert parser.iterators == [iterator]
+
+    parser.close()
+
+    assert parser.iterators == []
+    with pytest.raises(ReadAfterCloseError):
+        next(iterator)
+
+
+def test_invalid_prefetch_size(capture):
+    with pytest.raises(ValueError):
+        DefaultParser(file_path=capture, prefetch_size=0)
+
+
+class BlockingCache:
+    """Index cache whose lookups wait until `release` is set."""
+
+    def __init__(self):
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def key(self, file_path):
+        return "key"
+
+    def load(self, file_path, *, key=None):
+        self.started.set()
+        assert self.release.wait(timeout=10)
+        return None
+
+    def store(self, file_path, index, *, key=None):
+        pass
+
+
+def test_index_build_does_not_block_iteration(capture):
+    cache = BlockingCache()
+    with DefaultParser(file_path=capture, cache=cache) as parser:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            indexes = [executor.submit(parser.get_index) for _ in range(2)]
+            assert cache.started.wait(timeout=10)
+
+            first = next(iter(parser))  # while the index is being built
+            cache.release.set()
+
+            assert first.data == PACKETS[0][2]
+            assert indexes[0].result() is indexes[1].result()
+
+
+def test_chunk_source_is_abstract(capture):
+    with pytest.raises(TypeError):
+        ChunkSource(capture)
@@ -0,0 +1,111 @@
+import io
+
+import pytest
+
+from simplepcap.exceptions import IncorrectPacketSizeError
+from simplepcap.parsers import DefaultParser
+from simplepcap.parsers.default.recovery import RecordValidator, iter_recovered_records
+from simplepcap.tools import repair_capture
+
+from conftest import FILE_HEADER, make_record
+
+
+PACKETS = [(1_600_000_000 + i, i * 1000, bytes([i]) * (40 + i)) for i in range(20)]
+RECORDS = [make_record(*packet) for packet in PACKETS]
+GARBAGE = b"\xde\xad\xbe\xef" * 37 + b"\x01\x02\x03"
+
+
+@pytest.fixture
+def damaged_path(tmp_path):
+    path = tmp_path / "damaged.pcap"
+    path.write_bytes(FILE_HEADER + b"".join(RECORDS[:5]) + GARBAGE + b"".join(RECORDS[5:]))
+    return path
+
+
+@pytest.fixture
+def truncated_path(tmp_path):
+    path = tmp_path / "truncated.pcap"
+    path.write_bytes(FILE_HEADER + b"".join(RECORDS[:10]) + RECORDS[10][:30])
+    return path
+
+
+def test_strict_parser_stops_on_damage(truncated_path):
+    with DefaultParser(file_path=truncated_path) as parser:
+        with pytest.raises(IncorrectPacketSizeError):
+            parser.get_all_packets()
+
+
+def test_tolerant_parser_skips_damaged_part(damaged_path):
+    with DefaultParser(file_path=damaged_path, tolerant=True) as parser:
+        iterator = iter(parser)
+        packets = list(iterator)
+
+    assert [packet.data for packet in packets] == [packet[2] for packet in PACKETS]
+    start = len(FILE_HEADER) + sum(len(record) for record in RECORDS[:5])
+    assert iterator.damaged_ranges == [(start, start + len(GARBAGE))]
+
+
+def test_tolerant_parser_stops_at_truncated_tail(truncated_path):
+    with DefaultParser(file_path=truncated_path, tolerant=True) as parser:
+        packets = parser.get_all_packets()
+
+    assert [packet.data for packet in packets] == [packet[2] for packet in PACKETS[:10]]
+
+
+@pytest.mark.parametrize("path", ["damaged_path", "truncated_path"])
+def test_tolerant_parser_with_max_payload(request, path):
+    path = request.getfixturevalue(path)
+    with DefaultParser(file_path=path, tolerant=True) as parser:
+        expected = [packet.data[:42] for packet in parser]
+    with DefaultParser(file_path=path, tolerant=True, max_payload=42) as parser:
+        assert [packet.data for packet in parser] == expected
+
+
+def test_recovery_skips_the_rest_of_the_packet():
+    class CountingStream(io.BytesIO):
+        bytes_read = 0
+
+        def read(self, size=-1):
+            data = super().read(size)
+            self.bytes_read += len(data)
+            return data
+
+    packets = [(1_600_000_000 + i, 0, bytes([i]) * 1000) for i in range(10)]
+    stream = CountingStream(b"".join(make_record(*packet) for packet in packets))
+    validator = RecordValidator(byteorder="little", snap_len=65535)
+    records = list(iter_recovered_records(stream, validator=validator, damaged_ranges=[], max_payload=4))
+
+    assert [record.data for record in records] == [data[:4] for _, _, data in packets]
+    assert [record.captured_len for record in records] == [1000] * len(packets)
+    assert stream.bytes_read == len(packets) * (16 + 4 + 1)
+
+
+def test_repair_capture(damaged_path, tmp_path):
+    output = tmp_path / "repaired.pcap"
+
+    report = repair_capture(damaged_path, output)
+
+    assert report.packets == len(PACKETS)
+    assert report.is_damaged
+    assert report.damaged_bytes == len(GARBAGE)
+    assert output.read_bytes() == FILE_HEADER + b"".join(RECORDS)
+
+
+def test_repair_intact_capture(make_pcap):
+    report = repair_capture(make_pcap(PACKETS))
+
+    assert report.packets == len(PACKETS)
+    assert not report.is_damaged
+
+
+def test_tolerant_parser_accepts_clock_steps(make_pcap):
+    # Intact capture whose clock jumps 30 days forward, then 2 hours back.
+    packets = PACKETS[:5] + [(sec + 30 * 86400, usec, data) for sec, usec, data in PACKETS[5:10]]
+    packets += [(sec + 30 * 86400 - 7200, usec, data) for sec, usec, data in PACKETS[10:]]
+    with DefaultParser(file_path=make_pcap(packets), tolerant=True) as parser:
+        iterator = iter(parser)
+        data = [packet.data for packet in iterator]
+
+    assert data == [packet[2] for packet in packets]
+    assert iterator.damaged_ranges == []
+    assert not repair_capture(make_pcap(packets)).is_damaged
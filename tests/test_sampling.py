@@ -0,0 +1,83 @@
+import gzip
+from datetime import timedelta
+
+import pytest
+
+from simplepcap import SampledPacket
+from simplepcap.parsers import DefaultParser
+
+
+PACKETS = [(1000 + i // 10, (i % 10) * 100_000, i.to_bytes(2, "big") * 10) for i in range(100)]
+
+
+@pytest.fixture
+def parser(make_pcap):
+    with DefaultParser(file_path=make_pcap(PACKETS), max_payload=2) as parser:
+        yield parser
+
+
+def test_sample_every(parser):
+    sample = list(parser.sample(every=25))
+
+    assert [packet.position for packet in sample] == [0, 25, 50, 75]
+    assert all(isinstance(packet, SampledPacket) for packet in sample)
+    assert [packet.data for packet in sample] == [i.to_bytes(2, "big") for i in (0, 25, 50, 75)]
+    assert sample[1].header.captured_len == 20
+
+
+def test_sample_reservoir(parser):
+    sample = list(parser.sample(reservoir=10, seed=1))
+
+    positions = [packet.position for packet in sample]
+    assert len(positions) == 10
+    assert positions == sorted(set(positions))
+    assert [packet.data for packet in sample] == [position.to_bytes(2, "big") for position in positions]
+    assert positions == [packet.position for packet in parser.sample(reservoir=10, seed=1)]
+
+
+def test_sample_reservoir_larger_than_capture(parser):
+    assert len(list(parser.sample(reservoir=1000))) == len(PACKETS)
+
+
+def test_sample_interval(parser):
+    sample = list(parser.sample(interval=timedelta(seconds=2)))
+
+    assert [packet.position for packet in sample] == [0, 20, 40, 60, 80]
+
+
+@pytest.mark.parametrize("compressed", [False, True])
+def test_sample_fractional_counts(make_pcap, tmp_path, compressed):
+    path = make_pcap(PACKETS)
+    if compressed:
+        path = tmp_path / "test.pcap.gz"
+        path.write_bytes(gzip.compress(make_pcap(PACKETS).read_bytes()))
+
+    with DefaultParser(file_path=path) as parser:
+        assert [packet.position for packet in parser.sample(every=2.5)] == list(range(0, 100, 2))
+        assert len(list(parser.sample(reservoir=3.0, seed=1))) == 3
+        with pytest.raises(ValueError):
+            parser.sample(every=0.5)
+
+
+def test_sample_requires_one_mode(parser):
+    with pytest.raises(ValueError):
+        parser.sample()
+    with pytest.raises(ValueError):
+        parser.sample(every=2, reservoir=2)
+
+
+def test_sample_rejects_interval_below_one_microsecond(parser):
+    with pytest.raises(ValueError):
+        parser.sample(interval=0.0000004)
+    with pytest.raises(ValueError):
+        parser.sample(interval=timedelta(microseconds=0.4))
+
+
+def test_sample_compressed_capture(make_pcap, tmp_path):
+    path = tmp_path / "test.pcap.gz"
+    path.write_bytes(gzip.compress(make_pcap(PACKETS).read_bytes()))
+
+    with DefaultParser(file_path=path) as parser:
+        sample = list(parser.sample(every=30))
+
+    assert [packet.data for packet in sample] == [PACKETS[i][2] for i in (0, 30, 60, 90)]
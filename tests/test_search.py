@@ -0,0 +1,63 @@
+import re
+
+import pytest
+
+from simplepcap.exceptions import FileIsNotOpenError
+from simplepcap.parsers import DefaultParser
+
+
+PACKETS = [
+    (1000, 0, b"GET /index.html HTTP/1.1"),
+    (1001, 0, b"nothing to see here"),
+    (1002, 0, b"password=hunter2"),
+    (1003, 0, b"split-mar"),
+    (1004, 0, b"ker in two"),
+    (1005, 0, b"Host: EVIL.example"),
+]
+
+
+@pytest.fixture
+def parser(make_pcap):
+    with DefaultParser(file_path=make_pcap(PACKETS)) as parser:
+        yield parser
+
+
+def test_search_single_literal(parser):
+    assert parser.search(b"password") == [2]
+
+
+def test_search_multiple_patterns(parser):
+    assert parser.search([b"index.html", re.compile(rb"evil\.example", re.IGNORECASE)]) == [0, 5]
+
+
+def test_search_does_not_match_across_packets(parser):
+    assert parser.search(b"split-marker") == []
+
+
+def test_search_matches_each_packet_once(parser):
+    assert parser.search([b"e"]) == [0, 1, 2, 4, 5]
+
+
+def test_search_matches_data_only(parser):
+    # Every record header holds the timestamp 0x03e8 (1000) in little endian order.
+    assert parser.search(b"\xe8\x03") == []
+
+
+def test_search_requires_open_parser(make_pcap):
+    parser = DefaultParser(file_path=make_pcap(PACKETS))
+    with pytest.raises(FileIsNotOpenError):
+        parser.search(b"password")
+
+
+def test_get_index(parser):
+    index = parser.get_index()
+
+    assert len(index) == len(PACKETS)
+    assert list(index.timestamps_sec) == [packet[0] for packet in PACKETS]
+    assert list(index.captured_lens) == [len(packet[2]) for packet in PACKETS]
+    assert index.offsets[0] == 24
+
+
+@pytest.mark.parametrize("pattern", [rb"(?i)evil\.EXAMPLE", rb"(?x)(?i) evil \. example  # the host"])
+def test_search_pattern_with_global_inline_flags(parser, pattern):
+    assert parser.search([re.compile(pattern), b"password"]) == [2, 5]
@@ -0,0 +1,100 @@
+import gzip
+import random
+
+import pytest
+
+from simplepcap.exceptions import IncorrectPacketSizeError
+from simplepcap.parsers import DefaultParser
+from simplepcap.tools import sort_capture
+from simplepcap.parsers.default.records import merge_sorted_files
+from simplepcap.tools import sort
+from simplepcap.tools.sort import merge_runs
+
+from conftest import FILE_HEADER
+
+
+def read_records(path):
+    with DefaultParser(file_path=path) as parser:
+        return [(packet.header.timestamp, packet.data) for packet in parser]
+
+
+@pytest.mark.parametrize("run_size", [1, 3, 7, 1000])
+def test_sort_capture(make_pcap, tmp_path, run_size):
+    rng = random.Random(0)
+    packets = [(1000 + rng.randrange(20), rng.randrange(1_000_000), bytes([i]) * (i % 7 + 1)) for i in range(50)]
+    path = make_pcap(packets)
+    output = tmp_path / "sorted.pcap"
+
+    count = sort_capture(path, output, run_size=run_size, merge_fan_in=2, temp_dir=tmp_path)
+
+    records = read_records(output)
+    assert count == len(packets)
+    assert records == sorted(read_records(path), key=lambda record: record[0])
+    assert output.stat().st_size == path.stat().st_size
+
+
+def test_sort_capture_keeps_order_of_equal_timestamps(make_pcap, tmp_path):
+    path = make_pcap([(1001, 0, b"a"), (1000, 0, b"b"), (1001, 0, b"c"), (1000, 0, b"d")])
+    output = tmp_path / "sorted.pcap"
+
+    sort_capture(path, output, run_size=2)
+
+    assert [data for _, data in read_records(output)] == [b"b", b"d", b"a", b"c"]
+
+
+def test_sort_compressed_capture(make_pcap, tmp_path):
+    path = make_pcap([(1000 + 5 - i, 0, bytes([i])) for i in range(5)])
+    compressed = tmp_path / "test.pcap.gz"
+    compressed.write_bytes(gzip.compress(path.read_bytes()))
+    output = tmp_path / "sorted.pcap"
+
+    sort_capture(compressed, output, run_size=2)
+
+    assert [data for _, data in read_records(output)] == [bytes([i]) for i in reversed(range(5))]
+
+
+def test_sort_empty_capture(make_pcap, tmp_path):
+    output = tmp_path / "sorted.pcap"
+
+    assert sort_capture(make_pcap([]), output) == 0
+    assert read_records(output) == []
+
+
+def test_merge_runs_deletes_intermediate_files(make_pcap, tmp_path):
+    runs = [make_pcap([(1000 + i, 0, bytes([i])), (1010 + i, 0, bytes([i]))], name=f"run-{i}.pcap") for i in range(5)]
+    output = tmp_path / "out" / "merged.pcap"
+    output.parent.mkdir()
+
+    merge_runs(runs, output, file_header=FILE_HEADER, byteorder="little", merge_fan_in=2)
+
+    assert sorted(tmp_path.glob("*.pcap")) == sorted(runs)
+    assert [data for _, data in read_records(output)] == [bytes([i]) for i in range(5)] * 2
+
+
+@pytest.mark.parametrize("merge_fan_in", [2, 8])
+def test_merge_runs_deletes_disposable_inputs(make_pcap, tmp_path, monkeypatch, merge_fan_in):
+    runs = [make_pcap([(1000 + i, 0, bytes([i])), (1010 + i, 0, bytes([i]))], name=f"run-{i}.pcap") for i in range(5)]
+    output = tmp_path / "out" / "merged.pcap"
+    output.parent.mkdir()
+    merged_files = []
+
+    def record_existing_files(file_paths, *args, **kwargs):
+        merged_files.append(len(list(tmp_path.glob("*.pcap"))))
+        return merge_sorted_files(file_paths, *args, **kwargs)
+
+    monkeypatch.setattr(sort, "merge_sorted_files", record_existing_files)
+    merge_runs(runs, output, file_header=FILE_HEADER, byteorder="little", merge_fan_in=merge_fan_in, delete_inputs=True)
+
+    assert list(tmp_path.glob("*.pcap")) == []
+    assert [data for _, data in read_records(output)] == [bytes([i]) for i in range(5)] * 2
+    if merge_fan_in == 2:
+        # The runs of a group are gone before the next group is merged.
+        assert merged_files[:3] == [5, 4, 3]
+
+
+def test_sort_truncated_capture(make_pcap, tmp_path):
+    path = make_pcap([(1001, 0, b"a" * 10), (1000, 0, b"b" * 10)])
+    path.write_bytes(path.read_bytes()[:-1])
+
+    with pytest.raises(IncorrectPacketSizeError):
+        sort_capture(path, tmp_path / "sorted.pcap")
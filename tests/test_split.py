@@ -0,0 +1,92 @@
+import gzip
+from datetime import timedelta
+
+import pytest
+
+from simplepcap.parsers import DefaultParser
+from simplepcap.tools import split_capture
+
+from conftest import ethernet_ipv4_udp
+
+
+def read_packets(path):
+    with DefaultParser(file_path=path) as parser:
+        return parser.get_all_packets()
+
+
+def test_split_by_packets(make_pcap, tmp_path):
+    path = make_pcap([(1000 + i, 0, bytes([i]) * 20) for i in range(10)])
+
+    outputs = split_capture(path, tmp_path / "out", packets=4)
+
+    assert [len(read_packets(output)) for output in outputs] == [4, 4, 2]
+    assert [packet.data for output in outputs for packet in read_packets(output)] == [
+        packet.data for packet in read_packets(path)
+    ]
+
+
+@pytest.mark.parametrize("name", ["capture.pcap.gz", "capture.PCAP.GZ", "capture.pcap.zst", "capture.pcap"])
+def test_split_output_names(make_pcap, tmp_path, name):
+    path = make_pcap([(1000 + i, 0, bytes([i]) * 20) for i in range(3)])
+    if name.lower().endswith(".gz"):
+        (tmp_path / name).write_bytes(gzip.compress(path.read_bytes()))
+    else:
+        path.rename(tmp_path / name)
+
+    outputs = split_capture(tmp_path / name, tmp_path / "out", packets=2)
+
+    assert [output.name for output in outputs] == ["capture_00000.pcap", "capture_00001.pcap"]
+
+
+def test_split_by_interval(make_pcap, tmp_path):
+    path = make_pcap([(1000, 0, b"a"), (1000, 500_000, b"b"), (1001, 0, b"c"), (1005, 0, b"d")])
+
+    outputs = split_capture(path, tmp_path / "out", interval=timedelta(seconds=1))
+
+    assert [[packet.data for packet in read_packets(output)] for output in outputs] == [[b"a", b"b"], [b"c"], [b"d"]]
+
+
+def test_split_by_size(make_pcap, tmp_path):
+    path = make_pcap([(1000, 0, b"x" * 100) for _ in range(5)])
+
+    outputs = split_capture(path, tmp_path / "out", size=24 + 2 * 116)
+
+    assert [len(read_packets(output)) for output in outputs] == [2, 2, 1]
+    assert all(output.stat().st_size <= 24 + 2 * 116 for output in outputs)
+
+
+def test_split_by_flows_keeps_both_directions_together(make_pcap, tmp_path):
+    client, server = b"\x0a\x00\x00\x01", b"\x0a\x00\x00\x02"
+    packets = []
+    for port in range(1000, 1020):
+        packets.append((1000, port, ethernet_ipv4_udp(client, server, port, 53)))
+        packets.append((1000, port, ethernet_ipv4_udp(server, client, 53, port)))
+    path = make_pcap(packets)
+
+    outputs = split_capture(path, tmp_path / "out", flows=4, max_open_files=2)
+
+    assert 1 < len(outputs) <= 4
+    total = 0
+    for output in outputs:
+        ports = [packet.header.timestamp.microsecond for packet in read_packets(output)]
+        total += len(ports)
+        for port in set(ports):
+            assert ports.count(port) == 2
+    assert total == len(packets)
+
+
+def test_split_requires_exactly_one_criteria(make_pcap, tmp_path):
+    path = make_pcap([(1000, 0, b"a")])
+
+    with pytest.raises(ValueError):
+        split_capture(path, tmp_path / "out")
+    with pytest.raises(ValueError):
+        split_capture(path, tmp_path / "out", packets=1, size=100)
+
+
+@pytest.mark.parametrize(
+    "criteria", [{"interval": 0.0000004}, {"interval": timedelta(microseconds=0.4)}, {"packets": 0.5}]
+)
+def test_split_rejects_criteria_rounding_to_zero(make_pcap, tmp_path, criteria):
+    with pytest.raises(ValueError):
+        split_capture(make_pcap([(1000, 0, b"a")]), tmp_path / "out", **criteria)
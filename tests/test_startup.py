@@ -0,0 +1,109 @@
+import gzip
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from conftest import FILE_HEADER
+from simplepcap import FileHeader
+from simplepcap.exceptions import PcapFileNotFoundError, WrongFileHeaderError
+from simplepcap.parsers import DefaultParser
+
+
+PACKETS = [(1000 + i, 0, bytes([i]) * 20) for i in range(10)]
+
+
+def test_import_is_lazy():
+    code = (
+        "import sys, simplepcap, simplepcap.parsers, simplepcap.tools\n"
+        "loaded = [name for name in ('dataclasses', 'datetime', 'simplepcap.enum', 'simplepcap.types') "
+        "if name in sys.modules]\n"
+        "print(','.join(loaded))\n"
+        "simplepcap.Packet, simplepcap.parsers.DefaultParser\n"
+        "print('simplepcap.types' in sys.modules, 'simplepcap.parsers.default.parser' in sys.modules)\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=Path(__file__).parent.parent,
+    )
+
+    assert result.stdout.splitlines() == ["", "True True"]
+
+
+def test_parser_import_is_lazy(make_pcap):
+    features = ["batches", "cache", "compression", "index", "prefetch", "recovery", "sampling", "search"]
+    code = (
+        "import sys\n"
+        "from simplepcap.parsers import DefaultParser\n"
+        f"features = {features!r}\n"
+        "print(','.join(name for name in features if f'simplepcap.parsers.default.{name}' in sys.modules))\n"
+        "print('hashlib' in sys.modules, 'multiprocessing' in sys.modules)\n"
+        f"parser = DefaultParser(file_path={str(make_pcap(PACKETS))!r})\n"
+        "print(','.join(name for name in features if f'simplepcap.parsers.default.{name}' in sys.modules))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=Path(__file__).parent.parent,
+    )
+
+    assert result.stdout.splitlines() == ["", "False False", ""]
+
+
+def test_lazy_attributes_in_dir():
+    import simplepcap
+
+    assert {"Packet", "Parser", "FileHeader"} <= set(dir(simplepcap))
+    with pytest.raises(AttributeError):
+        simplepcap.Missing
+
+
+def test_parser_from_raw_header(tmp_path, make_pcap):
+    path = make_pcap(PACKETS)
+    with DefaultParser(file_path=path, file_header=FILE_HEADER) as parser:
+        assert [packet.data for packet in parser] == [data for _, _, data in PACKETS]
+
+    with pytest.raises(WrongFileHeaderError):
+        DefaultParser(file_path=path, file_header=FILE_HEADER[:10])
+
+
+def test_parser_from_parsed_header_does_not_touch_the_file(tmp_path, make_pcap):
+    header = DefaultParser(file_path=make_pcap(PACKETS)).file_header
+    parser = DefaultParser(file_path=tmp_path / "missing.pcap", file_header=header)
+
+    assert isinstance(parser.file_header, FileHeader)
+    assert parser.file_header == header
+
+
+@pytest.mark.parametrize("compressed", [False, True])
+def test_parser_from_fd(tmp_path, make_pcap, compressed):
+    path = make_pcap(PACKETS)
+    if compressed:
+        path.with_suffix(".pcap.gz").write_bytes(gzip.compress(path.read_bytes()))
+        path = path.with_suffix(".pcap.gz")
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.lseek(fd, 5, os.SEEK_SET)
+        with DefaultParser(file_path="capture", fd=fd) as parser:
+            first, second = iter(parser), iter(parser)
+            assert next(first).data == next(second).data == PACKETS[0][2]
+            assert [packet.data for packet in first] == [data for _, _, data in PACKETS[1:]]
+            assert parser.get_stats().packets == len(PACKETS)
+            assert parser.compression == ("gzip" if compressed else None)
+        assert os.lseek(fd, 0, os.SEEK_CUR) == 5
+    finally:
+        os.close(fd)
+
+
+def test_missing_file(tmp_path):
+    with pytest.raises(PcapFileNotFoundError):
+        DefaultParser(file_path=tmp_path / "missing.pcap")
+    with pytest.raises(PcapFileNotFoundError):
+        DefaultParser(file_path=tmp_path)
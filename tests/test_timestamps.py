@@ -0,0 +1,77 @@
+import struct
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from simplepcap.parsers import DefaultParser
+from simplepcap.parsers.default.timestamps import TimestampConverter
+
+
+PACKETS = [(1_600_000_000, 250_000, b"a"), (1_600_000_001, 999_999, b"b"), (1_600_000_003, 1, b"c")]
+CET_FILE_HEADER = struct.pack("<IHHiIII", 0xA1B2C3D4, 2, 4, -3600, 0, 65535, 1)
+
+
+def test_utc_datetimes_by_default(make_pcap):
+    with DefaultParser(file_path=make_pcap(PACKETS)) as parser:
+        timestamps = [packet.header.timestamp for packet in parser]
+
+    assert timestamps[0] == datetime(2020, 9, 13, 12, 26, 40, 250_000, tzinfo=timezone.utc)
+    assert timestamps[1] == datetime(2020, 9, 13, 12, 26, 41, 999_999, tzinfo=timezone.utc)
+    assert all(timestamp.tzinfo is timezone.utc for timestamp in timestamps)
+
+
+@pytest.mark.parametrize(
+    "unit, expected",
+    [
+        ("us", [1_600_000_000_250_000, 1_600_000_001_999_999, 1_600_000_003_000_001]),
+        ("ns", [1_600_000_000_250_000_000, 1_600_000_001_999_999_000, 1_600_000_003_000_001_000]),
+    ],
+)
+def test_integer_epochs(make_pcap, unit, expected):
+    with DefaultParser(file_path=make_pcap(PACKETS), timestamps=unit) as parser:
+        assert [packet.header.timestamp for packet in parser] == expected
+        assert list(parser.get_timestamps(unit)) == expected
+        assert [packet.header.timestamp for packet in parser.sample(every=2)] == expected[::2]
+        assert parser.get_stats().start == datetime(2020, 9, 13, 12, 26, 40, 250_000, tzinfo=timezone.utc)
+
+
+def test_thiszone_is_applied(make_pcap):
+    path = make_pcap(PACKETS, file_header=CET_FILE_HEADER)
+    with DefaultParser(file_path=path) as parser:
+        first = next(iter(parser)).header.timestamp
+        assert parser.timestamps.thiszone == -3600
+        assert parser.get_timestamps("us")[0] == 1_599_996_400_250_000
+    with DefaultParser(file_path=path, timestamps="us") as parser:
+        assert next(iter(parser)).header.timestamp == 1_599_996_400_250_000
+
+    assert first == datetime(2020, 9, 13, 11, 26, 40, 250_000, tzinfo=timezone.utc)
+
+
+def test_other_timezones(make_pcap):
+    tz = timezone(timedelta(hours=2))
+    with DefaultParser(file_path=make_pcap(PACKETS), tz=tz) as parser:
+        timestamp = next(iter(parser)).header.timestamp
+    with DefaultParser(file_path=make_pcap(PACKETS), tz=None) as parser:
+        local = next(iter(parser)).header.timestamp
+
+    assert timestamp.utcoffset() == timedelta(hours=2)
+    assert timestamp == datetime(2020, 9, 13, 12, 26, 40, 250_000, tzinfo=timezone.utc)
+    assert local.tzinfo is None
+    assert local == datetime.fromtimestamp(1_600_000_000) + timedelta(microseconds=250_000)
+
+
+def test_datetime64(make_pcap):
+    numpy = pytest.importorskip("numpy")
+    with DefaultParser(file_path=make_pcap(PACKETS, file_header=CET_FILE_HEADER)) as parser:
+        timestamps = parser.get_datetime64()
+        epochs = list(parser.get_timestamps("ns"))
+
+    assert timestamps.dtype == numpy.dtype("datetime64[ns]")
+    assert timestamps.astype("int64").tolist() == epochs
+
+
+def test_unsupported_units(make_pcap):
+    with pytest.raises(ValueError):
+        DefaultParser(file_path=make_pcap(PACKETS), timestamps="ms")
+    with pytest.raises(ValueError):
+        TimestampConverter().epochs([1], [2], "datetime")